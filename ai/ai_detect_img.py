@@ -1,15 +1,22 @@
 import cv2
-import onnxruntime as ort
-from PIL import ImageFont, ImageDraw
 import numpy as np
-from PIL import Image
 import pathlib
-import os
-import sys
-from utils.path import resource_path
+import shutil
+import time
+from typing import Optional
+from ai.model_registry import model_registry, DETECT_MODEL, current_rss_mb
+from ai.preprocess import BatchBuffer, StageTimer, image_size, load_batch
+from ai.tiling import MODE_SINGLE, MODE_TILED, detect_tiled, plan_tile_size, tile_cost
+from config import config
+from ai.batch_scheduler import detect_scheduler
+from ai.result_cache import file_sha256, make_cache_key
+from ai.nms import nms_indices, yolo_nms, yolo_output_to_pred
 from loguru_logging import log  # 导入全局日志对象
-# 新增：统一的资源定位函数，兼容源码运行与 PyInstaller 打包运行
-# 注意：需在任何资源文件（模型、字体等）被引用之前定义
+from utils.thumbnail import store_thumbnail_from_array, store_thumbnail_from_file
+
+# 检测叠加图缩略图的最长边与质量
+OVERLAY_THUMBNAIL_SIZE = 512
+OVERLAY_THUMBNAIL_QUALITY = 50
 
 
 @log.catch
@@ -29,37 +36,7 @@ def yolo_colors(cls_id):
 
 
 @log.catch
-def compute_iou(b1, b2):
-    """计算两个边界框的IoU（交并比）
-
-    Args:
-        b1, b2: 边界框坐标 [x1, y1, x2, y2]
-
-    Returns:
-        IoU值，范围[0, 1]
-    """
-    # 计算交集区域坐标
-    x1 = max(b1[0], b2[0])
-    y1 = max(b1[1], b2[1])
-    x2 = min(b1[2], b2[2])
-    y2 = min(b1[3], b2[3])
-
-    # 计算交集面积
-    inter_w = max(0, x2 - x1)
-    inter_h = max(0, y2 - y1)
-    inter_area = inter_w * inter_h
-
-    # 计算并集面积
-    area1 = (b1[2] - b1[0]) * (b1[3] - b1[1])
-    area2 = (b2[2] - b2[0]) * (b2[3] - b2[1])
-    union_area = area1 + area2 - inter_area
-
-    # 计算IoU
-    return inter_area / union_area if union_area > 0 else 0
-
-
-@log.catch
-def non_max_suppression(boxes, scores, class_ids, iou_threshold=0.5):
+def non_max_suppression(boxes, scores, class_ids, iou_threshold=0.5, agnostic=True):
     """执行非极大值抑制（NMS）去除重叠的边界框
 
     Args:
@@ -67,6 +44,7 @@ def non_max_suppression(boxes, scores, class_ids, iou_threshold=0.5):
         scores: 每个边界框的置信度列表
         class_ids: 每个边界框的类别ID列表
         iou_threshold: IoU阈值，默认为0.5
+        agnostic: 是否类别无关，默认为True（不同类别之间也会相互抑制）
 
     Returns:
         经过NMS处理后的边界框、置信度和类别ID
@@ -74,329 +52,318 @@ def non_max_suppression(boxes, scores, class_ids, iou_threshold=0.5):
     if not boxes:
         return [], [], []
 
-    # 转换为numpy数组便于处理
-    boxes_arr = np.array(boxes)
-    scores_arr = np.array(scores)
-
-    # 按置信度从高到低排序
-    order = np.argsort(scores_arr)[::-1]
-
-    # 保留的边界框索引
-    keep_idx = []
-
-    while order.size > 0:
-        # 保留置信度最高的边界框
-        i = order[0]
-        keep_idx.append(i)
-
-        # 计算当前边界框与其他边界框的IoU
-        ious = np.array([compute_iou(boxes_arr[i], boxes_arr[j])
-                        for j in order[1:]])
-
-        # 保留IoU小于阈值的边界框
-        indices = np.where(ious < iou_threshold)[0]
-        order = order[indices + 1]
+    keep_idx = nms_indices(boxes, scores, iou_threshold,
+                           class_ids=class_ids, agnostic=agnostic)
 
     # 返回保留的边界框、置信度和类别ID
-    return boxes_arr[keep_idx].tolist(), [scores[i] for i in keep_idx], [class_ids[i] for i in keep_idx]
-
-
-@log.catch
-def getInter(box1, box2):
-    """计算两个边界框的交集区域"""
-    box1_x1, box1_y1, box1_x2, box1_y2 = box1[0] - box1[2] / 2, box1[1] - box1[3] / 2, \
-        box1[0] + box1[2] / 2, box1[1] + box1[3] / 2
-    box2_x1, box2_y1, box2_x2, box2_y2 = box2[0] - box2[2] / 2, box2[1] - box2[3] / 2, \
-        box2[0] + box2[2] / 2, box2[1] + box2[3] / 2
-
-    if box1_x1 > box2_x2 or box1_x2 < box2_x1:
-        return 0
-    if box1_y1 > box2_y2 or box1_y2 < box2_y1:
-        return 0
-
-    x_list = [box1_x1, box1_x2, box2_x1, box2_x2]
-    x_list = np.sort(x_list)
-    x_inter = x_list[2] - x_list[1]
-
-    y_list = [box1_y1, box1_y2, box2_y1, box2_y2]
-    y_list = np.sort(y_list)
-    y_inter = y_list[2] - y_list[1]
-
-    inter = x_inter * y_inter
-    return inter
-
-
-@log.catch
-def getIou(box1, box2, inter_area):
-    """计算两个边界框的IoU"""
-    box1_area = box1[2] * box1[3]
-    box2_area = box2[2] * box2[3]
-    union = box1_area + box2_area - inter_area
-    iou = inter_area / union
-    return iou
+    return np.asarray(boxes)[keep_idx].tolist(), [scores[i] for i in keep_idx], [class_ids[i] for i in keep_idx]
 
 
 @log.catch
 def nms(pred, conf_thres, iou_thres):
-    """非极大值抑制（参照inference_onnx.py）"""
-    # 过滤低置信度框
-    conf = pred[..., 4] > conf_thres
-    box = pred[conf == True]
-
-    if len(box) == 0:
-        return []
-
-    cls_conf = box[..., 5:]
-    cls = []
-    for i in range(len(cls_conf)):
-        cls.append(int(np.argmax(cls_conf[i])))
+    """非极大值抑制（按类别），返回每行为 [cx, cy, w, h, conf, cls_id] 的检测结果"""
+    return yolo_nms(pred, conf_thres, iou_thres)
 
-    total_cls = list(set(cls))
-    output_box = []
 
-    for i in range(len(total_cls)):
-        clss = total_cls[i]
-        cls_box = []
+# 模型固定输入尺寸
+INPUT_WIDTH, INPUT_HEIGHT = 640, 640
+# 类别名称映射（根据实际模型类别）
+ID2NAME = {0: '异常黑点', 1: '异常视盘', 2: '异常黄斑'}
+# 单通道检测的置信度阈值与按类别NMS的IoU阈值
+CONF_THRES, IOU_THRES = 0.25, 0.7
+# 彩图聚合阶段类别无关NMS的IoU阈值
+AGGREGATE_IOU_THRES = 0.5
+# 尚无分块耗时样本且模型未预热时假定的单个分块推理耗时（毫秒）
+DEFAULT_TILE_MS = 100
+# 复用的模型输入批次缓冲区
+batch_buffer = BatchBuffer(INPUT_HEIGHT, INPUT_WIDTH)
 
-        for j in range(len(cls)):
-            if cls[j] == clss:
-                box[j][5] = clss
-                cls_box.append(box[j][:6])
 
-        cls_box = np.array(cls_box)
-        if len(cls_box) == 0:
-            continue
+def group_images(image_paths) -> dict:
+    """
+    按拍摄组（img_info["group"]）划分灰度通道图与彩图
+    返回 {group: {"channels": [idx, ...], "color": idx | None}}
+    """
+    groups: dict = {}
+    for idx, img_info in enumerate(image_paths):
+        group = groups.setdefault(img_info.get("group"), {"channels": [], "color": None})
+        if img_info["detect_file_name"].endswith("_color.jpg"):
+            group["color"] = idx
+        else:
+            group["channels"].append(idx)
+    return groups
 
-        # 按置信度排序
-        box_conf = cls_box[..., 4]
-        box_conf_sort = np.argsort(box_conf)[::-1]
-        cls_box = cls_box[box_conf_sort]
 
-        while len(cls_box) > 0:
-            # 保留置信度最高的框
-            max_conf_box = cls_box[0]
-            output_box.append(max_conf_box)
+def detection_cache_keys(image_paths, mode: str = MODE_SINGLE, tile_size: Optional[int] = None) -> list[str]:
+    """
+    计算每张图片的检测结果缓存键：源文件SHA-256 + 模型标识 + 阈值（+ 分块参数）
+    彩图的结果由同组灰度通道图聚合而来，其键同时包含同组各通道图的哈希
+    """
+    model_id = model_registry.fingerprint(DETECT_MODEL)
+    if mode == MODE_TILED:
+        tiling_config = config.config.tiling
+        model_id = make_cache_key(model_id, mode, tile_size, tiling_config.overlap, tiling_config.merge_iou)
+    hashes = [file_sha256(str(pathlib.Path(img['detect_file_path']).joinpath(img['detect_file_name'])))
+              for img in image_paths]
+    keys = [make_cache_key(model_id, CONF_THRES, IOU_THRES, file_hash) for file_hash in hashes]
+    for group in group_images(image_paths).values():
+        if group["color"] is not None:
+            channel_hashes = sorted(hashes[idx] for idx in group["channels"])
+            keys[group["color"]] = make_cache_key(
+                model_id, CONF_THRES, IOU_THRES, AGGREGATE_IOU_THRES, hashes[group["color"]], *channel_hashes)
+    return keys
+
+
+def postprocess(output: np.ndarray, img_size) -> tuple[list, list, list]:
+    """
+    解析单张图像的模型输出，返回映射回原图尺寸 img_size=(宽, 高) 的边界框、类别ID和置信度
+    """
+    img_width, img_height = img_size
+    x_scale = img_width / INPUT_WIDTH
+    y_scale = img_height / INPUT_HEIGHT
+
+    # 提取置信度和类别
+    pred = yolo_output_to_pred(output)
+
+    # 执行NMS
+    result = nms(pred, CONF_THRES, IOU_THRES)
+    log.debug(f"result={result}")
+
+    boxes = []
+    class_ids = []
+    scores = []
+    for detect in result:
+        # 转换坐标：中心点+宽高 -> 左上角+右下角，并映射回原始图像尺寸
+        cx, cy, w, h, conf, cls_id = detect
+        x1 = max(0, int((cx - w/2) * x_scale))
+        y1 = max(0, int((cy - h/2) * y_scale))
+        x2 = min(img_width - 1, int((cx + w/2) * x_scale))
+        y2 = min(img_height - 1, int((cy + h/2) * y_scale))
+
+        boxes.append([x1, y1, x2, y2])
+        class_ids.append(int(cls_id))
+        scores.append(float(conf))
+    return boxes, class_ids, scores
+
+
+def build_label_map(class_ids) -> dict:
+    """收集标签名称与对应颜色"""
+    label_map = {}
+    for cid in set(class_ids):
+        color = yolo_colors(cid)
+        label_map[ID2NAME[cid]] = '#{:02X}{:02X}{:02X}'.format(*color)
+    return label_map
+
+
+def pack_boxes(boxes, scores, class_ids) -> list:
+    """将检测框整理为 [x1, y1, x2, y2, score, cls_id] 列表"""
+    return [[*map(int, box), round(float(score), 4), int(cls_id)]
+            for box, score, cls_id in zip(boxes, scores, class_ids)]
+
+
+def draw_and_save(source_path: str, boxes, class_ids, timer: StageTimer) -> tuple[pathlib.Path, str]:
+    """
+    在原图上绘制检测框，保存为 *_detected.jpg，并生成叠加图缩略图（在推理工作池中执行，不占用事件循环）
+    无检测框时直接复制原文件，不再全分辨率解码与重新编码，缩略图按缩略尺寸解码原文件生成
 
-            # 删除已保留的框
-            cls_box = np.delete(cls_box, 0, 0)
+    Returns:
+        (保存路径, 缩略图访问URL)
+    """
+    source_file = pathlib.Path(source_path)
+    save_path = source_file.parent.joinpath(
+        source_file.name.replace(".jpg", "_detected.jpg"))
+    start = time.perf_counter()
+    if not boxes:
+        shutil.copyfile(source_file, save_path)
+        timer.add("save", start)
+        start = time.perf_counter()
+        thumbnail_data = store_thumbnail_from_file(str(source_file), OVERLAY_THUMBNAIL_SIZE,
+                                                   OVERLAY_THUMBNAIL_QUALITY)
+        timer.add("thumbnail", start)
+        return save_path, thumbnail_data
+
+    img = cv2.imread(str(source_file))
+    if img is None:
+        raise ValueError(f"无法读取图像: {source_path}")
+    # OpenCV 画框
+    for box, cls_id in zip(boxes, class_ids):
+        x1, y1, x2, y2 = map(int, box)
+        color = yolo_colors(cls_id)
+        cv2.rectangle(img, (x1, y1), (x2, y2),
+                      (color[2], color[1], color[0]), 5)
+    cv2.imwrite(str(save_path), img)
+    timer.add("save", start)
+    # 直接由已绘制的像素生成缩略图，不再重新解码叠加图
+    start = time.perf_counter()
+    thumbnail_data = store_thumbnail_from_array(img, OVERLAY_THUMBNAIL_SIZE, OVERLAY_THUMBNAIL_QUALITY)
+    timer.add("thumbnail", start)
+    return save_path, thumbnail_data
 
-            # 计算与其他框的IoU
-            if len(cls_box) == 0:
-                break
 
-            del_index = []
-            for j in range(len(cls_box)):
-                current_box = cls_box[j]
-                interArea = getInter(max_conf_box, current_box)
-                iou = getIou(max_conf_box, current_box, interArea)
-                if iou > iou_thres:
-                    del_index.append(j)
+def resolve_tile_size(sizes, tile_size: Optional[int]) -> Optional[int]:
+    """
+    按耗时预算确定分块边长：依据分块推理耗时的EWMA估计（尚无样本时使用模型预热耗时），
+    预计超出预算时增大分块，仍超出则返回 None 表示退回单次缩放检测
+    """
+    tiling_config = config.config.tiling
+    per_tile_ms = tile_cost.estimate(model_registry.warmup_ms(DETECT_MODEL) or DEFAULT_TILE_MS)
+    return plan_tile_size(sizes, tile_size or tiling_config.tile_size, tiling_config.overlap,
+                          tiling_config.latency_budget_ms, per_tile_ms)
 
-            # 删除IoU大于阈值的框
-            if del_index:
-                cls_box = np.delete(cls_box, del_index, 0)
 
-    return output_box
+@log.catch
+def ai_detect(image_paths, mode: str = MODE_SINGLE, tile_size: Optional[int] = None):
+    """
+    对一次请求中的所有图片执行AI检测
 
+    同一拍摄组（image_paths 中相同 group 的图片，通常为同一 image_number）的灰度通道图
+    检测结果经NMS聚合后叠加到该组彩图上。所有分组的灰度通道图堆叠为一个批次，
+    只执行一次模型推理（同时提交双眼时亦然）。未提供 group 时整批视为同一组。
 
-@log.catch
-def ai_detect(image_paths):
+    mode 为 tiled 时按原始分辨率切分重叠分块检测（tile_size 为分块边长，缺省使用配置），
+    预计耗时超出配置的预算时自动增大分块或退回单次缩放检测，实际采用的模式见返回值 tiling
+    """
     # image_paths=[
     #     "D:\\image\\2222\\20251121_44\\112632_IR.jpg",
     #     "D:\\image\2222\20251120_42\\181557_color.jpg"
     # ]
-    # 解析命令行参数获取模型路径
-    model_path = resource_path('ai/best.onnx')
     try:
-        # 创建ONNX推理会话
-        providers = ['CPUExecutionProvider']
-        # 尝试使用GPU
-        try:
-            if ort.get_device() == 'GPU':
-                providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
-        except:
-            pass
-        model = ort.InferenceSession(model_path, providers=providers)
-        # 获取模型输入名称
-        model_input_name = model.get_inputs()[0].name
-        log.info(f"成功加载ONNX模型: {model_input_name} 路径:{model_path}")
+        # 确认模型注册表中共享的ONNX推理会话可用
+        model_registry.get_session(DETECT_MODEL)
     except Exception as e:
         log.error(f"ONNX模型加载失败: {e}")
         return None
-    # 定义类别名称映射（根据实际模型类别）
-    id2name = {0: '异常黑点', 1: '异常视盘', 2: '异常黄斑'}  # 请根据实际模型类别调整
-    font_path = resource_path('ai/Arial.Unicode.ttf')
-    ImageFont.truetype(font_path, 48)
-
-    # 聚合用于叠加到彩图上的检测结果
-    aggregated_boxes: list[np.ndarray] = []
-    aggregated_cls_ids: list[int] = []
-    aggregated_scores: list[float] = []
-    color_img_path = None
-    color_img_idx = None
-    for idx, img_info in enumerate(image_paths):
-        if img_info["detect_file_name"].endswith("_color.jpg"):
-            log.debug(f"当前图片为彩图:{img_info}")
-            color_img_idx = idx
-            continue
-        path = str(pathlib.Path(img_info['detect_file_path']).joinpath(
-            img_info['detect_file_name']))
+
+    # 按拍摄组划分灰度通道图与彩图
+    groups = group_images(image_paths)
+
+    channel_idx = [idx for group in groups.values() for idx in group["channels"]]
+    channel_paths = [str(pathlib.Path(image_paths[idx]['detect_file_path']).joinpath(
+        image_paths[idx]['detect_file_name'])) for idx in channel_idx]
+    detections = {}
+    timer = StageTimer()
+    tiling = {"mode": MODE_SINGLE, "tile_size": None}
+    # 登记为进行中的请求，调度器据此决定是否等待其他并发请求合批
+    with detect_scheduler.track():
+        if mode == MODE_TILED and channel_paths:
+            try:
+                sizes = [image_size(path) for path in channel_paths]
+            except Exception as e:
+                log.error(f"处理灰度图时出错: {e}")
+                return None
+            effective_tile_size = resolve_tile_size(sizes, tile_size)
+            if effective_tile_size is None:
+                log.warning("分块检测预计超出耗时预算，退回单次缩放检测")
+            else:
+                tiling = {"mode": MODE_TILED, "tile_size": effective_tile_size}
+
+        if tiling["mode"] == MODE_TILED:
+            # -------------------- 原始分辨率分块批量推理 --------------------
+            tiling_config = config.config.tiling
+            try:
+                results = detect_tiled(
+                    channel_paths, sizes, tiling["tile_size"], tiling_config.overlap,
+                    detect_scheduler.infer, batch_buffer, timer,
+                    max_batch_size=config.config.inference.max_batch_size,
+                    conf_thres=CONF_THRES, iou_thres=IOU_THRES,
+                    merge_iou=tiling_config.merge_iou, cost=tile_cost)
+            except Exception as e:
+                log.error(f"分块推理失败: images={len(channel_idx)}, 错误: {e}")
+                return None
+        else:
+            # -------------------- 降采样解码灰度图并写入批次缓冲区 --------------------
+            try:
+                batch, sizes = load_batch(channel_paths, batch_buffer, timer)
+            except Exception as e:
+                log.error(f"处理灰度图时出错: {e}")
+                return None
+
+            # -------------------- 批量推理（与并发请求合批） --------------------
+            results = []
+            if channel_idx:
+                start = time.perf_counter()
+                try:
+                    outputs = detect_scheduler.infer(batch)
+                except Exception as e:
+                    log.error(f"批量推理失败: batch={len(channel_idx)}, 错误: {e}")
+                    return None
+                timer.add("inference", start)
+                # 单次缩放检测的单图推理与单个分块等价（输入均为 640×640），同样用于更新耗时估计
+                tile_cost.update(timer.timings["inference"], len(channel_idx))
+                results = [postprocess(output, size) for output, size in zip(outputs, sizes)]
+
+    # 按图片拆分推理结果
+    for n, idx in enumerate(channel_idx):
+        path = channel_paths[n]
         log.debug(f"当前处理图片路径:{path}")
+        boxes, class_ids, scores = results[n]
+        log.debug(
+            f"detect_file_name={image_paths[idx]['detect_file_name']}  boxes={boxes}")
         try:
-            img = cv2.imread(path)
-            # 图像预处理（参照inference_onnx.py）
-            input_height, input_width = 640, 640  # 固定输入尺寸
-            img0 = img.copy()
-
-            # 计算缩放比例
-            x_scale = img0.shape[1] / input_width
-            y_scale = img0.shape[0] / input_height
-
-            # 图像预处理
-            img_resized = cv2.resize(img, (input_width, input_height))
-            img_resized = img_resized / 255.0  # 归一化到[0,1]
-            img_resized = np.transpose(img_resized, (2, 0, 1))  # HWC -> CHW
-            img_resized = np.expand_dims(img_resized, axis=0)  # 添加batch维度
-
-            # 执行推理
-            outputs = model.run(None, {model_input_name: img_resized.astype(np.float32)})
-            # 处理输出结果（参照inference_onnx.py）
-            pred = outputs[0]
-            pred = np.squeeze(pred)
-            pred = np.transpose(pred, (1, 0))
-
-            # 提取置信度和类别
-            pred_class = pred[..., 4:]
-            pred_conf = np.max(pred_class, axis=-1)
-            pred = np.insert(pred, 4, pred_conf, axis=-1)
-
-            # 执行NMS
-            result = nms(pred, 0.25, 0.7)  # 使用inference_onnx.py中的nms函数参数
-
-            # 解析检测结果
-            boxes = []
-            class_ids = []
-            scores = []
-            log.debug(f"result={result}")
-            for detect in result:
-                # 转换坐标：中心点+宽高 -> 左上角+右下角，并映射回原始图像尺寸
-                cx, cy, w, h, conf, cls_id = detect
-                x1 = int((cx - w/2) * x_scale)
-                y1 = int((cy - h/2) * y_scale)
-                x2 = int((cx + w/2) * x_scale)
-                y2 = int((cy + h/2) * y_scale)
-
-                # 确保坐标在图像范围内
-                x1 = max(0, x1)
-                y1 = max(0, y1)
-                x2 = min(img.shape[1] - 1, x2)
-                y2 = min(img.shape[0] - 1, y2)
-
-                boxes.append([x1, y1, x2, y2])
-                class_ids.append(int(cls_id))
-                scores.append(float(conf))
-            log.debug(
-                f"detect_file_name={img_info['detect_file_name']}  boxes={boxes}")
-            # OpenCV 画框
-            for box, cls_id in zip(boxes, class_ids):
-                x1, y1, x2, y2 = map(int, box)
-                color = yolo_colors(cls_id)
-                cv2.rectangle(img, (x1, y1), (x2, y2),
-                              (color[2], color[1], color[0]), 5)
-
-            # PIL 画中文标签
-            img_pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-            ImageDraw.Draw(img_pil)
-
-            for box, cls_id, score in zip(boxes, class_ids, scores):
-                x1, y1, x2, y2 = map(int, box)
-                color = yolo_colors(cls_id)
-
-            source_file = pathlib.Path(path)
-            save_dir = source_file.parent
-            save_name = source_file.name.replace(".jpg", "_detected.jpg")
-            save_path = save_dir.joinpath(save_name)
-            cv2.imwrite(str(save_path), cv2.cvtColor(
-                np.array(img_pil), cv2.COLOR_RGB2BGR))
-
-            # 收集标签与颜色
-            label_map = {}
-            for cid in set(class_ids):
-                cname = id2name[cid]
-                color = yolo_colors(cid)
-                label_map[cname] = '#{:02X}{:02X}{:02X}'.format(*color)
-            image_paths[idx]['detected'] = {
-                "file_path": save_path.parent,
-                "file_name": save_path.name,
-                "labels": label_map,
-                "is_primary": False
-            }
-            # 聚合框，用于稍后叠加到彩图
+            save_path, thumbnail_data = draw_and_save(path, boxes, class_ids, timer)
+        except Exception as e:
+            log.error(f"处理灰度图 {path} 时出错: {e}")
+            return None
+        image_paths[idx]['detected'] = {
+            "file_path": save_path.parent,
+            "file_name": save_path.name,
+            "thumbnail_data": thumbnail_data,
+            "labels": build_label_map(class_ids),
+            "boxes": pack_boxes(boxes, scores, class_ids),
+            "is_primary": False
+        }
+        detections[idx] = (boxes, class_ids, scores)
+
+    # -------------------- 按拍摄组聚合并叠加到彩色图 --------------------
+    for group in groups.values():
+        color_img_idx = group["color"]
+        if color_img_idx is None:
+            continue
+
+        # 聚合用于叠加到彩图上的检测结果
+        aggregated_boxes: list = []
+        aggregated_cls_ids: list[int] = []
+        aggregated_scores: list[float] = []
+        for idx in group["channels"]:
+            boxes, class_ids, scores = detections[idx]
             aggregated_boxes.extend(boxes)
             aggregated_cls_ids.extend(class_ids)
             aggregated_scores.extend(scores)
 
+        # 聚合结果去重（NMS）
+        if aggregated_boxes:
+            aggregated_boxes, aggregated_scores, aggregated_cls_ids = non_max_suppression(
+                aggregated_boxes, aggregated_scores, aggregated_cls_ids, iou_threshold=AGGREGATE_IOU_THRES
+            )
+
+        color_img_path = str(pathlib.Path(image_paths[color_img_idx]['detect_file_path']).joinpath(
+            image_paths[color_img_idx]['detect_file_name']))
+        log.debug(
+            f"彩色图 detect_file_name={image_paths[color_img_idx]['detect_file_name']}  boxes={aggregated_boxes}")
+        try:
+            color_save_path, color_thumbnail_data = draw_and_save(
+                color_img_path, aggregated_boxes, aggregated_cls_ids, timer)
         except Exception as e:
-            log.error(f"处理灰度图 {path} 时出错: {e}")
+            log.error(f"处理彩图 {color_img_path} 时出错: {e}")
             return None
 
-    # -------------------- 聚合结果去重（NMS） --------------------
-    if aggregated_boxes:
-        # 使用已定义的NMS函数处理聚合的检测结果
-        aggregated_boxes, aggregated_scores, aggregated_cls_ids = non_max_suppression(
-            aggregated_boxes, aggregated_scores, aggregated_cls_ids, iou_threshold=0.5
-        )
-
-    # -------------------- 叠加到彩色图 --------------------
-    if color_img_idx is None:
-        log.debug(f"无彩图 image_paths={image_paths}")
-        return {
-            "imgs": image_paths
+        # 彩图的标签为聚合后的标签
+        image_paths[color_img_idx]['detected'] = {
+            "file_path": color_save_path.parent,
+            "file_name": color_save_path.name,
+            "thumbnail_data": color_thumbnail_data,
+            "labels": build_label_map(aggregated_cls_ids),
+            "boxes": pack_boxes(aggregated_boxes, aggregated_scores, aggregated_cls_ids),
+            "is_primary": True
         }
-    color_img_path = str(pathlib.Path(image_paths[color_img_idx]['detect_file_path']).joinpath(
-        image_paths[color_img_idx]['detect_file_name']))
-    img_color = cv2.imread(color_img_path)
-    # 画框
-    for box, cls_id, score in zip(aggregated_boxes, aggregated_cls_ids, aggregated_scores):
-        x1, y1, x2, y2 = map(int, box)
-        color = yolo_colors(cls_id)
-        cv2.rectangle(img_color, (x1, y1), (x2, y2),
-                      (color[2], color[1], color[0]), 5)
 
-    # 画中文标签
-    if aggregated_boxes:
-        log.debug(
-            f"彩色图 detect_file_name={image_paths[color_img_idx]['detect_file_name']}  boxes={aggregated_boxes}")
-        img_pil = Image.fromarray(cv2.cvtColor(img_color, cv2.COLOR_BGR2RGB))
-        ImageDraw.Draw(img_pil)
-
-        for box, cls_id, score in zip(aggregated_boxes, aggregated_cls_ids, aggregated_scores):
-            x1, y1, x2, y2 = map(int, box)
-            color = yolo_colors(int(cls_id))
-
-        img_color = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-
-    color_source_path = pathlib.Path(color_img_path)
-    color_save_dir = color_source_path.parent
-    color_save_name = color_source_path.name.replace(".jpg", "_detected.jpg")
-    color_save_path = color_save_dir.joinpath(color_save_name)
-    cv2.imwrite(str(color_save_path), img_color)
-
-    # 彩图的标签为聚合后的标签
-    c_label_map = {}
-    for acid in set(aggregated_cls_ids):
-        cname = id2name[acid]
-        color = yolo_colors(acid)
-        c_label_map[cname] = '#{:02X}{:02X}{:02X}'.format(*color)
-    image_paths[color_img_idx]['detected'] = {
-        "file_path": color_save_path.parent,
-        "file_name": color_save_path.name,
-        "labels": c_label_map,
-        "is_primary": True
-    }
     log.debug(f"image_paths={image_paths}")
+    timings = timer.as_dict()
+    log.info(f"AI检测完成: images={len(image_paths)}, 各阶段耗时(ms)={timings}, 内存={current_rss_mb()}MB")
     return {
-        "imgs": image_paths
+        "imgs": image_paths,
+        "timings": timings,
+        "tiling": tiling
     }
 
 
@@ -2,27 +2,39 @@
 AI 图像处理模块
 提供眼底图像的彩色化处理功能
 """
-from loguru_logging import log
-from utils.path import resource_path
+from ai.model_registry import model_registry
+from ai.preprocess import StageTimer
+from utils.ingest import encode_thumbnail, save_image
 import os
+import time
 import cv2
 import numpy as np
-import platform
 
 
-def process_colorization(ir_path: str, green_path: str, save_path: str) -> str | None:
-    try:
-        from ai import rgb_image_generate
-        model_path = resource_path(
-            "ai/model.onnx") if platform.system() == "Darwin" else resource_path("""ai\model.onnx""")
-        colorizer = rgb_image_generate.ColorizationModel(model_path)
-        log.info("AI 模块加载成功")
-    except ImportError as e:
-        log.error(f"缺少必需的依赖: {e}")
-        colorizer = None
+def colorize(r_channel: np.ndarray, g_channel: np.ndarray) -> np.ndarray | None:
+    """
+    由已解码的红外（作为红色通道）与绿色通道灰度图合成彩色图像
 
+    Returns:
+        BGR 彩色图像，彩色化模型不可用时返回 None
+    """
+    # 使用模型注册表中共享的彩色化模型
+    colorizer = model_registry.get_colorizer()
     if colorizer is None:
         return None
+
+    h = r_channel.shape[0]
+    w = r_channel.shape[1]
+
+    # 调用颜色化模型
+    result_bytes, h1, w1 = colorizer.generate_bgr(
+        np.ascontiguousarray(r_channel).tobytes(), np.ascontiguousarray(g_channel).tobytes(), h, w)
+
+    # 将字节流转换为 NumPy 数组
+    return np.frombuffer(result_bytes, dtype=np.uint8).reshape(h1, w1, 3)
+
+
+def process_colorization(ir_path: str, green_path: str, save_path: str) -> str | None:
     # 读取图像
     r_channel = cv2.imread(ir_path, 0)  # 0 表示灰度模式
     g_channel = cv2.imread(green_path, 0)
@@ -32,19 +44,9 @@ def process_colorization(ir_path: str, green_path: str, save_path: str) -> str |
     if g_channel is None:
         raise ValueError(f"无法读取绿色通道图像: {green_path}")
 
-    h = r_channel.shape[0]
-    w = r_channel.shape[1]
-
-    # 转换为字节流
-    g_channel_bytes = g_channel.tobytes()
-    r_channel_bytes = r_channel.tobytes()
-
-    # 调用颜色化模型
-    result_bytes, h1, w1 = colorizer.generate_bgr(
-        r_channel_bytes, g_channel_bytes, h, w)
-
-    # 将字节流转换为 NumPy 数组并保存
-    image = np.frombuffer(result_bytes, dtype=np.uint8).reshape(h1, w1, 3)
+    image = colorize(r_channel, g_channel)
+    if image is None:
+        return None
 
     # 确保保存目录存在
     save_dir = os.path.dirname(save_path)
@@ -56,6 +58,32 @@ def process_colorization(ir_path: str, green_path: str, save_path: str) -> str |
     return save_path
 
 
+def colorize_capture(r_channel: np.ndarray, g_channel: np.ndarray, save_path: str) -> dict | None:
+    """
+    使用入库时已解码的通道像素合成彩色图像并保存，缩略图直接由合成结果生成，不再重新解码文件
+
+    Returns:
+        {"save_path", "file_size", "thumbnail_data", "timings"}，彩色化模型不可用时返回 None
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+    image = colorize(r_channel, g_channel)
+    timer.add("colorize", start)
+    if image is None:
+        return None
+
+    save_dir = os.path.dirname(save_path)
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+    file_size = save_image(image, save_path, timer)
+    thumbnail_data = encode_thumbnail(image, timer)
+    return {
+        "save_path": save_path,
+        "file_size": file_size,
+        "thumbnail_data": thumbnail_data,
+        "timings": timer.as_dict()
+    }
+
 
 def ai_detect():
     pass
\ No newline at end of file
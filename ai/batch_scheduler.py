@@ -0,0 +1,202 @@
+"""
+跨请求动态批处理调度器
+在检测模型会话前收集并发请求的预处理张量，在短时间窗口内合并为一个批次执行推理，
+再将结果按请求拆分返回，以提高多名技师同时拍摄时的推理吞吐量
+
+调度器是进程内的全局实例，合并同一进程中并发提交的请求：推理工作池为 process 模式（默认）时
+所有检测任务在专用推理进程中并发执行、共用该进程中的调度器；thread 模式下共用主进程中的调度器
+"""
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import numpy as np
+
+from config import config
+from ai.model_registry import model_registry, DETECT_MODEL
+from loguru_logging import log
+
+# 等待时间样本保留数量
+WAIT_SAMPLES = 1000
+
+
+@dataclass
+class _PendingRequest:
+    """等待合批的推理请求"""
+    batch: np.ndarray
+    tracked: bool = False
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class BatchScheduler:
+    """
+    动态批处理调度器
+    - 第一个请求入队后最多等待 window_ms，期间到达的请求合并为同一批次
+    - 批次图像数达到 max_batch_size，或所有进行中的请求都已入队时立即执行，不再等待
+    - 推理在调度线程中执行，同一时刻只有一个批次占用模型会话
+    """
+
+    def __init__(self, model_name: str, window_ms: float, max_batch_size: int):
+        self.model_name = model_name
+        self.window = max(0.0, float(window_ms)) / 1000
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self._queued_images = 0
+        self._in_flight = 0
+        self._local = threading.local()
+        self._thread = None
+        # 统计信息
+        self._batch_sizes: Counter = Counter()
+        self._requests_per_batch: Counter = Counter()
+        self._wait_ms: deque = deque(maxlen=WAIT_SAMPLES)
+        self._total_requests = 0
+        self._total_batches = 0
+        # 包含多个请求的批次数及其中的请求数（跨请求合批实际发生的次数）
+        self._merged_batches = 0
+        self._merged_requests = 0
+
+    @contextmanager
+    def track(self):
+        """
+        标记一个进行中的请求（从预处理开始到取得推理结果）
+        调度器据此判断是否还有请求即将入队，没有时不必等满时间窗口
+        """
+        with self._cond:
+            self._in_flight += 1
+        self._local.tracked = True
+        try:
+            yield
+        finally:
+            # 已提交的请求在出队时即不再计入进行中
+            if self._local.tracked:
+                self._local.tracked = False
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        """
+        提交一个请求的 N×3×H×W 批次，阻塞等待并返回该请求对应的推理输出
+        """
+        request = _PendingRequest(batch=batch, tracked=getattr(self._local, "tracked", False))
+        self._local.tracked = False
+        with self._cond:
+            self._ensure_thread()
+            self._queue.append(request)
+            self._queued_images += len(batch)
+            self._cond.notify_all()
+        return request.future.result()
+
+    def _ensure_thread(self):
+        """按需启动调度线程（process 模式下在推理进程中启动）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._loop, name=f"batch-scheduler-{self.model_name}", daemon=True)
+            self._thread.start()
+
+    def _collect(self) -> List[_PendingRequest]:
+        """等待并取出一个批次的请求（调用方需持有锁）"""
+        while not self._queue:
+            self._cond.wait()
+
+        deadline = self._queue[0].enqueued_at + self.window
+        while (self._queued_images < self.max_batch_size
+               and len(self._queue) < self._in_flight):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        # 按请求整体合批，单个请求超过上限时单独成批
+        requests = [self._queue.popleft()]
+        images = len(requests[0].batch)
+        while self._queue and images + len(self._queue[0].batch) <= self.max_batch_size:
+            request = self._queue.popleft()
+            requests.append(request)
+            images += len(request.batch)
+        self._queued_images -= images
+        self._in_flight -= sum(request.tracked for request in requests)
+        return requests
+
+    def _loop(self):
+        """调度线程主循环"""
+        while True:
+            with self._cond:
+                requests = self._collect()
+
+            dispatched_at = time.perf_counter()
+            sizes = [len(request.batch) for request in requests]
+            try:
+                batch = requests[0].batch if len(requests) == 1 else np.concatenate(
+                    [request.batch for request in requests], axis=0)
+                outputs = model_registry.run_batch(self.model_name, batch)
+            except Exception as e:
+                log.error(f"批量推理失败: model={self.model_name}, batch={sum(sizes)}, 错误: {e}")
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+
+            with self._cond:
+                self._total_batches += 1
+                self._total_requests += len(requests)
+                self._batch_sizes[sum(sizes)] += 1
+                self._requests_per_batch[len(requests)] += 1
+                if len(requests) > 1:
+                    self._merged_batches += 1
+                    self._merged_requests += len(requests)
+                self._wait_ms.extend((dispatched_at - request.enqueued_at) * 1000
+                                     for request in requests)
+
+            log.debug(f"批量推理完成: model={self.model_name}, requests={len(requests)}, batch={sum(sizes)}")
+            offset = 0
+            for request, size in zip(requests, sizes):
+                request.future.set_result(outputs[offset:offset + size])
+                offset += size
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计：队列深度、批次大小分布与合批引入的等待时间
+        """
+        with self._cond:
+            wait_ms = np.array(self._wait_ms, dtype=np.float64)
+            return {
+                "model": self.model_name,
+                "window_ms": round(self.window * 1000, 2),
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": len(self._queue),
+                "queued_images": self._queued_images,
+                "in_flight": self._in_flight,
+                "total_requests": self._total_requests,
+                "total_batches": self._total_batches,
+                "merged_batches": self._merged_batches,
+                "merged_requests": self._merged_requests,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "requests_per_batch_histogram": dict(sorted(self._requests_per_batch.items())),
+                "wait_ms": {
+                    "samples": len(wait_ms),
+                    "mean": round(float(wait_ms.mean()), 2) if len(wait_ms) else None,
+                    "p50": round(float(np.percentile(wait_ms, 50)), 2) if len(wait_ms) else None,
+                    "p95": round(float(np.percentile(wait_ms, 95)), 2) if len(wait_ms) else None,
+                    "max": round(float(wait_ms.max()), 2) if len(wait_ms) else None,
+                },
+            }
+
+
+def worker_scheduler_stats() -> Dict[str, Any]:
+    """获取当前进程（process 模式下为推理进程）中检测调度器的统计信息"""
+    return {"pid": os.getpid(), **detect_scheduler.stats()}
+
+
+# 创建全局检测模型调度器实例，方便导入使用
+detect_scheduler = BatchScheduler(
+    DETECT_MODEL,
+    window_ms=config.config.inference.batch_window_ms,
+    max_batch_size=config.config.inference.max_batch_size,
+)
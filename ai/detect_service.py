@@ -0,0 +1,332 @@
+"""
+AI检测服务
+封装检测流程（拍摄分组、结果缓存、推理工作池检测；叠加图缩略图在推理工作池中生成），
+供同步检测接口与异步检测任务（提交后轮询）共用；
+数据库查询与更新使用短时的 AsyncSession，推理期间不占用数据库连接
+"""
+import asyncio
+import os
+import pathlib
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ai.ai_detect_img import ai_detect, detection_cache_keys, group_images
+from ai.inference_pool import inference_pool
+from ai.model_registry import DETECT_MODEL, model_file, model_registry
+from ai.result_cache import detection_cache
+from config import config
+from database import db
+from loguru_logging import log
+from models.ai_diagnosis import AIDiagnosis
+from models.fundus_image import FundusImage
+from utils.tile_pyramid import tile_pyramid
+
+# 检测完成后写入诊断记录的字段
+RESULT_FIELDS = ("ai_model_name", "ai_model_version", "detect_file_path", "detect_file_name",
+                 "thumbnail_data", "diagnostic_markers")
+
+# 未结束的异步检测任务状态
+ACTIVE_STATUSES = ('pending', 'processing')
+
+
+async def load_cached_results(detect_img_li: list, cache_keys: Optional[list]) -> dict:
+    """
+    查询检测结果缓存，返回 {图片下标: 诊断结果}
+    对应的AI诊断记录已删除、图像ID不一致或叠加图文件已不存在的条目视为失效并移除
+    """
+    if cache_keys is None:
+        return {}
+    entries = {}
+    for idx, key in enumerate(cache_keys):
+        entry = detection_cache.get(key)
+        if entry is not None:
+            entries[idx] = entry["response"]
+    if not entries:
+        return {}
+
+    async with db.async_session() as session:
+        alive_ids = set((await session.scalars(select(AIDiagnosis.id).where(
+            AIDiagnosis.id.in_([res["id"] for res in entries.values()]),
+            AIDiagnosis.processing_status == 'completed',
+            AIDiagnosis.deleted_at.is_(None)
+        ))).all())
+    cached = {}
+    for idx, res in entries.items():
+        overlay = pathlib.Path(res["detect_file_path"]).joinpath(res["detect_file_name"])
+        if (res["id"] in alive_ids and res["image_id"] == detect_img_li[idx]["image_id"]
+                and overlay.exists()):
+            cached[idx] = res
+        else:
+            detection_cache.invalidate(cache_keys[idx])
+    return cached
+
+
+async def lookup_cached(detect_img_li: list, mode: str,
+                        tile_size: Optional[int]) -> Tuple[dict, List[int], Optional[list]]:
+    """
+    按拍摄组查询检测结果缓存（同一拍摄组的图片全部命中时才复用，否则整组重新检测）
+
+    Returns:
+        (命中的结果 {图片下标: 诊断结果（带诊断记录 id）}, 需要检测的图片下标, 各图片的缓存键（计算失败时为 None）)
+    """
+    # 按拍摄编号分组：同一次拍摄的灰度通道图与彩图共享 image_number，双眼各成一组
+    image_ids = [img["image_id"] for img in detect_img_li]
+    async with db.async_session() as session:
+        image_numbers = dict((await session.execute(select(FundusImage.id, FundusImage.image_number).where(
+            FundusImage.id.in_(image_ids)))).all())
+    for img in detect_img_li:
+        img["group"] = image_numbers.get(img["image_id"])
+    log.debug(f"detect_img_li={detect_img_li}")
+
+    try:
+        # 文件哈希计算放到线程中执行，避免阻塞事件循环
+        cache_keys = await asyncio.get_running_loop().run_in_executor(
+            None, detection_cache_keys, detect_img_li, mode, tile_size)
+    except OSError as e:
+        log.warning(f"计算检测结果缓存键失败，跳过缓存: {e}")
+        cache_keys = None
+    results = await load_cached_results(detect_img_li, cache_keys)
+
+    # 彩图结果依赖同组全部通道图
+    pending_idx = []
+    for group in group_images(detect_img_li).values():
+        members = group["channels"] + ([group["color"]] if group["color"] is not None else [])
+        if not all(idx in results for idx in members):
+            pending_idx.extend(members)
+    detection_cache.record(hits=len(detect_img_li) - len(pending_idx), misses=len(pending_idx))
+    for idx in pending_idx:
+        results.pop(idx, None)
+    return results, pending_idx, cache_keys
+
+
+async def detect_images(detect_img_li: list, mode: str, tile_size: Optional[int],
+                        cached: Optional[tuple] = None) -> Optional[dict]:
+    """
+    检测一组图片（命中缓存的拍摄组直接复用已有结果）
+
+    Args:
+        cached: 已查询的缓存结果（lookup_cached 的返回值），缺省时在此查询
+
+    Returns:
+        {
+            "results": {图片下标: 诊断结果}，命中缓存的结果带有诊断记录 id,
+            "fresh": {图片下标: 检测框}，本次新检测的图片,
+            "cache_keys": 各图片的缓存键（计算失败时为 None）,
+            "degraded": 分块检测是否因耗时预算降级,
+            "tiling": 实际使用的检测模式与分块边长
+        }
+        检测失败时返回 None
+    """
+    start = time.perf_counter()
+    if cached is None:
+        cached = await lookup_cached(detect_img_li, mode, tile_size)
+    results, pending_idx, cache_keys = cached
+
+    tiling = {"mode": mode, "tile_size": tile_size}
+    outcome = {"results": results, "fresh": {}, "cache_keys": cache_keys,
+               "degraded": False, "tiling": tiling}
+    if not pending_idx:
+        return outcome
+
+    # 在推理工作池中执行，避免阻塞事件循环
+    detect_res = await inference_pool.run(
+        ai_detect, [detect_img_li[idx] for idx in pending_idx], mode, tile_size)
+    if detect_res is None:
+        return None
+    # 分块检测因耗时预算降级（增大分块或退回单次检测）时，结果与请求参数不符，不写入缓存
+    outcome["degraded"] = detect_res["tiling"] != tiling
+    outcome["tiling"] = detect_res["tiling"]
+    # 指纹在服务启动时已计算并缓存；未缓存时首次计算需哈希整个模型文件，放到线程中执行
+    model_version = (await asyncio.get_running_loop().run_in_executor(
+        None, model_registry.fingerprint, DETECT_MODEL))[:12]
+    processing_time_ms = int((time.perf_counter() - start) * 1000)
+    for idx, img_info in zip(pending_idx, detect_res["imgs"]):
+        detected = img_info['detected']
+        file_path = str(pathlib.Path(detected['file_path']).joinpath(detected["file_name"]))
+        results[idx] = {
+            "image_id": img_info["image_id"],
+            "ai_model_name": os.path.basename(model_file(DETECT_MODEL)),
+            "ai_model_version": model_version,
+            "detect_file_path": str(detected['file_path']),
+            "detect_file_name": detected["file_name"],
+            "thumbnail_data": detected["thumbnail_data"],
+            "diagnostic_markers": {
+                "labels": detected["labels"]
+            },
+            "processing_time_ms": processing_time_ms,
+            "is_primary": detected["is_primary"]
+        }
+        outcome["fresh"][idx] = detected.get("boxes", [])
+        # 后台预生成叠加图瓦片金字塔的低分辨率层级
+        tile_pyramid.schedule_warm_up(file_path)
+    return outcome
+
+
+def remember_result(outcome: dict, idx: int):
+    """将新检测的结果（已带诊断记录 id）写入检测结果缓存"""
+    if outcome["cache_keys"] is None or outcome["degraded"]:
+        return
+    detection_cache.put(outcome["cache_keys"][idx], {
+        "response": outcome["results"][idx],
+        "boxes": outcome["fresh"][idx]
+    })
+
+
+class DetectJobManager:
+    """
+    异步检测任务管理器
+
+    提交时先查询检测结果缓存，命中的图片直接返回已完成的诊断记录；
+    其余图片立即各插入一条 pending 状态的AI诊断记录并返回记录ID，
+    后台任务依次将记录推进到 processing → completed / failed / timeout，
+    客户端通过状态接口轮询（支持长轮询等待）获取结果，检测耗时不受客户端HTTP超时限制
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._tasks = set()
+            cls._instance._events: Dict[int, asyncio.Event] = {}
+            # 超时放弃的任务数（工作池中已开始的推理不会中断，其结果被丢弃）
+            cls._instance._abandoned = 0
+        return cls._instance
+
+    async def submit(self, session: AsyncSession, detect_img_li: list, mode: str,
+                     tile_size: Optional[int]) -> List[dict]:
+        """
+        先查询检测结果缓存：命中的图片直接返回已完成的诊断记录，不重复插入记录、不重新推理；
+        其余图片插入 pending 状态的诊断记录并启动后台检测任务
+
+        Returns:
+            各图片的任务信息 {"id", "image_id", "processing_status"}（与 detect_img_li 顺序一致）
+        """
+        results, pending_idx, cache_keys = await lookup_cached(detect_img_li, mode, tile_size)
+        jobs: List[Optional[dict]] = [None] * len(detect_img_li)
+        for idx, res in results.items():
+            jobs[idx] = {"id": res["id"], "image_id": res["image_id"], "processing_status": 'completed'}
+        if not pending_idx:
+            log.info(f"异步检测任务全部命中缓存: ids={[job['id'] for job in jobs]}")
+            return jobs
+
+        pending_imgs = [detect_img_li[idx] for idx in pending_idx]
+        rows = [
+            AIDiagnosis(
+                image_id=img["image_id"],
+                ai_model_name=os.path.basename(model_file(DETECT_MODEL)),
+                # 检测完成前先记录原图位置，完成后更新为叠加图
+                detect_file_path=img["detect_file_path"],
+                detect_file_name=img["detect_file_name"],
+                processing_status='pending'
+            )
+            for img in pending_imgs
+        ]
+        session.add_all(rows)
+        # 一次 flush 批量插入并取回主键（INSERT ... RETURNING），无需逐行 refresh
+        await session.flush()
+        for idx, row in zip(pending_idx, rows):
+            jobs[idx] = {"id": row.id, "image_id": row.image_id, "processing_status": row.processing_status}
+        await session.commit()
+
+        ids = [jobs[idx]["id"] for idx in pending_idx]
+        for diagnosis_id in ids:
+            self._events[diagnosis_id] = asyncio.Event()
+        # 后台任务只检测未命中的图片，缓存查询结果随之传入，不再重复查询
+        pending_keys = [cache_keys[idx] for idx in pending_idx] if cache_keys is not None else None
+        cached = ({}, list(range(len(pending_imgs))), pending_keys)
+        task = asyncio.create_task(self._run(ids, pending_imgs, mode, tile_size, cached))
+        # 保留任务引用，避免任务执行期间被垃圾回收
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        log.info(f"异步检测任务已提交: ids={ids}, 命中缓存={len(detect_img_li) - len(ids)}")
+        return jobs
+
+    async def _run(self, ids: List[int], detect_img_li: list, mode: str, tile_size: Optional[int],
+                   cached: Optional[tuple] = None):
+        """执行检测并更新诊断记录状态（推理前后各用一个短事务，推理期间不占用数据库连接）"""
+        start = time.perf_counter()
+        try:
+            await self._update((ids, {"processing_status": 'processing'}))
+            try:
+                outcome = await asyncio.wait_for(
+                    detect_images(detect_img_li, mode, tile_size, cached),
+                    timeout=config.config.inference.job_timeout_s)
+            except asyncio.TimeoutError:
+                # wait_for 取消等待时，工作池中尚未开始的推理随之取消；已开始的推理无法中断，
+                # 会继续执行到结束，其结果不再使用（叠加图文件可能仍会写出）
+                self._abandoned += 1
+                log.error(f"异步检测任务超时: ids={ids}，工作池中已开始的推理将继续执行，结果丢弃")
+                await self._update((ids, {
+                    "processing_status": 'timeout',
+                    "error_message": "AI诊断超时",
+                    "processing_time_ms": int((time.perf_counter() - start) * 1000)}))
+                return
+            if outcome is None:
+                log.info(f"异步检测任务失败: ids={ids}")
+                await self._update((ids, {
+                    "processing_status": 'failed',
+                    "error_message": "图片AI诊断失败",
+                    "processing_time_ms": int((time.perf_counter() - start) * 1000)}))
+                return
+
+            processing_time_ms = int((time.perf_counter() - start) * 1000)
+            await self._update(*(
+                ([diagnosis_id], {"processing_status": 'completed', "processing_time_ms": processing_time_ms,
+                                  **{name: outcome["results"][idx][name] for name in RESULT_FIELDS}})
+                for idx, diagnosis_id in enumerate(ids)))
+            for idx in outcome["fresh"]:
+                outcome["results"][idx].update(id=ids[idx], processing_time_ms=processing_time_ms)
+                remember_result(outcome, idx)
+            log.info(f"异步检测任务完成: ids={ids}, 耗时={processing_time_ms}ms")
+        except Exception as e:
+            log.exception(f"异步检测任务异常: ids={ids}, {e}")
+            await self._update((ids, {
+                "processing_status": 'failed', "error_message": str(e),
+                "processing_time_ms": int((time.perf_counter() - start) * 1000)}))
+        finally:
+            for diagnosis_id in ids:
+                event = self._events.pop(diagnosis_id, None)
+                if event is not None:
+                    event.set()
+
+    @staticmethod
+    async def _update(*updates: Tuple[List[int], dict]):
+        """在一个短事务中批量更新诊断记录，每项为 (记录ID列表, 字段值)（updated_at 由数据库触发器维护）"""
+        async with db.async_session() as session:
+            for ids, values in updates:
+                await session.execute(update(AIDiagnosis).where(AIDiagnosis.id.in_(ids)).values(**values))
+            await session.commit()
+
+    async def wait(self, ids: List[int], timeout: float):
+        """等待指定记录的检测任务结束，最多等待 timeout 秒（长轮询）"""
+        events = [self._events[i] for i in ids if i in self._events]
+        if not events or timeout <= 0:
+            return
+        await asyncio.wait([asyncio.create_task(event.wait()) for event in events], timeout=timeout)
+
+    @staticmethod
+    def recover_stale(session: Session) -> int:
+        """
+        服务启动时将上次运行遗留的 pending/processing 记录标记为 timeout
+        （后台任务随进程退出而中断，这些记录不会再被处理）
+        """
+        count = session.query(AIDiagnosis).filter(
+            AIDiagnosis.processing_status.in_(ACTIVE_STATUSES),
+            AIDiagnosis.deleted_at.is_(None)
+        ).update({"processing_status": 'timeout', "error_message": "服务重启，AI诊断任务中断"},
+                 synchronize_session=False)
+        return count
+
+    def stats(self) -> dict:
+        """获取进行中的任务统计"""
+        return {"running_tasks": len(self._tasks), "waiting_diagnoses": len(self._events),
+                "abandoned_after_timeout": self._abandoned}
+
+
+# 创建全局异步检测任务管理器实例，方便导入使用
+detect_jobs = DetectJobManager()
@@ -0,0 +1,293 @@
+"""
+AI 推理工作池
+将检测、彩色化等CPU密集型推理从 uvicorn 事件循环中移出，
+异步接口通过 await 等待结果，推理期间其他请求不受阻塞
+
+process 模式（默认）下推理在一个专用推理进程中执行：进程启动时预加载并预热模型，
+进程内以线程池并发执行推理任务，并发的检测任务共用进程内的合批调度器（跨请求合批），
+预处理与后处理也在该进程中执行，不与事件循环所在进程争用GIL
+"""
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+from concurrent.futures import (CancelledError, Executor, Future, InvalidStateError,
+                                ThreadPoolExecutor)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from config import config
+from ai.model_registry import model_registry
+from loguru_logging import log
+
+# 工作池模式
+POOL_MODE_PROCESS = "process"
+POOL_MODE_THREAD = "thread"
+
+# 主进程检查推理进程是否存活的间隔（秒）
+PROCESS_CHECK_INTERVAL_S = 1.0
+
+
+def _init_worker(profile_counters: dict):
+    """
+    推理进程初始化：接入主进程的性能分析计数器，预加载并预热模型，避免首个任务承担模型加载开销
+    """
+    log.info(f"推理进程启动: pid={os.getpid()}")
+    model_registry.set_profile_counters(profile_counters)
+    model_registry.load_all()
+
+
+def worker_model_stats() -> dict:
+    """获取执行该任务的工作进程中已加载模型的统计信息"""
+    return {"pid": os.getpid(), "models": model_registry.stats()}
+
+
+def _dumps_outcome(ok: bool, value: Any) -> bytes:
+    """序列化任务结果；结果或异常无法序列化时改为返回异常说明"""
+    try:
+        return pickle.dumps((ok, value))
+    except Exception as e:
+        return pickle.dumps((False, RuntimeError(f"推理结果无法序列化: {value!r}, 错误: {e}")))
+
+
+def _serve(requests, results, workers: int, profile_counters: dict):
+    """
+    推理进程主循环：以线程池并发执行主进程提交的任务，消息格式：
+    ("run", 任务ID, pickle(函数, 参数)) / ("cancel", 任务ID) / None（退出）
+    """
+    _init_worker(profile_counters)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+    futures: Dict[int, Future] = {}
+    lock = threading.Lock()
+
+    def reply(job_id: int, future: Future):
+        with lock:
+            futures.pop(job_id, None)
+        if future.cancelled():
+            results.put((job_id, _dumps_outcome(False, CancelledError())))
+            return
+        exc = future.exception()
+        results.put((job_id, _dumps_outcome(exc is None, future.result() if exc is None else exc)))
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        kind, job_id = message[0], message[1]
+        if kind == "cancel":
+            # 尚未开始执行的任务随之取消，已开始的任务无法中断
+            with lock:
+                future = futures.get(job_id)
+            if future is not None:
+                future.cancel()
+            continue
+        try:
+            fn, args = pickle.loads(message[2])
+        except Exception as e:
+            results.put((job_id, _dumps_outcome(False, e)))
+            continue
+        future = executor.submit(fn, *args)
+        with lock:
+            futures[job_id] = future
+        future.add_done_callback(partial(reply, job_id))
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+class InferenceProcess(Executor):
+    """
+    专用推理进程（process 模式的执行器）
+    任务与结果经进程间队列传递，主进程中的读取线程按任务ID完成对应的 Future；
+    推理进程异常退出时未完成的任务以 BrokenProcessPool 结束，执行器标记为失效，由工作池重建
+    """
+
+    def __init__(self, workers: int, profile_counters: dict):
+        context = multiprocessing.get_context()
+        self._max_workers = workers
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._broken = False
+        self._process = context.Process(
+            target=_serve, args=(self._requests, self._results, workers, profile_counters),
+            name="inference", daemon=True)
+        self._process.start()
+        self._reader = threading.Thread(target=self._read_results, name="inference-results", daemon=True)
+        self._reader.start()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        if kwargs:
+            raise TypeError("推理进程任务不支持关键字参数")
+        if self._broken:
+            raise BrokenProcessPool("推理进程已退出")
+        # 在调用方线程中序列化，参数无法序列化时立即报错
+        payload = pickle.dumps((fn, args))
+        future = Future()
+        with self._lock:
+            job_id = next(self._ids)
+            self._pending[job_id] = future
+        future.add_done_callback(partial(self._on_done, job_id))
+        self._requests.put(("run", job_id, payload))
+        return future
+
+    def _on_done(self, job_id: int, future: Future):
+        """调用方取消任务（如 wait_for 超时）时通知推理进程取消尚未开始的任务"""
+        if not future.cancelled():
+            return
+        with self._lock:
+            self._pending.pop(job_id, None)
+        if not self._broken:
+            self._requests.put(("cancel", job_id))
+
+    def _read_results(self):
+        """读取线程：按任务ID完成 Future，推理进程退出且结果读完后结束"""
+        while True:
+            try:
+                job_id, payload = self._results.get(timeout=PROCESS_CHECK_INTERVAL_S)
+            except queue.Empty:
+                if self._process.is_alive():
+                    continue
+                self._fail_pending()
+                return
+            ok, value = pickle.loads(payload)
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+            if future is None:
+                continue
+            try:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            except InvalidStateError:
+                # 结果返回前已被调用方取消
+                pass
+
+    def _fail_pending(self):
+        self._broken = True
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        if pending:
+            log.error(f"推理进程已退出: exitcode={self._process.exitcode}，{len(pending)} 个任务失败")
+        for future in pending:
+            try:
+                future.set_exception(BrokenProcessPool("推理进程异常退出"))
+            except InvalidStateError:
+                pass
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        if cancel_futures:
+            with self._lock:
+                pending = list(self._pending.values())
+            for future in pending:
+                future.cancel()
+        if self._process.is_alive():
+            self._requests.put(None)
+        if wait:
+            self._process.join()
+            self._reader.join()
+
+
+class InferencePool:
+    """
+    推理工作池 - 单例模式
+    process 模式下专用推理进程持有一份模型与合批调度器；thread 模式下共享主进程中的模型与调度器
+    """
+    _instance = None
+
+    def __new__(cls):
+        """
+        单例模式实现
+        """
+        if cls._instance is None:
+            cls._instance = super(InferencePool, cls).__new__(cls)
+            cls._instance._executor = None
+            cls._instance._mode = None
+        return cls._instance
+
+    @property
+    def mode(self) -> Optional[str]:
+        """当前工作池模式，未启动时为 None"""
+        return self._mode
+
+    def start(self):
+        """
+        按配置创建工作池（在服务启动时调用）
+        """
+        if self._executor is not None:
+            return
+        inference_config = config.config.inference
+        workers = max(1, int(inference_config.pool_workers))
+        mode = inference_config.pool_mode.lower()
+        if mode == POOL_MODE_THREAD:
+            # 线程模式共享主进程中的模型，在此预加载
+            model_registry.load_all()
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="inference")
+        else:
+            if mode != POOL_MODE_PROCESS:
+                log.warning(f"未知的推理工作池模式: {mode}，使用 {POOL_MODE_PROCESS} 模式")
+                mode = POOL_MODE_PROCESS
+            self._executor = self._create_process_pool(workers)
+        self._mode = mode
+        log.info(f"推理工作池已启动: mode={mode}, workers={workers}")
+
+    def shutdown(self):
+        """
+        关闭工作池（在服务关闭时调用）
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        log.info("推理工作池已关闭")
+
+    @staticmethod
+    def _create_process_pool(workers: int) -> InferenceProcess:
+        """启动专用推理进程（启动时预加载模型），进程内以 workers 个线程并发执行任务"""
+        return InferenceProcess(workers, model_registry.profile_counters)
+
+    def _get_executor(self) -> Optional[Executor]:
+        """获取工作池，推理进程异常退出而失效时自动重建"""
+        executor = self._executor
+        if isinstance(executor, InferenceProcess) and executor._broken:
+            log.warning("推理进程已失效，正在重建")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_process_pool(executor._max_workers)
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        在工作池中执行推理函数并等待结果，不阻塞事件循环
+        process 模式下 fn、参数与返回值必须可被 pickle（模块级函数）
+        工作池未启动时使用事件循环默认线程池执行
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            log.error(f"推理进程异常退出: fn={getattr(fn, '__name__', fn)}")
+            raise
+
+    def run_sync(self, fn: Callable, *args: Any) -> Any:
+        """
+        在工作池中执行推理函数并阻塞等待结果（供后台任务等同步代码调用）
+        工作池未启动时在当前线程直接执行
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return fn(*args)
+        return executor.submit(fn, *args).result()
+
+
+# 创建全局推理工作池实例，方便导入使用
+inference_pool = InferencePool()
@@ -0,0 +1,382 @@
+"""
+AI 模型注册表
+在服务启动时一次性加载并预热各推理模型，供检测、彩色化等推理函数共享使用，
+避免每次请求重复创建 ONNX 推理会话
+"""
+import multiprocessing
+import os
+import time
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import onnxruntime as ort
+
+from config import config
+from loguru_logging import log
+from utils.path import resource_path
+from ai.result_cache import file_sha256
+
+
+# 模型名称常量
+DETECT_MODEL = "detect"
+COLORIZATION_MODEL = "colorization"
+
+# 模型文件路径（相对于资源目录）
+MODEL_PATHS = {
+    DETECT_MODEL: os.path.join("ai", "best.onnx"),
+    COLORIZATION_MODEL: os.path.join("ai", "model.onnx"),
+}
+
+# 模型的量化版本文件（由 tools/quantize_model.py 生成），通过 inference.models.<name>.variant 选择
+MODEL_VARIANTS = {
+    DETECT_MODEL: {
+        "fp32": MODEL_PATHS[DETECT_MODEL],
+        "int8": os.path.join("ai", "best.int8.onnx"),
+    },
+}
+
+# 预热使用的输入尺寸
+WARMUP_SIZE = 640
+
+# 由本模块创建并执行推理的ONNX模型（彩色化模型的会话由编译模块内部创建）
+ONNX_MODELS = (DETECT_MODEL,)
+
+# 配置中的图优化级别与执行模式名称
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+
+@dataclass
+class ModelStats:
+    """模型加载统计信息"""
+    name: str
+    path: str
+    load_time_ms: float
+    warmup_time_ms: Optional[float]
+    memory_mb: Optional[float]
+    loaded_at: str
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    获取当前进程常驻内存（MB）
+    优先使用 psutil，其次读取 /proc，均不可用时返回 None
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def build_session_options(name: str, profile_prefix: Optional[str] = None) -> ort.SessionOptions:
+    """
+    按配置（inference.models.<name>）构建推理会话选项，未配置的模型使用ONNX Runtime默认值
+    指定 profile_prefix 时开启ONNX Runtime内置性能分析
+    """
+    options = ort.SessionOptions()
+    session_config = config.config.inference.models.get(name)
+    if session_config is not None:
+        if session_config.intra_op_num_threads > 0:
+            options.intra_op_num_threads = session_config.intra_op_num_threads
+        if session_config.inter_op_num_threads > 0:
+            options.inter_op_num_threads = session_config.inter_op_num_threads
+        level = GRAPH_OPTIMIZATION_LEVELS.get(session_config.graph_optimization_level.lower())
+        if level is None:
+            log.warning(f"未知的图优化级别: {session_config.graph_optimization_level}，使用 all")
+            level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.graph_optimization_level = level
+        mode = EXECUTION_MODES.get(session_config.execution_mode.lower())
+        if mode is None:
+            log.warning(f"未知的执行模式: {session_config.execution_mode}，使用 sequential")
+            mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.execution_mode = mode
+        options.enable_cpu_mem_arena = session_config.enable_cpu_mem_arena
+        options.enable_mem_pattern = session_config.enable_mem_pattern
+    if profile_prefix is not None:
+        options.enable_profiling = True
+        options.profile_file_prefix = profile_prefix
+    return options
+
+
+def model_file(name: str) -> str:
+    """
+    获取模型文件路径：按配置的版本（fp32/int8）选择，量化版本文件不存在时退回原始模型
+    """
+    session_config = config.config.inference.models.get(name)
+    variant = session_config.variant.lower() if session_config is not None else "fp32"
+    variants = MODEL_VARIANTS.get(name, {})
+    relative_path = variants.get(variant)
+    if relative_path is None:
+        log.warning(f"未知的模型版本: name={name}, variant={variant}，使用原始模型")
+        return resource_path(MODEL_PATHS[name])
+    model_path = resource_path(relative_path)
+    if not os.path.exists(model_path) and relative_path != MODEL_PATHS[name]:
+        log.error(f"模型版本文件不存在: {model_path}，使用原始模型")
+        return resource_path(MODEL_PATHS[name])
+    return model_path
+
+
+def run_session(session: ort.InferenceSession, batch: np.ndarray) -> np.ndarray:
+    """执行推理并返回第一个输出，模型导出时批次维度固定的，按固定批次大小分块执行"""
+    model_input = session.get_inputs()[0]
+    batch_dim = model_input.shape[0]
+    chunk = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else len(batch)
+    outputs = [
+        session.run(None, {model_input.name: batch[i:i + chunk]})[0]
+        for i in range(0, len(batch), chunk)
+    ]
+    return np.concatenate(outputs, axis=0)
+
+
+def get_providers() -> List[str]:
+    """获取可用的执行提供者，优先使用GPU"""
+    providers = ['CPUExecutionProvider']
+    try:
+        if ort.get_device() == 'GPU':
+            providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
+    except Exception:
+        pass
+    return providers
+
+
+class ModelRegistry:
+    """
+    模型注册表 - 单例模式
+    每个模型在进程内只加载一次，并记录加载耗时与内存占用
+    """
+    _instance = None
+
+    def __new__(cls):
+        """
+        单例模式实现
+        """
+        if cls._instance is None:
+            cls._instance = super(ModelRegistry, cls).__new__(cls)
+            cls._instance._lock = threading.RLock()
+            cls._instance._sessions = {}
+            cls._instance._colorizer = None
+            cls._instance._stats = {}
+            cls._instance._fingerprints = {}
+            # 待执行性能分析的推理次数（进程间共享，由推理工作进程初始化时替换为主进程创建的计数器）
+            cls._instance._profile_runs = {name: multiprocessing.Value('i', 0) for name in ONNX_MODELS}
+        return cls._instance
+
+    def load_all(self):
+        """
+        加载并预热所有模型（在服务启动时调用）
+        单个模型加载失败不影响其他模型
+        """
+        try:
+            self.get_session(DETECT_MODEL)
+        except Exception as e:
+            log.error(f"检测模型加载失败: {e}")
+        try:
+            self.get_colorizer()
+        except Exception as e:
+            log.error(f"彩色化模型加载失败: {e}")
+
+    def get_session(self, name: str = DETECT_MODEL) -> ort.InferenceSession:
+        """
+        获取共享的ONNX推理会话，未加载时先加载并预热
+        """
+        session = self._sessions.get(name)
+        if session is not None:
+            return session
+        with self._lock:
+            if name not in self._sessions:
+                self._sessions[name] = self._load_onnx(name)
+            return self._sessions[name]
+
+    def get_colorizer(self):
+        """
+        获取共享的彩色化模型，依赖模块缺失时返回 None
+        """
+        if self._colorizer is not None:
+            return self._colorizer
+        with self._lock:
+            if self._colorizer is None:
+                self._colorizer = self._load_colorizer()
+            return self._colorizer
+
+    def fingerprint(self, name: str) -> str:
+        """
+        获取模型文件的SHA-256指纹，用于标识模型版本（结果缓存键、诊断记录的模型版本）
+        模型文件不存在时返回 "unknown"
+        """
+        fingerprint = self._fingerprints.get(name)
+        if fingerprint is None:
+            model_path = model_file(name)
+            try:
+                fingerprint = file_sha256(model_path)
+            except OSError as e:
+                log.warning(f"计算模型指纹失败: name={name}, 错误: {e}")
+                return "unknown"
+            self._fingerprints[name] = fingerprint
+        return fingerprint
+
+    def run_batch(self, name: str, batch: np.ndarray) -> np.ndarray:
+        """
+        使用共享会话对一个批次执行推理，返回第一个输出
+        已请求性能分析时，本次推理改用开启了性能分析的独立会话执行并保存 trace
+        """
+        if self._take_profile_run(name):
+            return self._run_profiled(name, batch)
+        return run_session(self.get_session(name), batch)
+
+    # ==================== 性能分析 ====================
+
+    @property
+    def profile_counters(self) -> Dict[str, Any]:
+        """进程间共享的性能分析计数器，作为推理工作进程的初始化参数传入"""
+        return self._profile_runs
+
+    def set_profile_counters(self, counters: Dict[str, Any]):
+        """使用主进程创建的共享计数器（推理工作进程初始化时调用）"""
+        self._profile_runs = counters
+
+    def request_profiling(self, name: str, runs: int):
+        """
+        为接下来的 runs 次推理开启性能分析（所有推理工作进程共享该次数）
+        """
+        counter = self._profile_runs[name]
+        with counter.get_lock():
+            counter.value = runs
+        log.info(f"已开启ONNX Runtime性能分析: model={name}, runs={runs}")
+
+    def pending_profile_runs(self) -> Dict[str, int]:
+        """获取各模型剩余待分析的推理次数"""
+        return {name: counter.value for name, counter in self._profile_runs.items()}
+
+    def _take_profile_run(self, name: str) -> bool:
+        """领取一次性能分析名额"""
+        counter = self._profile_runs.get(name)
+        if counter is None or counter.value <= 0:
+            return False
+        with counter.get_lock():
+            if counter.value <= 0:
+                return False
+            counter.value -= 1
+        return True
+
+    def _run_profiled(self, name: str, batch: np.ndarray) -> np.ndarray:
+        """
+        使用开启性能分析的独立会话执行一次推理，trace JSON 保存到 inference.profiling_dir
+        """
+        profiling_dir = config.config.inference.profiling_dir
+        os.makedirs(profiling_dir, exist_ok=True)
+        prefix = os.path.join(profiling_dir, f"{name}_pid{os.getpid()}")
+        session = ort.InferenceSession(
+            model_file(name),
+            sess_options=build_session_options(name, profile_prefix=prefix),
+            providers=get_providers())
+        try:
+            return run_session(session, batch)
+        finally:
+            trace_path = session.end_profiling()
+            log.info(f"ONNX Runtime性能分析完成: model={name}, batch={len(batch)}, trace={trace_path}")
+
+    def _load_onnx(self, name: str) -> ort.InferenceSession:
+        """加载ONNX模型（按配置的版本）并使用全零张量预热"""
+        model_path = model_file(name)
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        session = ort.InferenceSession(
+            model_path, sess_options=build_session_options(name), providers=get_providers())
+        load_time_ms = (time.perf_counter() - start) * 1000
+
+        # 预热：首次 run 会触发内存分配与算子初始化
+        warmup_time_ms = None
+        try:
+            model_input = session.get_inputs()[0]
+            shape = [dim if isinstance(dim, int) and dim > 0 else 1
+                     for dim in model_input.shape]
+            if len(shape) == 4:
+                shape[2], shape[3] = WARMUP_SIZE, WARMUP_SIZE
+            dummy = np.zeros(shape, dtype=np.float32)
+            warmup_start = time.perf_counter()
+            session.run(None, {model_input.name: dummy})
+            warmup_time_ms = (time.perf_counter() - warmup_start) * 1000
+        except Exception as e:
+            log.warning(f"模型预热失败: name={name}, 错误: {e}")
+
+        self._record_stats(name, model_path, load_time_ms, warmup_time_ms, rss_before)
+        return session
+
+    def _load_colorizer(self):
+        """加载彩色化模型（编译模块），并使用全零图像预热"""
+        try:
+            from ai import rgb_image_generate
+        except ImportError as e:
+            log.error(f"缺少必需的依赖: {e}")
+            return None
+
+        model_path = resource_path(MODEL_PATHS[COLORIZATION_MODEL])
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        colorizer = rgb_image_generate.ColorizationModel(model_path)
+        load_time_ms = (time.perf_counter() - start) * 1000
+
+        warmup_time_ms = None
+        try:
+            dummy = np.zeros((WARMUP_SIZE, WARMUP_SIZE), dtype=np.uint8).tobytes()
+            warmup_start = time.perf_counter()
+            colorizer.generate_bgr(dummy, dummy, WARMUP_SIZE, WARMUP_SIZE)
+            warmup_time_ms = (time.perf_counter() - warmup_start) * 1000
+        except Exception as e:
+            log.warning(f"彩色化模型预热失败: {e}")
+
+        self._record_stats(COLORIZATION_MODEL, model_path, load_time_ms, warmup_time_ms, rss_before)
+        return colorizer
+
+    def _record_stats(self, name: str, model_path: str, load_time_ms: float,
+                      warmup_time_ms: Optional[float], rss_before: Optional[float]):
+        """记录并输出模型加载统计"""
+        rss_after = current_rss_mb()
+        memory_mb = None
+        if rss_before is not None and rss_after is not None:
+            memory_mb = round(rss_after - rss_before, 2)
+        stats = ModelStats(
+            name=name,
+            path=model_path,
+            load_time_ms=round(load_time_ms, 2),
+            warmup_time_ms=round(warmup_time_ms, 2) if warmup_time_ms is not None else None,
+            memory_mb=memory_mb,
+            loaded_at=datetime.now().isoformat()
+        )
+        self._stats[name] = stats
+        log.info(
+            f"模型加载完成: name={name}, 路径={model_path}, 加载耗时={stats.load_time_ms}ms, "
+            f"预热耗时={stats.warmup_time_ms}ms, 内存增量={stats.memory_mb}MB")
+
+    def warmup_ms(self, name: str) -> Optional[float]:
+        """获取模型预热（单张 640×640 推理）耗时，未加载或预热失败时返回 None"""
+        stats = self._stats.get(name)
+        return stats.warmup_time_ms if stats is not None else None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取所有已加载模型的统计信息
+        """
+        return [asdict(stats) for stats in self._stats.values()]
+
+
+# 创建全局模型注册表实例，方便导入使用
+model_registry = ModelRegistry()
@@ -0,0 +1,130 @@
+"""
+向量化非极大值抑制（NMS）模块
+一次性计算全部候选框的IoU矩阵，支持按类别与类别无关两种模式，
+同时服务于单通道检测与彩图聚合两个阶段
+"""
+import numpy as np
+
+# 参与NMS的最大候选框数量，限制IoU矩阵的内存占用（3000x3000 float32 约 36MB）
+MAX_CANDIDATES = 3000
+
+
+def xywh2xyxy(boxes: np.ndarray) -> np.ndarray:
+    """将 [cx, cy, w, h] 格式转换为 [x1, y1, x2, y2] 格式"""
+    boxes = np.asarray(boxes, dtype=np.float32)
+    xyxy = np.empty_like(boxes)
+    half_w = boxes[:, 2] / 2
+    half_h = boxes[:, 3] / 2
+    xyxy[:, 0] = boxes[:, 0] - half_w
+    xyxy[:, 1] = boxes[:, 1] - half_h
+    xyxy[:, 2] = boxes[:, 0] + half_w
+    xyxy[:, 3] = boxes[:, 1] + half_h
+    return xyxy
+
+
+def box_iou_matrix(boxes: np.ndarray) -> np.ndarray:
+    """
+    计算所有边界框两两之间的IoU矩阵
+
+    Args:
+        boxes: 形状为 (N, 4) 的边界框数组，格式为 [x1, y1, x2, y2]
+
+    Returns:
+        形状为 (N, N) 的IoU矩阵
+    """
+    boxes = np.asarray(boxes, dtype=np.float32)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    # 利用广播一次性计算交集区域
+    inter_w = np.clip(np.minimum(x2[:, None], x2[None, :]) -
+                      np.maximum(x1[:, None], x1[None, :]), 0, None)
+    inter_h = np.clip(np.minimum(y2[:, None], y2[None, :]) -
+                      np.maximum(y1[:, None], y1[None, :]), 0, None)
+    inter = inter_w * inter_h
+
+    union = areas[:, None] + areas[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def nms_indices(boxes, scores, iou_thres: float = 0.5, class_ids=None,
+                agnostic: bool = True, max_candidates: int = MAX_CANDIDATES) -> np.ndarray:
+    """
+    执行贪心NMS，返回保留的边界框索引（按置信度从高到低）
+
+    Args:
+        boxes: 边界框，格式为 [x1, y1, x2, y2]
+        scores: 每个边界框的置信度
+        iou_thres: IoU阈值，与已保留框IoU大于该值的框会被抑制
+        class_ids: 每个边界框的类别ID，按类别NMS时必须提供
+        agnostic: True 表示类别无关，False 表示仅在同类别之间抑制
+        max_candidates: 参与NMS的最大候选框数量
+
+    Returns:
+        保留的边界框索引数组
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind="stable")[:max_candidates]
+    candidates = boxes[order]
+
+    if not agnostic and class_ids is not None:
+        # 按类别平移坐标，使不同类别的框互不重叠，从而一次矩阵运算完成按类别NMS；
+        # 平移量取坐标跨度（切片检测、letterbox 还原后坐标可能为负），整体平移不改变同类别框之间的IoU
+        offsets = np.asarray(class_ids, dtype=np.float32).reshape(-1)[order]
+        low = float(candidates.min())
+        offsets = offsets * (float(candidates.max()) - low + 1.0)
+        candidates = candidates - low + offsets[:, None]
+
+    iou = box_iou_matrix(candidates)
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed[i + 1:] |= iou[i, i + 1:] > iou_thres
+    return order[keep]
+
+
+def yolo_output_to_pred(output: np.ndarray) -> np.ndarray:
+    """
+    将YOLO单张图像的原始输出 (4 + num_classes, N) 转换为 (N, 5 + num_classes)，
+    每行格式为 [cx, cy, w, h, conf, cls_0_score, cls_1_score, ...]，conf 为最大类别得分
+    """
+    pred = np.transpose(output, (1, 0))
+    pred_conf = np.max(pred[..., 4:], axis=-1)
+    return np.insert(pred, 4, pred_conf, axis=-1)
+
+
+def yolo_nms(pred: np.ndarray, conf_thres: float, iou_thres: float,
+             agnostic: bool = False) -> np.ndarray:
+    """
+    对YOLO单张图像的输出执行置信度过滤与NMS
+
+    Args:
+        pred: 形状为 (N, 5 + num_classes) 的预测结果，
+              每行格式为 [cx, cy, w, h, conf, cls_0_score, cls_1_score, ...]
+        conf_thres: 置信度阈值
+        iou_thres: IoU阈值
+        agnostic: 是否类别无关
+
+    Returns:
+        形状为 (K, 6) 的检测结果，每行格式为 [cx, cy, w, h, conf, cls_id]
+    """
+    box = pred[pred[..., 4] > conf_thres]
+    if len(box) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+
+    cls_ids = np.argmax(box[..., 5:], axis=-1)
+    keep = nms_indices(xywh2xyxy(box[:, :4]), box[:, 4], iou_thres,
+                       class_ids=cls_ids, agnostic=agnostic)
+
+    result = np.empty((len(keep), 6), dtype=np.float32)
+    result[:, :5] = box[keep, :5]
+    result[:, 5] = cls_ids[keep]
+    return result
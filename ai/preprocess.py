@@ -0,0 +1,124 @@
+"""
+模型输入预处理模块
+利用JPEG的DCT域降采样（cv2.IMREAD_REDUCED_*）按接近模型输入的分辨率解码，
+直接归一化写入复用的 float32 批次缓冲区，避免全分辨率解码与 float64 中间数组
+"""
+import threading
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# 降采样倍数对应的解码标志（由大到小尝试）
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# 归一化系数（float32 标量，保证运算结果直接为 float32）
+SCALE_255 = np.float32(1.0 / 255.0)
+
+
+class StageTimer:
+    """按阶段累计耗时（毫秒）"""
+
+    def __init__(self):
+        self.timings = defaultdict(float)
+
+    def add(self, stage: str, start: float):
+        """累计从 start 到当前的耗时"""
+        self.timings[stage] += (time.perf_counter() - start) * 1000
+
+    def merge(self, other: "StageTimer"):
+        """累加另一个计时器的各阶段耗时（并行处理时各线程分别计时后合并）"""
+        for stage, ms in other.timings.items():
+            self.timings[stage] += ms
+
+    def as_dict(self) -> dict:
+        return {stage: round(ms, 2) for stage, ms in self.timings.items()}
+
+
+def image_size(path: str) -> tuple[int, int]:
+    """只读取文件头获取图像原始尺寸 (宽, 高)，不解码像素"""
+    with Image.open(path) as img:
+        return img.size
+
+
+def reduction_factor(width: int, height: int, target_width: int, target_height: int) -> int:
+    """选择解码后尺寸仍不小于模型输入尺寸的最大降采样倍数"""
+    for factor, _ in REDUCED_DECODE_FLAGS:
+        if width // factor >= target_width and height // factor >= target_height:
+            return factor
+    return 1
+
+
+def decode_reduced(path: str, target_width: int, target_height: int) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    按接近模型输入的分辨率解码图像
+
+    Returns:
+        (降采样后的BGR图像, 原始尺寸 (宽, 高))
+    """
+    width, height = image_size(path)
+    factor = reduction_factor(width, height, target_width, target_height)
+    flag = dict(REDUCED_DECODE_FLAGS).get(factor, cv2.IMREAD_COLOR)
+    img = cv2.imread(path, flag)
+    if img is None:
+        raise ValueError(f"无法读取图像: {path}")
+    return img, (width, height)
+
+
+def normalize_into(img: np.ndarray, out: np.ndarray, timer: StageTimer):
+    """
+    将BGR图像缩放到 out 的尺寸，并以 CHW、[0,1] 的 float32 写入 out（形状为 3×H×W）
+    """
+    start = time.perf_counter()
+    height, width = out.shape[1:]
+    if img.shape[:2] != (height, width):
+        img = cv2.resize(img, (width, height))
+    timer.add("resize", start)
+
+    start = time.perf_counter()
+    # uint8 HWC -> float32 CHW，一次写入目标缓冲区
+    np.multiply(img.transpose(2, 0, 1), SCALE_255, out=out)
+    timer.add("normalize", start)
+
+
+class BatchBuffer:
+    """
+    复用的 float32 批次缓冲区（每个线程一个，推理阻塞期间不会被同线程再次写入）
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self._local = threading.local()
+
+    def get(self, batch_size: int) -> np.ndarray:
+        """获取 batch_size×3×H×W 的缓冲区视图，容量不足时扩容"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < batch_size:
+            buffer = np.empty((batch_size, 3, self.height, self.width), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer[:batch_size]
+
+
+def load_batch(paths: list[str], buffer: BatchBuffer, timer: StageTimer) -> tuple[np.ndarray, list]:
+    """
+    将一组图像解码、缩放并归一化写入批次缓冲区
+
+    Returns:
+        (N×3×H×W 批次视图, 每张图像的原始尺寸 (宽, 高) 列表)
+    """
+    batch = buffer.get(len(paths))
+    sizes = []
+    for n, path in enumerate(paths):
+        start = time.perf_counter()
+        img, size = decode_reduced(path, buffer.width, buffer.height)
+        timer.add("decode", start)
+        normalize_into(img, batch[n], timer)
+        sizes.append(size)
+    return batch, sizes
@@ -0,0 +1,119 @@
+"""
+AI 检测结果缓存
+以源图像文件的SHA-256、模型标识与检测阈值作为缓存键（内容寻址），
+命中时直接复用已生成的检测框、标签、叠加图与AI诊断记录，无需重新推理
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import config
+from loguru_logging import log
+
+# 计算文件哈希时每次读取的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """由模型标识、阈值、文件哈希等组成部分生成缓存键"""
+    return hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class DetectionResultCache:
+    """
+    检测结果缓存 - LRU淘汰
+    同时限制条目数与总字节数（按条目JSON序列化后的长度估算），任一超出即淘汰最久未使用的条目
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存条目并标记为最近使用（不计入命中统计，由调用方确认可用后调用 record）
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        """
+        写入缓存条目，超出预算时按LRU淘汰
+        """
+        size = len(json.dumps(entry, default=str, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            log.warning(f"检测结果条目超出缓存容量，不缓存: size={size}")
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, key: str):
+        """
+        移除失效的缓存条目（例如对应的AI诊断记录已被删除）
+        """
+        with self._lock:
+            item = self._entries.pop(key, None)
+            if item is not None:
+                self._bytes -= item[1]
+                self._invalidations += 1
+
+    def record(self, hits: int, misses: int):
+        """记录命中与未命中次数"""
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计：条目数、占用字节、命中率与淘汰次数
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 4) if total else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+# 创建全局检测结果缓存实例，方便导入使用
+detection_cache = DetectionResultCache(
+    max_entries=config.config.inference.cache_max_entries,
+    max_bytes=config.config.inference.cache_max_mb * 1024 * 1024,
+)
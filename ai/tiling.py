@@ -0,0 +1,181 @@
+"""
+分块（tiled）高分辨率检测模块
+将原图按原始分辨率切分为相互重叠的分块，分块批量推理后把检测框映射回原图坐标，
+再用向量化NMS按类别合并，以保留单次缩放到 640×640 时丢失的微小病灶（如异常黑点）
+"""
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ai.nms import nms_indices, xywh2xyxy, yolo_nms, yolo_output_to_pred
+from ai.preprocess import BatchBuffer, StageTimer, normalize_into
+
+# 检测模式
+MODE_SINGLE = "single"
+MODE_TILED = "tiled"
+DETECT_MODES = (MODE_SINGLE, MODE_TILED)
+
+# 超出耗时预算时分块边长的放大倍数
+TILE_GROWTH = 1.5
+
+
+def tile_origins(length: int, tile: int, stride: int) -> List[int]:
+    """计算一维方向上各分块的起点，最后一块与边缘对齐"""
+    if length <= tile:
+        return [0]
+    origins = list(range(0, length - tile, stride))
+    origins.append(length - tile)
+    return origins
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """
+    计算覆盖整幅图像的重叠分块
+
+    Returns:
+        分块列表，每项为 (x0, y0, 宽, 高)
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    return [(x0, y0, tile_w, tile_h)
+            for y0 in tile_origins(height, tile_size, stride)
+            for x0 in tile_origins(width, tile_size, stride)]
+
+
+class TileCostEstimator:
+    """
+    单个分块推理耗时的指数加权移动平均（EWMA），用于按耗时预算规划分块数量
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._per_tile_ms: Optional[float] = None
+
+    def update(self, elapsed_ms: float, tiles: int):
+        """记录一次分块推理的总耗时"""
+        if tiles <= 0:
+            return
+        sample = elapsed_ms / tiles
+        with self._lock:
+            if self._per_tile_ms is None:
+                self._per_tile_ms = sample
+            else:
+                self._per_tile_ms = self.alpha * sample + (1 - self.alpha) * self._per_tile_ms
+
+    def estimate(self, default_ms: float) -> float:
+        """获取单个分块的预计耗时，尚无样本时使用 default_ms"""
+        return self._per_tile_ms if self._per_tile_ms is not None else default_ms
+
+
+def plan_tile_size(sizes: List[Tuple[int, int]], tile_size: int, overlap: float,
+                   budget_ms: float, per_tile_ms: float) -> Optional[int]:
+    """
+    在耗时预算内选择分块边长：预计耗时超出预算时逐步增大分块（减少分块数量），
+    分块已覆盖整幅图像仍超出预算时返回 None，表示退回单次缩放检测
+    """
+    if not sizes:
+        return tile_size
+    longest = max(max(width, height) for width, height in sizes)
+    size = tile_size
+    while True:
+        tiles = sum(len(tile_grid(width, height, size, overlap)) for width, height in sizes)
+        if tiles * per_tile_ms <= budget_ms:
+            return size
+        if size >= longest:
+            return None
+        size = min(longest, int(size * TILE_GROWTH))
+
+
+def tile_detections(output: np.ndarray, origin: Tuple[int, int, int, int],
+                    input_size: Tuple[int, int], conf_thres: float, iou_thres: float) -> np.ndarray:
+    """
+    解析单个分块的模型输出，返回原图坐标下的检测结果，每行为 [x1, y1, x2, y2, conf, cls_id]
+    """
+    dets = yolo_nms(yolo_output_to_pred(output), conf_thres, iou_thres)
+    if len(dets) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+    x0, y0, tile_w, tile_h = origin
+    input_w, input_h = input_size
+    scale = np.array([tile_w / input_w, tile_h / input_h] * 2, dtype=np.float32)
+    offset = np.array([x0, y0, x0, y0], dtype=np.float32)
+    result = np.empty((len(dets), 6), dtype=np.float32)
+    result[:, :4] = xywh2xyxy(dets[:, :4]) * scale + offset
+    result[:, 4:] = dets[:, 4:]
+    return result
+
+
+def merge_detections(dets: np.ndarray, img_size: Tuple[int, int],
+                     merge_iou: float) -> Tuple[list, list, list]:
+    """
+    合并同一图像各分块的检测结果（按类别NMS去除重叠区域内的重复框），并裁剪到图像范围内
+    """
+    if len(dets) == 0:
+        return [], [], []
+    keep = nms_indices(dets[:, :4], dets[:, 4], merge_iou,
+                       class_ids=dets[:, 5], agnostic=False)
+    width, height = img_size
+    boxes, class_ids, scores = [], [], []
+    for x1, y1, x2, y2, conf, cls_id in dets[keep]:
+        boxes.append([max(0, int(x1)), max(0, int(y1)),
+                      min(width - 1, int(x2)), min(height - 1, int(y2))])
+        class_ids.append(int(cls_id))
+        scores.append(float(conf))
+    return boxes, class_ids, scores
+
+
+def detect_tiled(paths: List[str], sizes: List[Tuple[int, int]], tile_size: int, overlap: float,
+                 infer: Callable[[np.ndarray], np.ndarray], buffer: BatchBuffer, timer: StageTimer,
+                 max_batch_size: int, conf_thres: float, iou_thres: float, merge_iou: float,
+                 cost: Optional[TileCostEstimator] = None) -> List[Tuple[list, list, list]]:
+    """
+    对一组图像执行分块检测
+
+    所有图像的分块依次写入复用的批次缓冲区，每满 max_batch_size 个分块推理一次
+    （分块总数不超过该值时即为一次批量推理），原图只在切块时全分辨率解码一次
+
+    Returns:
+        每张图像的 (边界框, 类别ID, 置信度)，坐标为原图坐标
+    """
+    plan = [(n, origin) for n, (width, height) in enumerate(sizes)
+            for origin in tile_grid(width, height, tile_size, overlap)]
+    per_image: List[list] = [[] for _ in paths]
+    input_size = (buffer.width, buffer.height)
+    decoded_idx, decoded = None, None
+
+    for chunk_start in range(0, len(plan), max(1, max_batch_size)):
+        chunk = plan[chunk_start:chunk_start + max(1, max_batch_size)]
+        batch = buffer.get(len(chunk))
+        for k, (n, (x0, y0, tile_w, tile_h)) in enumerate(chunk):
+            if decoded_idx != n:
+                start = time.perf_counter()
+                decoded = cv2.imread(paths[n])
+                timer.add("decode", start)
+                if decoded is None:
+                    raise ValueError(f"无法读取图像: {paths[n]}")
+                decoded_idx = n
+            normalize_into(decoded[y0:y0 + tile_h, x0:x0 + tile_w], batch[k], timer)
+
+        start = time.perf_counter()
+        outputs = infer(batch)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timer.add("inference", start)
+        if cost is not None:
+            cost.update(elapsed_ms, len(chunk))
+
+        for k, (n, origin) in enumerate(chunk):
+            per_image[n].append(tile_detections(outputs[k], origin, input_size, conf_thres, iou_thres))
+
+    start = time.perf_counter()
+    results = [merge_detections(np.concatenate(dets) if dets else np.empty((0, 6), dtype=np.float32),
+                                size, merge_iou)
+               for dets, size in zip(per_image, sizes)]
+    timer.add("merge", start)
+    return results
+
+
+# 创建全局分块耗时估计实例（每个推理进程一个），方便导入使用
+tile_cost = TileCostEstimator()
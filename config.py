@@ -68,6 +68,128 @@ class ImageView:
     flipx: bool
     flipy: bool
 
+@dataclass
+class SessionConfig:
+    """单个ONNX模型的推理会话配置（线程数为0时使用ONNX Runtime默认值）"""
+    # 模型版本：fp32（原始导出模型）/int8（tools/quantize_model.py 生成的量化模型）
+    variant: str = "fp32"
+    intra_op_num_threads: int = 0
+    inter_op_num_threads: int = 0
+    # 图优化级别：disabled/basic/extended/all
+    graph_optimization_level: str = "all"
+    # 执行模式：sequential/parallel
+    execution_mode: str = "sequential"
+    enable_cpu_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+
+
+@dataclass
+class InferenceConfig:
+    """AI推理工作池配置"""
+    # 工作池模式：process（专用推理进程，不占用事件循环所在进程的GIL，进程内的任务共用合批调度器）/
+    # thread（主进程中的线程，共享主进程中的模型与合批调度器）
+    pool_mode: str = "process"
+    # 并发执行推理任务的线程数（process 模式下为推理进程内的线程数，模型只加载一份）
+    pool_workers: int = 2
+    # 跨请求合批的最长等待窗口（毫秒），所有进行中的请求都已提交时不等待
+    batch_window_ms: int = 15
+    # 单次合批推理的最大图像数量
+    max_batch_size: int = 16
+    # 检测结果缓存的最大条目数与容量（MB），超出时按LRU淘汰
+    cache_max_entries: int = 2000
+    cache_max_mb: int = 64
+    # ONNX Runtime 性能分析结果（trace JSON）保存目录
+    profiling_dir: str = "./logs/ort_profiles"
+    # 异步检测任务的最长执行时间（秒），超时后任务标记为 timeout
+    job_timeout_s: int = 300
+    # 各模型的推理会话配置，键为模型名称（detect）
+    models: Dict[str, SessionConfig] = field(default_factory=dict)
+
+
+@dataclass
+class TilingConfig:
+    """AI检测分块（tiled）模式配置"""
+    # 默认分块边长（原图像素），每块缩放到模型输入尺寸后推理
+    tile_size: int = 640
+    # 相邻分块的重叠比例
+    overlap: float = 0.2
+    # 合并各分块检测框时按类别NMS的IoU阈值
+    merge_iou: float = 0.5
+    # 单次请求分块推理的总耗时预算（毫秒），超出时增大分块边长，仍超出则退回单次缩放检测
+    latency_budget_ms: int = 3000
+
+
+@dataclass
+class ThumbnailConfig:
+    """缩略图生成配置"""
+    # 缩略图最长边（像素）
+    max_size: int = 256
+    # JPEG / WebP 压缩质量
+    jpeg_quality: int = 75
+    webp_quality: int = 75
+    # 是否另存 WebP 变体（访问缩略图时请求的 Accept 头包含 image/webp 则返回 WebP）
+    webp_enabled: bool = True
+    # 接口响应中缩略图访问URL签名的有效期（秒），实际有效期在 1～2 倍之间
+    url_ttl_s: int = 3600
+
+
+@dataclass
+class TilePyramidConfig:
+    """影像查看器深度缩放（DZI）瓦片金字塔配置"""
+    # 瓦片边长与相邻瓦片重叠（像素）
+    tile_size: int = 256
+    overlap: int = 1
+    # 瓦片 JPEG 压缩质量
+    jpeg_quality: int = 85
+    # 入库时预生成的层级数：从整图可放入单个瓦片的概览层起向上预生成的层数（其下更小的层级一并生成）
+    warm_levels: int = 3
+    # 瓦片生成线程数
+    workers: int = 2
+
+
+@dataclass
+class LoopMonitorConfig:
+    """事件循环延迟监控配置（诊断用，默认关闭）"""
+    enabled: bool = False
+    # 采样间隔（毫秒）：每个间隔测量一次事件循环调度延迟
+    interval_ms: int = 50
+    # 阻塞阈值（毫秒）：延迟超过阈值时记录当时执行的接口与调用栈
+    stall_threshold_ms: int = 100
+    # 计算延迟分位数的采样窗口（最近的采样数）
+    window: int = 2400
+    # 保留的最近阻塞记录数
+    max_stalls: int = 50
+    # 调用栈采样深度（帧数）
+    stack_depth: int = 25
+
+
+@dataclass
+class BulkheadConfig:
+    """舱壁隔离配置：每个子系统独立的并发上限与排队上限"""
+    # 同时执行的请求数（同步接口即专用线程池的线程数）
+    max_workers: int = 8
+    # 等待执行的请求数上限，超出时直接返回 503
+    max_queue: int = 32
+    # 返回 503 时建议客户端重试的等待秒数（Retry-After）
+    retry_after_s: int = 1
+
+
+@dataclass
+class JobQueueConfig:
+    """后台任务队列配置"""
+    # 随服务启动的任务工作进程数量，0 表示只使用单独部署的工作进程（python -m jobs.worker）
+    workers: int = 1
+    # 队列为空时的轮询间隔（秒）
+    poll_interval_s: float = 1.0
+    # 可见性超时（秒）：任务被领取后超过该时间仍未完成（工作进程崩溃）即可被其他工作进程重新领取
+    visibility_timeout_s: int = 300
+    # 最大执行次数，超过后任务进入 dead 状态
+    max_attempts: int = 5
+    # 失败重试的指数退避基数与上限（秒）
+    backoff_base_s: float = 5.0
+    backoff_max_s: float = 600.0
+
+
 @dataclass
 class AppConfig:
     """应用总配置"""
@@ -78,6 +200,14 @@ class AppConfig:
     logging: LoggingConfig
     save_folder_path: str
     image_view: ImageView
+    inference: InferenceConfig = field(default_factory=InferenceConfig)
+    tiling: TilingConfig = field(default_factory=TilingConfig)
+    jobs: JobQueueConfig = field(default_factory=JobQueueConfig)
+    thumbnail: ThumbnailConfig = field(default_factory=ThumbnailConfig)
+    tile_pyramid: TilePyramidConfig = field(default_factory=TilePyramidConfig)
+    loop_monitor: LoopMonitorConfig = field(default_factory=LoopMonitorConfig)
+    # 各子系统的舱壁隔离配置，键为舱壁名称（auth/crud/imaging/ai）
+    bulkheads: Dict[str, BulkheadConfig] = field(default_factory=dict)
 
 
 class ConfigError(Exception):
@@ -149,6 +279,13 @@ class Config:
         try:
             # 数据库配置
             db_config = config_data['database']
+            # AI推理配置（可选，缺失时使用默认值）
+            inference_config = config_data.get('inference') or {}
+            tiling_config = config_data.get('tiling') or {}
+            jobs_config = config_data.get('jobs') or {}
+            thumbnail_config = config_data.get('thumbnail') or {}
+            tile_pyramid_config = config_data.get('tile_pyramid') or {}
+            loop_monitor_config = config_data.get('loop_monitor') or {}
             self._config = AppConfig(
                 database=DatabaseConfig(
                     host=db_config['host'],
@@ -196,7 +333,73 @@ class Config:
                 image_view= ImageView(
                     flipx = config_data['image_view']['flipx'],
                     flipy = config_data['image_view']['flipy']
-                )
+                ),
+                inference=InferenceConfig(
+                    pool_mode=inference_config.get('pool_mode', 'process'),
+                    pool_workers=inference_config.get('pool_workers', 2),
+                    batch_window_ms=inference_config.get('batch_window_ms', 15),
+                    max_batch_size=inference_config.get('max_batch_size', 16),
+                    cache_max_entries=inference_config.get('cache_max_entries', 2000),
+                    cache_max_mb=inference_config.get('cache_max_mb', 64),
+                    profiling_dir=inference_config.get('profiling_dir', './logs/ort_profiles'),
+                    job_timeout_s=inference_config.get('job_timeout_s', 300),
+                    models={
+                        name: SessionConfig(
+                            variant=model_config.get('variant', 'fp32'),
+                            intra_op_num_threads=model_config.get('intra_op_num_threads', 0),
+                            inter_op_num_threads=model_config.get('inter_op_num_threads', 0),
+                            graph_optimization_level=model_config.get('graph_optimization_level', 'all'),
+                            execution_mode=model_config.get('execution_mode', 'sequential'),
+                            enable_cpu_mem_arena=model_config.get('enable_cpu_mem_arena', True),
+                            enable_mem_pattern=model_config.get('enable_mem_pattern', True)
+                        )
+                        for name, model_config in (inference_config.get('models') or {}).items()
+                    }
+                ),
+                tiling=TilingConfig(
+                    tile_size=tiling_config.get('tile_size', 640),
+                    overlap=tiling_config.get('overlap', 0.2),
+                    merge_iou=tiling_config.get('merge_iou', 0.5),
+                    latency_budget_ms=tiling_config.get('latency_budget_ms', 3000)
+                ),
+                jobs=JobQueueConfig(
+                    workers=jobs_config.get('workers', 1),
+                    poll_interval_s=jobs_config.get('poll_interval_s', 1.0),
+                    visibility_timeout_s=jobs_config.get('visibility_timeout_s', 300),
+                    max_attempts=jobs_config.get('max_attempts', 5),
+                    backoff_base_s=jobs_config.get('backoff_base_s', 5.0),
+                    backoff_max_s=jobs_config.get('backoff_max_s', 600.0)
+                ),
+                thumbnail=ThumbnailConfig(
+                    max_size=thumbnail_config.get('max_size', 256),
+                    jpeg_quality=thumbnail_config.get('jpeg_quality', 75),
+                    webp_quality=thumbnail_config.get('webp_quality', 75),
+                    webp_enabled=thumbnail_config.get('webp_enabled', True),
+                    url_ttl_s=thumbnail_config.get('url_ttl_s', 3600)
+                ),
+                tile_pyramid=TilePyramidConfig(
+                    tile_size=tile_pyramid_config.get('tile_size', 256),
+                    overlap=tile_pyramid_config.get('overlap', 1),
+                    jpeg_quality=tile_pyramid_config.get('jpeg_quality', 85),
+                    warm_levels=tile_pyramid_config.get('warm_levels', 3),
+                    workers=tile_pyramid_config.get('workers', 2)
+                ),
+                loop_monitor=LoopMonitorConfig(
+                    enabled=loop_monitor_config.get('enabled', False),
+                    interval_ms=loop_monitor_config.get('interval_ms', 50),
+                    stall_threshold_ms=loop_monitor_config.get('stall_threshold_ms', 100),
+                    window=loop_monitor_config.get('window', 2400),
+                    max_stalls=loop_monitor_config.get('max_stalls', 50),
+                    stack_depth=loop_monitor_config.get('stack_depth', 25)
+                ),
+                bulkheads={
+                    name: BulkheadConfig(
+                        max_workers=bulkhead_config.get('max_workers', 8),
+                        max_queue=bulkhead_config.get('max_queue', 32),
+                        retry_after_s=bulkhead_config.get('retry_after_s', 1)
+                    )
+                    for name, bulkhead_config in (config_data.get('bulkheads') or {}).items()
+                }
             )
         except KeyError as e:
             # 当缺少必要的配置项时抛出错误
@@ -1,12 +1,16 @@
 """
 数据库连接模块 - 使用SQLModel和psycopg连接PostgreSQL数据库
 实现连接池、单例模式和自动断线重连功能
+同时提供基于 psycopg3 异步驱动的 AsyncEngine/AsyncSession，供 async def 接口使用，
+查询等待数据库期间不阻塞事件循环，并发请求可同时占用连接池中的多个连接
 """
 import time
 from typing import Any, Dict, List, Optional, Type, TypeVar, Generic, Union
 from contextlib import contextmanager
+from typing import AsyncIterator
 
 from sqlalchemy import create_engine, text, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel
@@ -31,6 +35,8 @@ class Database:
     _instance = None
     _engine = None
     _session_factory = None
+    _async_engine = None
+    _async_session_factory = None
     _max_retries = 3
     _retry_interval = 1  # 重试间隔（秒）
 
@@ -74,6 +80,23 @@ class Database:
                 autoflush=False,
                 bind=self._engine
             )
+
+            # 异步引擎（psycopg3 异步模式，同一连接URL），连接池配置与同步引擎一致
+            self._async_engine = create_async_engine(
+                db_url,
+                pool_size=db_config.max_idle_conns,
+                max_overflow=db_config.max_open_conns - db_config.max_idle_conns,
+                pool_timeout=30,
+                pool_recycle=db_config.conn_max_lifetime,
+                pool_pre_ping=True,
+                echo=db_config.log_level.lower() == "debug"
+            )
+            # 提交后不过期对象属性：AsyncSession 不支持访问过期属性时的隐式加载
+            self._async_session_factory = async_sessionmaker(
+                bind=self._async_engine,
+                autoflush=False,
+                expire_on_commit=False
+            )
             
         except (ConfigError, Exception) as e:
             raise DatabaseError(f"数据库初始化失败: {str(e)}")
@@ -142,6 +165,18 @@ class Database:
         # 所有重试都失败
         return False
 
+    def async_session(self) -> AsyncSession:
+        """
+        创建异步数据库会话（async with 使用，退出时关闭会话并归还连接）
+        用于后台任务等不经过依赖注入的异步代码
+        """
+        return self._async_session_factory()
+
+    async def dispose_async(self):
+        """关闭异步引擎的连接池（服务关闭时调用）"""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
     def create_tables(self):
         """
         创建所有模型对应的数据库表
@@ -346,3 +381,17 @@ def get_db():
         
 #     except DatabaseError as e:
 #         print(f"数据库操作失败: {str(e)}")
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI依赖项：获取异步数据库会话
+    用法: session: AsyncSession = Depends(get_async_db)
+    """
+    async with db._async_session_factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
@@ -256,7 +256,7 @@ CREATE TABLE fundus_images (
     resolution VARCHAR(50),                                    -- 分辨率
     acquisition_device VARCHAR(100),                           -- 采集设备
     acquisition_parameters JSONB,                              -- 采集参数
-    thumbnail_data TEXT,                                       -- 缩略图base64数据
+    thumbnail_data TEXT,                                       -- 缩略图访问URL（派生图像存储）
     is_primary BOOLEAN DEFAULT false,                          -- 是否为主要图像
     upload_status VARCHAR(20) DEFAULT 'uploaded' CHECK (upload_status IN ('uploading', 'uploaded', 'failed', 'processing')),  -- 上传状态
     deleted_at TIMESTAMPTZ,                                   -- 软删除时间戳(带时区)
@@ -280,7 +280,7 @@ COMMENT ON COLUMN fundus_images.image_quality IS '图像质量';
 COMMENT ON COLUMN fundus_images.resolution IS '分辨率';
 COMMENT ON COLUMN fundus_images.acquisition_device IS '采集设备';
 COMMENT ON COLUMN fundus_images.acquisition_parameters IS '采集参数';
-COMMENT ON COLUMN fundus_images.thumbnail_data IS '缩略图base64数据';
+COMMENT ON COLUMN fundus_images.thumbnail_data IS '缩略图访问URL（派生图像存储 /api/derivatives/{sha256}.{ext}）';
 COMMENT ON COLUMN fundus_images.is_primary IS '是否为主要图像';
 COMMENT ON COLUMN fundus_images.upload_status IS '上传状态';
 COMMENT ON COLUMN fundus_images.deleted_at IS '软删除时间戳(带时区)';
@@ -296,7 +296,7 @@ CREATE TABLE ai_diagnoses (
     ai_model_version VARCHAR(50),                              -- AI模型版本
     detect_file_path VARCHAR(500) NOT NULL,                    -- 诊断图片文件路径
     detect_file_name VARCHAR(500) NOT NULL,                    -- 诊断图片文件名
-    thumbnail_data TEXT,                                       -- 缩略图base64数据
+    thumbnail_data TEXT,                                       -- 缩略图访问URL（派生图像存储）
     diagnosis_result JSONB,                           -- 诊断结果(JSON格式)
     diagnostic_markers JSONB,                                  -- 诊断标记点坐标
     confidence_score DECIMAL(5,4) CHECK (confidence_score >= 0 AND confidence_score <= 1),  -- 置信度分数(0-1)
@@ -321,7 +321,7 @@ COMMENT ON COLUMN ai_diagnoses.ai_model_name IS 'AI模型名称';
 COMMENT ON COLUMN ai_diagnoses.ai_model_version IS 'AI模型版本';
 COMMENT ON COLUMN ai_diagnoses.detect_file_path IS '诊断图片文件路径';
 COMMENT ON COLUMN ai_diagnoses.detect_file_name IS '诊断图片文件名';
-COMMENT ON COLUMN ai_diagnoses.thumbnail_data IS '缩略图base64数据';
+COMMENT ON COLUMN ai_diagnoses.thumbnail_data IS '缩略图访问URL（派生图像存储 /api/derivatives/{sha256}.{ext}）';
 COMMENT ON COLUMN ai_diagnoses.diagnosis_result IS '诊断结果(JSON格式)';
 COMMENT ON COLUMN ai_diagnoses.confidence_score IS '置信度分数(0-1)';
 COMMENT ON COLUMN ai_diagnoses.processing_time_ms IS '处理时间(毫秒)';
@@ -551,6 +551,37 @@ COMMENT ON COLUMN system_logs.execution_time_ms IS '执行耗时(毫秒)';
 COMMENT ON COLUMN system_logs.additional_data IS '额外数据';
 COMMENT ON COLUMN system_logs.created_at IS '创建时间(带时区)';
 
+-- 后台任务队列表
+CREATE TABLE jobs (
+    id SERIAL PRIMARY KEY,                                     -- 任务ID
+    job_type VARCHAR(50) NOT NULL,                             -- 任务类型
+    payload JSONB NOT NULL,                                    -- 任务参数(JSON)
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'completed', 'dead')),  -- 任务状态
+    attempts INTEGER NOT NULL DEFAULT 0 CHECK (attempts >= 0), -- 已执行次数
+    max_attempts INTEGER NOT NULL DEFAULT 5,                   -- 最大执行次数
+    run_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,     -- 可执行时间(重试退避)
+    locked_by VARCHAR(100),                                    -- 领取任务的工作进程
+    locked_until TIMESTAMPTZ,                                  -- 可见性超时时间
+    last_error TEXT,                                           -- 最近一次错误信息
+    finished_at TIMESTAMPTZ,                                   -- 完成或进入dead状态的时间
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,           -- 创建时间(带时区)
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP            -- 更新时间(带时区)
+);
+COMMENT ON TABLE jobs IS '后台任务表:持久化的任务队列，由独立的工作进程通过 FOR UPDATE SKIP LOCKED 并发领取';
+COMMENT ON COLUMN jobs.id IS '任务ID';
+COMMENT ON COLUMN jobs.job_type IS '任务类型';
+COMMENT ON COLUMN jobs.payload IS '任务参数';
+COMMENT ON COLUMN jobs.status IS '任务状态';
+COMMENT ON COLUMN jobs.attempts IS '已执行次数';
+COMMENT ON COLUMN jobs.max_attempts IS '最大执行次数';
+COMMENT ON COLUMN jobs.run_at IS '可执行时间';
+COMMENT ON COLUMN jobs.locked_by IS '领取任务的工作进程';
+COMMENT ON COLUMN jobs.locked_until IS '可见性超时时间';
+COMMENT ON COLUMN jobs.last_error IS '最近一次错误信息';
+COMMENT ON COLUMN jobs.finished_at IS '完成时间';
+COMMENT ON COLUMN jobs.created_at IS '创建时间(带时区)';
+COMMENT ON COLUMN jobs.updated_at IS '更新时间(带时区)';
+
 -- 创建触发器函数
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -571,6 +602,7 @@ CREATE TRIGGER trigger_diagnosis_records_updated_at BEFORE UPDATE ON diagnosis_r
 CREATE TRIGGER trigger_follow_ups_updated_at BEFORE UPDATE ON follow_ups FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER trigger_roles_updated_at BEFORE UPDATE ON roles FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER trigger_registrations_updated_at BEFORE UPDATE ON registrations FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+CREATE TRIGGER trigger_jobs_updated_at BEFORE UPDATE ON jobs FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 -- 索引优化
 CREATE INDEX idx_users_status ON users(status);
@@ -583,6 +615,8 @@ CREATE INDEX idx_examinations_patient_id ON examinations(patient_id);
 CREATE INDEX idx_examinations_doctor_id ON examinations(doctor_id);
 CREATE INDEX idx_examinations_registration_id ON examinations(registration_id);
 CREATE INDEX idx_examinations_date_status ON examinations(examination_date, status);
+-- 列表按 (examination_date, id) 倒序游标分页
+CREATE INDEX idx_examinations_date_id ON examinations(examination_date, id);
 CREATE INDEX idx_examinations_status ON examinations(status);
 CREATE INDEX idx_examinations_deleted_at ON examinations(deleted_at) WHERE deleted_at IS NULL;
 CREATE INDEX idx_registrations_patient_id ON registrations(patient_id);
@@ -598,10 +632,12 @@ CREATE INDEX idx_fundus_images_examination_id ON fundus_images(examination_id);
 -- 防止同一检查的影像编号重复
 CREATE UNIQUE INDEX unique_fundus_image_per_exam_number ON fundus_images(examination_id, image_number);
 CREATE INDEX idx_fundus_images_deleted_at ON fundus_images(deleted_at) WHERE deleted_at IS NULL;
+CREATE INDEX idx_fundus_images_created_at_id ON fundus_images(created_at, id);
 CREATE INDEX idx_ai_diagnoses_image_id ON ai_diagnoses(image_id);
 CREATE INDEX idx_ai_diagnoses_reviewed_by ON ai_diagnoses(reviewed_by);
 CREATE INDEX idx_ai_diagnoses_review_status ON ai_diagnoses(review_status);
 CREATE INDEX idx_ai_diagnoses_deleted_at ON ai_diagnoses(deleted_at) WHERE deleted_at IS NULL;
+CREATE INDEX idx_ai_diagnoses_created_at_id ON ai_diagnoses(created_at, id);
 CREATE INDEX idx_diagnosis_records_examination_id ON diagnosis_records(examination_id);
 CREATE INDEX idx_diagnosis_records_doctor_id ON diagnosis_records(doctor_id);
 CREATE INDEX idx_diagnosis_records_deleted_at ON diagnosis_records(deleted_at) WHERE deleted_at IS NULL;
@@ -617,7 +653,9 @@ CREATE INDEX idx_role_permissions_role_id ON role_permissions(role_id);
 CREATE INDEX idx_role_permissions_permission_id ON role_permissions(permission_id);
 CREATE INDEX idx_role_permissions_deleted_at ON role_permissions(deleted_at) WHERE deleted_at IS NULL;
 CREATE INDEX idx_system_logs_user_id ON system_logs(user_id);
-CREATE INDEX idx_system_logs_created_at ON system_logs(created_at);
+-- 按 (created_at, id) 倒序游标分页，同时覆盖按 created_at 的范围筛选
+CREATE INDEX idx_system_logs_created_at_id ON system_logs(created_at, id);
+CREATE INDEX idx_jobs_status_run_at ON jobs(status, run_at) WHERE status IN ('pending', 'running');
 
 -- 创建部分唯一索引：仅在 deleted_at IS NULL 时生效
 CREATE UNIQUE INDEX idx_user_roles_unique_active
@@ -481,6 +481,10 @@ def ensure_database_exists() -> None:
 
 def create_tables(engine: Engine) -> None:
     SQLModel.metadata.create_all(engine)
+    # create_all 不会为已存在的表补建索引（如后续新增的游标分页组合索引），逐个检查创建
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
     print("已根据模型创建/更新所有数据表")
 
 
@@ -3,6 +3,8 @@ API接口模块
 """
 from fastapi import APIRouter
 
+from utils.bulkhead import bulkheads
+
 # 创建主路由器
 api_router = APIRouter()
 
@@ -22,20 +24,25 @@ from .system_log import router as system_log_router
 from .config_management import router as config_management_router
 from .ai_diagnosis import router as ai_diagnosis_router
 from .diagnosis_record import router as diagnosis_record_router
+from .derivative import router as derivative_router
+from .metrics import router as metrics_router
 
-# 注册所有子路由器
-api_router.include_router(auth_router, prefix="/auth", tags=["认证管理"])
-api_router.include_router(user_router, prefix="/users", tags=["用户管理"])
-api_router.include_router(patient_router, prefix="/patients", tags=["患者管理"])
-api_router.include_router(examination_router, prefix="/examinations", tags=["检查管理"])
-api_router.include_router(registration_router, prefix="/registrations", tags=["挂号管理"])
-api_router.include_router(fundus_image_router, prefix="/fundus-images", tags=["眼底图像管理"])
-api_router.include_router(fundus_image_save_router, prefix="/images", tags=["图像保存"])
-api_router.include_router(role_router, prefix="/roles", tags=["角色管理"])
-api_router.include_router(permission_router, prefix="/permissions", tags=["权限管理"])
-api_router.include_router(user_role_router, prefix="/user-roles", tags=["用户角色关联"])
-api_router.include_router(role_permission_router, prefix="/role-permissions", tags=["角色权限关联"])
-api_router.include_router(system_log_router, prefix="/system-logs", tags=["系统日志"])
-api_router.include_router(config_management_router, prefix="/config", tags=["配置管理"])
-api_router.include_router(ai_diagnosis_router, prefix="/ai-diagnoses", tags=["AI诊断管理"])
-api_router.include_router(diagnosis_record_router, prefix="/diagnosis-records", tags=["诊断记录管理"])
\ No newline at end of file
+# 注册所有子路由器（按子系统放入各自的舱壁：auth 登录认证、crud 基础数据、imaging 影像、ai AI诊断；
+# 运行监控接口不受舱壁限制，舱壁占满时仍可查询）
+api_router.include_router(bulkheads.isolate(auth_router, "auth"), prefix="/auth", tags=["认证管理"])
+api_router.include_router(bulkheads.isolate(user_router, "crud"), prefix="/users", tags=["用户管理"])
+api_router.include_router(bulkheads.isolate(patient_router, "crud"), prefix="/patients", tags=["患者管理"])
+api_router.include_router(bulkheads.isolate(examination_router, "crud"), prefix="/examinations", tags=["检查管理"])
+api_router.include_router(bulkheads.isolate(registration_router, "crud"), prefix="/registrations", tags=["挂号管理"])
+api_router.include_router(bulkheads.isolate(fundus_image_router, "imaging"), prefix="/fundus-images", tags=["眼底图像管理"])
+api_router.include_router(bulkheads.isolate(fundus_image_save_router, "imaging"), prefix="/images", tags=["图像保存"])
+api_router.include_router(bulkheads.isolate(role_router, "crud"), prefix="/roles", tags=["角色管理"])
+api_router.include_router(bulkheads.isolate(permission_router, "crud"), prefix="/permissions", tags=["权限管理"])
+api_router.include_router(bulkheads.isolate(user_role_router, "crud"), prefix="/user-roles", tags=["用户角色关联"])
+api_router.include_router(bulkheads.isolate(role_permission_router, "crud"), prefix="/role-permissions", tags=["角色权限关联"])
+api_router.include_router(bulkheads.isolate(system_log_router, "crud"), prefix="/system-logs", tags=["系统日志"])
+api_router.include_router(bulkheads.isolate(config_management_router, "crud"), prefix="/config", tags=["配置管理"])
+api_router.include_router(bulkheads.isolate(ai_diagnosis_router, "ai"), prefix="/ai-diagnoses", tags=["AI诊断管理"])
+api_router.include_router(bulkheads.isolate(diagnosis_record_router, "crud"), prefix="/diagnosis-records", tags=["诊断记录管理"])
+api_router.include_router(bulkheads.isolate(derivative_router, "imaging"), prefix="/derivatives", tags=["派生图像"])
+api_router.include_router(metrics_router, prefix="/metrics", tags=["运行监控"])
\ No newline at end of file
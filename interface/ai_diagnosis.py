@@ -6,21 +6,35 @@ AI诊断信息管理API
 - 更新AI诊断信息
 - 删除AI诊断（单个删除、批量删除，软删除）
 """
-from ai.ai_detect_img import ai_detect
+from ai.detect_service import (ACTIVE_STATUSES, RESULT_FIELDS, detect_images, detect_jobs,
+                               remember_result)
+from ai.model_registry import model_registry
+from ai.result_cache import detection_cache
+from ai.inference_pool import POOL_MODE_PROCESS, inference_pool, worker_model_stats
+from ai.batch_scheduler import worker_scheduler_stats
 import pathlib
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field as PydanticField
 
 from models.ai_diagnosis import AIDiagnosis
-from database import get_db
+from models.fundus_image import FundusImage
+from database import get_db, get_async_db
+from config import config
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
-from utils.imags import compress_to_dataurl
+from utils.file_serving import image_file_response
+from utils.tile_pyramid import tile_pyramid
+from utils.query_fields import FIELDS_DESCRIPTION, FieldSet
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, CURSOR_DESCRIPTION, paginate_async
+from utils.bulkhead import bulkhead_exempt
 router = APIRouter()
 
 
@@ -37,6 +51,9 @@ class ImageInfo(BaseModel):
 class DetectImg(BaseModel):
     """诊断图片"""
     images: List[ImageInfo]
+    mode: str = PydanticField(default='single', pattern='^(single|tiled)$',
+                              description="检测模式：single(整图缩放后单次检测)/tiled(原始分辨率重叠分块检测，适合微小病灶)")
+    tile_size: Optional[int] = PydanticField(None, ge=320, le=4096, description="分块边长（像素），仅 tiled 模式有效，缺省使用配置")
 
     class Config:
         json_schema_extra = {
@@ -63,7 +80,7 @@ class AIDiagnosisCreate(BaseModel):
                                           max_length=500, description="诊断文件路径")
     detect_file_name: str = PydanticField(..., min_length=1,
                                           max_length=500, description="诊断文件名")
-    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图数据")
+    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图访问URL")
     labers: dict = PydanticField(..., description="框选标签")
     diagnosis_result: Optional[dict] = PydanticField(None, description="诊断结果（JSON）")
     confidence_score: Optional[Decimal] = PydanticField(
@@ -127,7 +144,7 @@ class AIDiagnosisUpdate(BaseModel):
                                           max_length=500, description="诊断文件路径")
     detect_file_name: str = PydanticField(..., min_length=1,
                                           max_length=500, description="诊断文件名")
-    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图数据")
+    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图访问URL")
     diagnosis_result: Optional[dict] = PydanticField(
         None, description="诊断结果（JSON）")
     confidence_score: Optional[Decimal] = PydanticField(
@@ -195,6 +212,18 @@ class AIDiagnosisResponse(BaseModel):
         from_attributes = True
 
 
+# 列表接口字段集：诊断结果与标注（JSONB）、评估/建议/审核意见等长文本默认不返回
+AI_DIAGNOSIS_FIELDS = FieldSet(AIDiagnosis, AIDiagnosisResponse, heavy=(
+    "diagnosis_result", "diagnostic_markers", "risk_assessment", "recommended_actions",
+    "error_message", "review_comments"))
+
+
+class ProfilingRequest(BaseModel):
+    """ONNX Runtime性能分析请求模型"""
+    model: str = PydanticField(default='detect', pattern='^(detect)$', description="模型名称")
+    runs: int = PydanticField(default=5, ge=1, le=100, description="开启性能分析的推理次数")
+
+
 class AIDiagnosisDeleteRequest(BaseModel):
     """AI诊断批量删除请求模型"""
     ids: List[int] = PydanticField(..., min_length=1, description="要删除的诊断ID列表")
@@ -211,52 +240,194 @@ class AIDiagnosisDeleteRequest(BaseModel):
 @router.post("/detect", response_model=ResponseModel, summary="AI诊断", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_CREATE'))])
 async def AI_detect(
     detect_img: DetectImg,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     detect_img_li = detect_img.model_dump()['images']
-    log.debug(f"detect_img_li={detect_img_li}")
-    detect_res = ai_detect(detect_img_li)
-    if detect_res is None:
+    tile_size = (detect_img.tile_size or config.config.tiling.tile_size) if detect_img.mode == 'tiled' else None
+    outcome = await detect_images(detect_img_li, detect_img.mode, tile_size)
+    if outcome is None:
         log.info(f"图片AI诊断失败")
         return error_response(
             msg="图片AI诊断失败"
         )
-    return_res = []
-    for idx, img_info in enumerate(detect_res["imgs"]):
-        file_path = str(pathlib.Path(img_info['detected']['file_path']).joinpath(
-            img_info['detected']["file_name"]))
-        thumbnail_data = compress_to_dataurl(file_path, 512, 50)
-        # 创建新诊断记录
-        create_info = {
-            "image_id": img_info["image_id"],
-            "detect_file_path": str(img_info['detected']['file_path']),
-            "detect_file_name": img_info['detected']["file_name"],
-            "thumbnail_data": thumbnail_data,
-            "diagnostic_markers": {
-                "labels": img_info['detected']["labels"]
-            }
-        }
+
+    # 新检测的结果一次性插入并提交：任一条失败时全部回滚，重试不会产生重复记录
+    rows = {
+        idx: AIDiagnosis(**{k: v for k, v in outcome["results"][idx].items() if k != "is_primary"})
+        for idx in outcome["fresh"]
+    }
+    if rows:
         try:
-            db_diagnosis = AIDiagnosis(**create_info)
-            session.add(db_diagnosis)
-            session.commit()
-            session.refresh(db_diagnosis)
+            session.add_all(rows.values())
+            # flush 批量插入并取回主键（INSERT ... RETURNING），无需逐行 refresh
+            await session.flush()
+            ids = {idx: row.id for idx, row in rows.items()}
+            await session.commit()
         except Exception as e:
-            session.rollback()
+            await session.rollback()
+            log.error(f"图片AI诊断数据创建失败: {str(e)}")
             return error_response(
                 msg="图片AI诊断数据创建失败"
             )
-        create_info["id"] = db_diagnosis.id
-        create_info["is_primary"] = img_info['detected']["is_primary"]
-        return_res.append(create_info)
+        # 提交成功后才写入检测结果缓存
+        for idx, diagnosis_id in ids.items():
+            outcome["results"][idx]["id"] = diagnosis_id
+            remember_result(outcome, idx)
+    return_res = list(outcome["results"].values())
     # 排序。主图在前
     return_res.sort(key=lambda x: x["is_primary"], reverse=True)
     return success_response(
-        data={"detect_img_li": return_res},
+        data={"detect_img_li": return_res, "tiling": outcome["tiling"]},
         msg="图片AI诊断成功"
     )
 
 
+@router.post("/detect/submit", response_model=ResponseModel, summary="提交异步AI诊断任务", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_CREATE'))])
+async def submit_detect_job(
+    detect_img: DetectImg,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    提交异步AI诊断：立即为每张图片创建 pending 状态的诊断记录并返回记录ID，
+    检测在后台执行，通过 GET /ai-diagnoses/jobs 查询进度与结果
+    """
+    detect_img_li = detect_img.model_dump()['images']
+    tile_size = (detect_img.tile_size or config.config.tiling.tile_size) if detect_img.mode == 'tiled' else None
+    try:
+        jobs = await detect_jobs.submit(session, detect_img_li, detect_img.mode, tile_size)
+    except Exception as e:
+        await session.rollback()
+        log.error(f"提交AI诊断任务失败: {str(e)}")
+        return error_response(msg="提交AI诊断任务失败")
+    return success_response(data={"jobs": jobs}, msg="AI诊断任务已提交")
+
+
+@router.get("/jobs", response_model=ResponseModel, summary="查询异步AI诊断任务状态", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_VIEW'))])
+@bulkhead_exempt
+async def get_detect_jobs(
+    ids: str = Query(..., description="诊断记录ID，逗号分隔"),
+    wait: int = Query(0, ge=0, le=60, description="长轮询：任务未结束时最多等待的秒数"),
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    查询异步AI诊断任务状态：pending/processing/completed/failed/timeout，
+    wait > 0 时阻塞至全部任务结束或等待超时后再返回（长轮询），减少客户端轮询次数；
+    等待期间不占用线程与事件循环，不受 ai 舱壁并发数限制
+    """
+    try:
+        diagnosis_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        return error_response(msg="诊断记录ID格式错误")
+    if not diagnosis_ids:
+        return error_response(msg="诊断记录ID不能为空")
+    await detect_jobs.wait(diagnosis_ids, wait)
+
+    rows = (await session.execute(select(AIDiagnosis, FundusImage.is_primary).join(
+        FundusImage, FundusImage.id == AIDiagnosis.image_id
+    ).where(
+        AIDiagnosis.id.in_(diagnosis_ids),
+        AIDiagnosis.deleted_at.is_(None)
+    ))).all()
+    jobs = []
+    for diagnosis, is_primary in rows:
+        job = {
+            "id": diagnosis.id,
+            "image_id": diagnosis.image_id,
+            "processing_status": diagnosis.processing_status,
+            "processing_time_ms": diagnosis.processing_time_ms,
+            "error_message": diagnosis.error_message
+        }
+        if diagnosis.processing_status == 'completed':
+            job.update({name: getattr(diagnosis, name) for name in RESULT_FIELDS})
+            job["is_primary"] = bool(is_primary)
+        jobs.append(job)
+    # 排序。主图在前
+    jobs.sort(key=lambda x: bool(x.get("is_primary")), reverse=True)
+    return success_response(
+        data={
+            "jobs": jobs,
+            "finished": all(job["processing_status"] not in ACTIVE_STATUSES for job in jobs)
+        },
+        msg="查询AI诊断任务状态成功"
+    )
+
+
+@router.get("/cache/stats", response_model=ResponseModel, summary="查询检测结果缓存统计", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def get_cache_stats():
+    """
+    查询检测结果缓存的条目数、占用容量、命中率与淘汰次数
+    """
+    return success_response(data=detection_cache.stats())
+
+
+@router.get("/models", response_model=ResponseModel, summary="查询AI模型加载状态", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def get_model_status():
+    """
+    查询已加载AI模型的加载耗时、预热耗时与内存增量（统计来自执行该查询的推理工作进程）
+    """
+    stats = await inference_pool.run(worker_model_stats)
+    return success_response(data={"pool_mode": inference_pool.mode, **stats})
+
+
+@router.get("/scheduler/stats", response_model=ResponseModel, summary="查询检测合批调度统计", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def get_scheduler_stats():
+    """
+    查询检测模型合批调度器的队列深度、批次大小分布、跨请求合批次数（merged_batches）与合批引入的等待时间
+
+    process 模式下为推理进程中共用的调度器；thread 模式下为主进程中共用的调度器
+    """
+    if inference_pool.mode == POOL_MODE_PROCESS:
+        stats = await inference_pool.run(worker_scheduler_stats)
+    else:
+        stats = worker_scheduler_stats()
+    return success_response(data={"pool_mode": inference_pool.mode, **stats})
+
+
+@router.post("/profiling", response_model=ResponseModel, summary="开启ONNX Runtime性能分析", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def start_profiling(request: ProfilingRequest):
+    """
+    为接下来的 N 次推理开启ONNX Runtime内置性能分析，每次推理生成一个 trace JSON
+    """
+    model_registry.request_profiling(request.model, request.runs)
+    return success_response(
+        data={"pending_runs": model_registry.pending_profile_runs()},
+        msg="性能分析已开启"
+    )
+
+
+@router.get("/profiling", response_model=ResponseModel, summary="查询ONNX Runtime性能分析结果", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def list_profiling_traces():
+    """
+    查询剩余待分析的推理次数与已保存的 trace 文件列表（按时间倒序）
+    """
+    profiling_dir = pathlib.Path(config.config.inference.profiling_dir)
+    traces = []
+    if profiling_dir.exists():
+        for trace in profiling_dir.glob("*.json"):
+            stat = trace.stat()
+            traces.append({
+                "file_name": trace.name,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            })
+    traces.sort(key=lambda x: x["created_at"], reverse=True)
+    return success_response(data={
+        "pending_runs": model_registry.pending_profile_runs(),
+        "traces": traces
+    })
+
+
+@router.get("/profiling/{file_name}", summary="下载ONNX Runtime性能分析 trace", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def download_profiling_trace(file_name: str):
+    """
+    下载 trace JSON（可在 chrome://tracing 或 Perfetto 中查看）
+    """
+    trace = pathlib.Path(config.config.inference.profiling_dir).joinpath(file_name)
+    if pathlib.Path(file_name).name != file_name or trace.suffix != ".json" or not trace.exists():
+        return error_response(msg="trace 文件不存在", code=404)
+    return FileResponse(str(trace), media_type="application/json", filename=file_name)
+
+
 @router.post("/", response_model=ResponseModel, summary="创建AI诊断记录", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_CREATE'))])
 async def create_ai_diagnosis(
     diagnosis: AIDiagnosisCreate,
@@ -302,7 +473,10 @@ async def get_ai_diagnoses(
     severity_level: Optional[str] = Query(None, description="按严重程度筛选"),
     reviewed_by: Optional[int] = Query(None, description="按审核人ID筛选"),
     include_deleted: bool = Query(False, description="是否包含已删除记录"),
-    session: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     分页查询AI诊断列表
@@ -314,91 +488,58 @@ async def get_ai_diagnoses(
     - 审核状态
     - 严重程度
     - 审核人ID
-    """
-    try:
-        # 构建基础查询 - 用于计算总数
-        count_query = session.query(AIDiagnosis)
-
-        # 应用筛选条件
-        if not include_deleted:
-            count_query = count_query.filter(AIDiagnosis.deleted_at.is_(None))
-
-        if image_id:
-            count_query = count_query.filter(AIDiagnosis.image_id == image_id)
-
-        if ai_model_name:
-            count_query = count_query.filter(
-                AIDiagnosis.ai_model_name == ai_model_name)
-
-        if processing_status:
-            count_query = count_query.filter(
-                AIDiagnosis.processing_status == processing_status)
 
-        if review_status:
-            count_query = count_query.filter(
-                AIDiagnosis.review_status == review_status)
-
-        if severity_level:
-            count_query = count_query.filter(
-                AIDiagnosis.severity_level == severity_level)
+    **fields** 指定返回字段，诊断结果、标注与长文本字段需显式指定
 
-        if reviewed_by:
-            count_query = count_query.filter(
-                AIDiagnosis.reviewed_by == reviewed_by)
-
-        # 计算总数
-        total = count_query.count()
-
-        # 重新构建查询用于分页数据获取
-        data_query = session.query(AIDiagnosis)
+    **cursor** 传入上一页返回的 next_cursor 按 (created_at, id) 游标翻页
+    """
+    try:
+        names = AI_DIAGNOSIS_FIELDS.resolve(fields)
 
-        # 应用相同的筛选条件
+        # 筛选条件
+        conditions = []
         if not include_deleted:
-            data_query = data_query.filter(AIDiagnosis.deleted_at.is_(None))
+            conditions.append(AIDiagnosis.deleted_at.is_(None))
 
         if image_id:
-            data_query = data_query.filter(AIDiagnosis.image_id == image_id)
+            conditions.append(AIDiagnosis.image_id == image_id)
 
         if ai_model_name:
-            data_query = data_query.filter(
-                AIDiagnosis.ai_model_name == ai_model_name)
+            conditions.append(AIDiagnosis.ai_model_name == ai_model_name)
 
         if processing_status:
-            data_query = data_query.filter(
-                AIDiagnosis.processing_status == processing_status)
+            conditions.append(AIDiagnosis.processing_status == processing_status)
 
         if review_status:
-            data_query = data_query.filter(
-                AIDiagnosis.review_status == review_status)
+            conditions.append(AIDiagnosis.review_status == review_status)
 
         if severity_level:
-            data_query = data_query.filter(
-                AIDiagnosis.severity_level == severity_level)
+            conditions.append(AIDiagnosis.severity_level == severity_level)
 
         if reviewed_by:
-            data_query = data_query.filter(
-                AIDiagnosis.reviewed_by == reviewed_by)
-
-        # 分页
-        offset = (page - 1) * page_size
-        diagnoses = data_query.order_by(AIDiagnosis.created_at.desc())\
-            .offset(offset)\
-            .limit(page_size)\
-            .all()
+            conditions.append(AIDiagnosis.reviewed_by == reviewed_by)
+
+        # 分页数据（只查询要返回的列），按 (created_at, id) 倒序，支持游标翻页
+        result = await paginate_async(
+            session,
+            select(*AI_DIAGNOSIS_FIELDS.select(names)).where(*conditions),
+            page, page_size, count,
+            keyset=(AIDiagnosis.created_at, AIDiagnosis.id), cursor=cursor
+        )
+        diagnoses = result.items
 
-        # 转换为响应模型
-        diagnosis_list = [AIDiagnosisResponse.model_validate(
-            diag).model_dump() for diag in diagnoses]
+        # 转换为响应字典
+        diagnosis_list = [AI_DIAGNOSIS_FIELDS.to_dict(diag, names) for diag in diagnoses]
 
-        log.info(f"查询AI诊断列表成功: 页码={page}, 每页={page_size}, 总数={total}")
+        log.info(f"查询AI诊断列表成功: 页码={page}, 每页={page_size}, 总数={result.total}")
         return success_response(data={
             "items": diagnosis_list,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            **result.meta
         })
 
+    except ValueError as e:
+        log.warning(f"查询AI诊断列表参数错误: {str(e)}")
+        return error_response(msg=str(e), code=400)
     except Exception as e:
         log.error(f"查询AI诊断列表失败: {str(e)}")
         return error_response(msg=f"查询AI诊断列表失败: {str(e)}", code=500)
@@ -407,7 +548,7 @@ async def get_ai_diagnoses(
 @router.get("/{diagnosis_id}", response_model=ResponseModel, summary="查询单个AI诊断", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_VIEW'))])
 async def get_ai_diagnosis(
     diagnosis_id: int,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     根据ID查询单个AI诊断记录
@@ -415,10 +556,10 @@ async def get_ai_diagnosis(
     - **diagnosis_id**: 诊断ID
     """
     try:
-        diagnosis = session.query(AIDiagnosis).filter(
+        diagnosis = await session.scalar(select(AIDiagnosis).where(
             AIDiagnosis.id == diagnosis_id,
             AIDiagnosis.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not diagnosis:
             log.warning(f"AI诊断不存在: ID={diagnosis_id}")
@@ -434,10 +575,107 @@ async def get_ai_diagnosis(
         return error_response(msg=f"查询AI诊断失败: {str(e)}", code=500)
 
 
+async def _overlay_file_path(session: AsyncSession, diagnosis_id: int) -> Optional[str]:
+    """查询AI诊断叠加图文件路径，记录不存在时返回 None"""
+    diagnosis = (await session.execute(select(AIDiagnosis.detect_file_path, AIDiagnosis.detect_file_name).where(
+        AIDiagnosis.id == diagnosis_id,
+        AIDiagnosis.deleted_at.is_(None)
+    ))).first()
+    if not diagnosis:
+        return None
+    return str(pathlib.Path(diagnosis.detect_file_path).joinpath(diagnosis.detect_file_name))
+
+
+@router.get("/{diagnosis_id}/file", summary="获取AI诊断叠加图文件", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_VIEW'))])
+async def get_ai_diagnosis_file(
+    diagnosis_id: int,
+    flip: bool = Query(False, description="是否按 image_view 配置翻转图像"),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    输出AI诊断的检测叠加图文件
+
+    - **diagnosis_id**: 诊断ID
+    - **flip**: 是否按 image_view.flipx/flipy 配置翻转（翻转结果会被缓存）
+
+    支持 Range 分段请求与 If-None-Match 条件请求（304）
+    """
+    source = await _overlay_file_path(session, diagnosis_id)
+    if source is None:
+        log.warning(f"AI诊断不存在: ID={diagnosis_id}")
+        return error_response(msg="AI诊断不存在", code=404)
+
+    try:
+        return await image_file_response(source, if_none_match, flip)
+    except FileNotFoundError:
+        log.warning(f"AI诊断叠加图文件不存在: ID={diagnosis_id}")
+        return error_response(msg="AI诊断叠加图文件不存在", code=404)
+    except Exception as e:
+        log.error(f"获取AI诊断叠加图文件失败: {str(e)}")
+        return error_response(msg=f"获取AI诊断叠加图文件失败: {str(e)}", code=500)
+
+
+@router.get("/{diagnosis_id}/tiles.dzi", summary="获取AI诊断叠加图DZI描述文件", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_VIEW'))])
+async def get_ai_diagnosis_dzi(
+    diagnosis_id: int,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取AI诊断叠加图的深度缩放（DZI）描述文件
+
+    瓦片地址为同级的 tiles_files/{level}/{col}_{row}.jpg
+    """
+    source = await _overlay_file_path(session, diagnosis_id)
+    if source is None:
+        log.warning(f"AI诊断不存在: ID={diagnosis_id}")
+        return error_response(msg="AI诊断不存在", code=404)
+    try:
+        return Response(content=await tile_pyramid.get_descriptor(source), media_type="application/xml")
+    except FileNotFoundError:
+        log.warning(f"AI诊断叠加图文件不存在: ID={diagnosis_id}")
+        return error_response(msg="AI诊断叠加图文件不存在", code=404)
+    except Exception as e:
+        log.error(f"获取AI诊断叠加图DZI描述文件失败: {str(e)}")
+        return error_response(msg=f"获取AI诊断叠加图DZI描述文件失败: {str(e)}", code=500)
+
+
+@router.get("/{diagnosis_id}/tiles_files/{level}/{col}_{row}.jpg", summary="获取AI诊断叠加图瓦片", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_VIEW'))])
+async def get_ai_diagnosis_tile(
+    diagnosis_id: int,
+    level: int,
+    col: int,
+    row: int,
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取AI诊断叠加图的深度缩放瓦片，所在层级尚未生成时按需生成并缓存
+
+    - **level**: DZI 层级
+    - **col** / **row**: 瓦片列号 / 行号
+    """
+    source = await _overlay_file_path(session, diagnosis_id)
+    if source is None:
+        log.warning(f"AI诊断不存在: ID={diagnosis_id}")
+        return error_response(msg="AI诊断不存在", code=404)
+    try:
+        tile = await tile_pyramid.get_tile(source, level, col, row)
+        return await image_file_response(str(tile), if_none_match)
+    except FileNotFoundError:
+        log.warning(f"AI诊断叠加图文件不存在: ID={diagnosis_id}")
+        return error_response(msg="AI诊断叠加图文件不存在", code=404)
+    except ValueError as e:
+        return error_response(msg=str(e), code=404)
+    except Exception as e:
+        log.error(f"获取AI诊断叠加图瓦片失败: {str(e)}")
+        return error_response(msg=f"获取AI诊断叠加图瓦片失败: {str(e)}", code=500)
+
+
 @router.get("/by-image/{image_id}", response_model=ResponseModel, summary="根据图像ID查询AI诊断", dependencies=[Depends(get_current_user_info), Depends(require_permission('DIAGNOSIS_VIEW'))])
 async def get_ai_diagnoses_by_image(
     image_id: int,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     根据图像ID查询该图像的所有AI诊断记录
@@ -445,8 +683,8 @@ async def get_ai_diagnoses_by_image(
     - **image_id**: 图像ID
     """
     try:
-        diagnosis = session.query(AIDiagnosis).filter(
-            AIDiagnosis.image_id == image_id, AIDiagnosis.deleted_at.is_(None)).first()
+        diagnosis = (await session.scalars(select(AIDiagnosis).where(
+            AIDiagnosis.image_id == image_id, AIDiagnosis.deleted_at.is_(None)).limit(1))).first()
 
         if not diagnosis:
             log.warning(f"image_id:{image_id} AI诊断不存在")
@@ -0,0 +1,49 @@
+"""
+派生图像（缩略图）访问API
+文件名为内容的 SHA-256，内容不可变，响应可被浏览器长期缓存；
+规范格式为 JPEG，客户端 Accept 头包含 image/webp 且存在 WebP 变体时返回 WebP（响应带 Vary: Accept）；
+缩略图属于患者影像：URL 用于 <img src>，浏览器不会携带 Bearer 令牌，因此以接口响应中签出的有时限签名
+（expires、signature 查询参数，HMAC）代替令牌认证；只允许浏览器私有缓存，不允许代理/CDN 缓存
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import FileResponse, Response
+
+from loguru_logging import log
+from utils.derivative_store import derivative_store
+from utils.file_serving import etag_matches
+from utils.response import error_response
+from utils.thumbnail import negotiate_format
+
+router = APIRouter()
+
+# 内容寻址的文件永不改变，缓存一年并标记 immutable，浏览器刷新时也无需重新验证；
+# private 禁止共享缓存（代理、CDN）保存患者影像
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+@router.get("/{name}", summary="获取派生图像（缩略图）")
+async def get_derivative(name: str,
+                         expires: Optional[int] = Query(None, description="签名过期时间（Unix 时间戳）"),
+                         signature: Optional[str] = Query(None, description="访问签名"),
+                         if_none_match: Optional[str] = Header(None),
+                         accept: Optional[str] = Header(None)):
+    """
+    获取派生图像
+
+    文件名本身即内容哈希，内容不变时 URL 不变，浏览器可长期缓存；返回格式按本次请求的 Accept 头选择；
+    使用接口响应中返回的完整URL（带签名）访问
+    """
+    if not derivative_store.verify_signature(name, expires, signature):
+        log.warning(f"派生图像访问签名无效或已过期: {name}")
+        return error_response(code=403, msg="访问链接无效或已过期")
+    resolved = derivative_store.resolve(name, negotiate_format(accept))
+    if resolved is None:
+        log.warning(f"派生图像不存在: {name}")
+        return error_response(code=404, msg="文件不存在")
+    path, etag, media_type = resolved
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type=media_type, headers=headers)
@@ -9,6 +9,7 @@
 from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field as PydanticField
 
@@ -19,6 +20,8 @@ from database import get_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.query_fields import FIELDS_DESCRIPTION, FieldSet, load_by_ids
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, paginate
 
 router = APIRouter()
 
@@ -136,6 +139,14 @@ class DiagnosisRecordResponse(BaseModel):
         from_attributes = True
 
 
+# 列表接口字段集：诊断描述、依据、鉴别诊断、治疗方案、预后等长文本默认不返回；关联信息需要对应的外键列
+DIAGNOSIS_RECORD_FIELDS = FieldSet(
+    DiagnosisRecord, DiagnosisRecordResponse,
+    heavy=("diagnosis_description", "supporting_evidence", "differential_diagnoses",
+           "treatment_plan", "prognosis"),
+    relations={"doctor": "doctor_id", "examination": "examination_id"})
+
+
 class DiagnosisRecordDeleteRequest(BaseModel):
     """诊断记录批量删除请求模型"""
     diagnosis_record_ids: List[int] = PydanticField(..., min_length=1, description="要删除的诊断记录ID列表")
@@ -217,6 +228,8 @@ async def get_diagnosis_records(
     start_date: Optional[datetime] = Query(None, description="开始日期时间"),
     end_date: Optional[datetime] = Query(None, description="结束日期时间"),
     include_deleted: bool = Query(False, description="是否包含已删除记录"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
     session: Session = Depends(get_db)
 ):
     """
@@ -233,128 +246,92 @@ async def get_diagnosis_records(
     - 置信度
     - 是否激活
     - 日期时间范围
+
+    **fields** 指定返回字段，诊断描述、治疗方案等长文本字段需显式指定
     """
     try:
-        # 构建基础查询 - 用于计算总数
-        count_query = session.query(DiagnosisRecord)
-        
-        # 应用筛选条件
-        if not include_deleted:
-            count_query = count_query.filter(DiagnosisRecord.deleted_at.is_(None))
-        
-        if examination_id:
-            count_query = count_query.filter(DiagnosisRecord.examination_id == examination_id)
-        
-        if doctor_id:
-            count_query = count_query.filter(DiagnosisRecord.doctor_id == doctor_id)
-        
-        if diagnosis_type:
-            count_query = count_query.filter(DiagnosisRecord.diagnosis_type == diagnosis_type)
-        
-        if diagnosis_name:
-            count_query = count_query.filter(DiagnosisRecord.diagnosis_name.ilike(f"%{diagnosis_name}%"))
-        
-        if icd_code:
-            count_query = count_query.filter(DiagnosisRecord.icd_code == icd_code)
-        
-        if severity:
-            count_query = count_query.filter(DiagnosisRecord.severity == severity)
-        
-        if laterality:
-            count_query = count_query.filter(DiagnosisRecord.laterality == laterality)
-        
-        if confidence_level:
-            count_query = count_query.filter(DiagnosisRecord.confidence_level == confidence_level)
-        
-        if is_active is not None:
-            count_query = count_query.filter(DiagnosisRecord.is_active == is_active)
-        
-        if start_date:
-            count_query = count_query.filter(DiagnosisRecord.diagnosis_date >= start_date)
-        
-        if end_date:
-            count_query = count_query.filter(DiagnosisRecord.diagnosis_date <= end_date)
-        
-        # 计算总数
-        total = count_query.count()
-        
-        # 重新构建查询用于分页数据获取
-        data_query = session.query(DiagnosisRecord)
+        names = DIAGNOSIS_RECORD_FIELDS.resolve(fields)
+
+        # 筛选条件
+        conditions = []
         
-        # 应用相同的筛选条件
         if not include_deleted:
-            data_query = data_query.filter(DiagnosisRecord.deleted_at.is_(None))
+            conditions.append(DiagnosisRecord.deleted_at.is_(None))
         
         if examination_id:
-            data_query = data_query.filter(DiagnosisRecord.examination_id == examination_id)
+            conditions.append(DiagnosisRecord.examination_id == examination_id)
         
         if doctor_id:
-            data_query = data_query.filter(DiagnosisRecord.doctor_id == doctor_id)
+            conditions.append(DiagnosisRecord.doctor_id == doctor_id)
         
         if diagnosis_type:
-            data_query = data_query.filter(DiagnosisRecord.diagnosis_type == diagnosis_type)
+            conditions.append(DiagnosisRecord.diagnosis_type == diagnosis_type)
         
         if diagnosis_name:
-            data_query = data_query.filter(DiagnosisRecord.diagnosis_name.ilike(f"%{diagnosis_name}%"))
+            conditions.append(DiagnosisRecord.diagnosis_name.ilike(f"%{diagnosis_name}%"))
         
         if icd_code:
-            data_query = data_query.filter(DiagnosisRecord.icd_code == icd_code)
+            conditions.append(DiagnosisRecord.icd_code == icd_code)
         
         if severity:
-            data_query = data_query.filter(DiagnosisRecord.severity == severity)
+            conditions.append(DiagnosisRecord.severity == severity)
         
         if laterality:
-            data_query = data_query.filter(DiagnosisRecord.laterality == laterality)
+            conditions.append(DiagnosisRecord.laterality == laterality)
         
         if confidence_level:
-            data_query = data_query.filter(DiagnosisRecord.confidence_level == confidence_level)
+            conditions.append(DiagnosisRecord.confidence_level == confidence_level)
         
         if is_active is not None:
-            data_query = data_query.filter(DiagnosisRecord.is_active == is_active)
+            conditions.append(DiagnosisRecord.is_active == is_active)
         
         if start_date:
-            data_query = data_query.filter(DiagnosisRecord.diagnosis_date >= start_date)
+            conditions.append(DiagnosisRecord.diagnosis_date >= start_date)
         
         if end_date:
-            data_query = data_query.filter(DiagnosisRecord.diagnosis_date <= end_date)
-        
-        # 分页
-        offset = (page - 1) * page_size
-        diagnosis_records = data_query.order_by(
-            DiagnosisRecord.diagnosis_date.desc(), 
-            DiagnosisRecord.id.desc()
-        ).offset(offset).limit(page_size).all()
+            conditions.append(DiagnosisRecord.diagnosis_date <= end_date)
+
+        # 获取分页数据，总数由窗口计数一并返回
+        result = paginate(
+            session,
+            select(*DIAGNOSIS_RECORD_FIELDS.select(names)).where(*conditions)
+            .order_by(DiagnosisRecord.diagnosis_date.desc(), DiagnosisRecord.id.desc()),
+            page, page_size, count
+        )
+        diagnosis_records = result.items
+
+        # 关联的医生与检查按表批量查询
+        doctors = load_by_ids(session, User, DIAGNOSIS_RECORD_FIELDS.related_ids(
+            diagnosis_records, names, "doctor"))
+        examinations = load_by_ids(session, Examination, DIAGNOSIS_RECORD_FIELDS.related_ids(
+            diagnosis_records, names, "examination"))
         
         # 转换为响应模型，并添加关联信息
         diagnosis_list = []
         for record in diagnosis_records:
-            record_dict = DiagnosisRecordResponse.model_validate(record).model_dump()
+            record_dict = DIAGNOSIS_RECORD_FIELDS.to_dict(record, names)
+            for relation in DIAGNOSIS_RECORD_FIELDS.relations:
+                if relation in names:
+                    record_dict[relation] = None
             
-            # 查询关联的医生
-            if record.doctor_id:
-                doctor = session.query(User).filter(User.id == record.doctor_id).first()
-                if doctor:
-                    record_dict['doctor'] = UserInfo.model_validate(doctor).model_dump()
+            if "doctor" in names and record.doctor_id in doctors:
+                record_dict['doctor'] = UserInfo.model_validate(doctors[record.doctor_id]).model_dump()
             
-            # 查询关联的检查
-            if record.examination_id:
-                examination = session.query(Examination).filter(
-                    Examination.id == record.examination_id
-                ).first()
-                if examination:
-                    record_dict['examination'] = ExaminationInfo.model_validate(examination).model_dump()
+            if "examination" in names and record.examination_id in examinations:
+                record_dict['examination'] = ExaminationInfo.model_validate(
+                    examinations[record.examination_id]).model_dump()
             
             diagnosis_list.append(record_dict)
         
-        log.info(f"查询诊断记录列表成功: 页码={page}, 每页={page_size}, 总数={total}")
+        log.info(f"查询诊断记录列表成功: 页码={page}, 每页={page_size}, 总数={result.total}")
         return success_response(data={
             "items": diagnosis_list,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            **result.meta
         })
     
+    except ValueError as e:
+        log.warning(f"查询诊断记录列表参数错误: {str(e)}")
+        return error_response(msg=str(e), code=400)
     except Exception as e:
         log.error(f"查询诊断记录列表失败: {str(e)}")
         return error_response(msg=f"查询诊断记录列表失败: {str(e)}", code=500)
@@ -9,8 +9,9 @@
 from typing import Optional, List
 from datetime import datetime, date, time as time_type
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, text
+from sqlalchemy import or_, and_, text, select
 from pydantic import BaseModel, Field as PydanticField
 
 from models.examination import Examination
@@ -21,10 +22,12 @@ from models.user import User
 from models.fundus_image import FundusImage
 from models.diagnosis_record import DiagnosisRecord
 from interface.diagnosis_record import DiagnosisRecordResponse
-from database import get_db
+from database import get_db, get_async_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.query_fields import FIELDS_DESCRIPTION, FieldSet, load_by_ids_async
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, CURSOR_DESCRIPTION, paginate_async
 
 router = APIRouter()
 
@@ -259,6 +262,15 @@ class ExaminationResponse(BaseModel):
         from_attributes = True
 
 
+# 列表接口字段集：主诉、现病史、检查所见等长文本默认不返回；关联信息需要对应的外键列
+EXAMINATION_FIELDS = FieldSet(
+    Examination, ExaminationResponse,
+    heavy=("chief_complaint", "present_illness", "examination_findings",
+           "preliminary_diagnosis", "recommendations", "notes"),
+    relations={"examination_type": "examination_type_id", "doctor": "doctor_id",
+               "technician": "technician_id"})
+
+
 class ExaminationDeleteRequest(BaseModel):
     """检查批量删除请求模型"""
     examination_ids: List[int] = PydanticField(
@@ -348,7 +360,10 @@ async def get_examinations(
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
     include_deleted: bool = Query(False, description="是否包含已删除记录"),
-    session: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     分页查询检查记录列表
@@ -360,126 +375,86 @@ async def get_examinations(
     - 检查状态
     - 检查编号
     - 日期范围
-    """
-    try:
-        # 构建基础查询 - 用于计算总数
-        count_query = session.query(Examination)
-
-        # 应用筛选条件
-        if not include_deleted:
-            count_query = count_query.filter(Examination.deleted_at.is_(None))
-
-        if patient_id:
-            count_query = count_query.filter(
-                Examination.patient_id == patient_id)
 
-        if doctor_id:
-            count_query = count_query.filter(
-                Examination.doctor_id == doctor_id)
-
-        if examination_type_id:
-            count_query = count_query.filter(
-                Examination.examination_type_id == examination_type_id)
-
-        if status:
-            count_query = count_query.filter(Examination.status == status)
+    **fields** 指定返回字段，主诉、现病史等长文本字段需显式指定
 
-        if examination_number:
-            count_query = count_query.filter(
-                Examination.examination_number.ilike(f"%{examination_number}%"))
-
-        if start_date:
-            count_query = count_query.filter(
-                Examination.examination_date >= start_date)
-
-        if end_date:
-            count_query = count_query.filter(
-                Examination.examination_date <= end_date)
-
-        # 计算总数
-        total = count_query.count()
-
-        # 重新构建查询用于分页数据获取
-        data_query = session.query(Examination)
+    **cursor** 传入上一页返回的 next_cursor 按 (examination_date, id) 游标翻页
+    """
+    try:
+        names = EXAMINATION_FIELDS.resolve(fields)
 
-        # 应用相同的筛选条件
+        # 筛选条件
+        conditions = []
         if not include_deleted:
-            data_query = data_query.filter(Examination.deleted_at.is_(None))
+            conditions.append(Examination.deleted_at.is_(None))
 
         if patient_id:
-            data_query = data_query.filter(
-                Examination.patient_id == patient_id)
+            conditions.append(Examination.patient_id == patient_id)
 
         if doctor_id:
-            data_query = data_query.filter(Examination.doctor_id == doctor_id)
+            conditions.append(Examination.doctor_id == doctor_id)
 
         if examination_type_id:
-            data_query = data_query.filter(
-                Examination.examination_type_id == examination_type_id)
+            conditions.append(Examination.examination_type_id == examination_type_id)
 
         if status:
-            data_query = data_query.filter(Examination.status == status)
+            conditions.append(Examination.status == status)
 
         if examination_number:
-            data_query = data_query.filter(
-                Examination.examination_number.ilike(f"%{examination_number}%"))
+            conditions.append(Examination.examination_number.ilike(f"%{examination_number}%"))
 
         if start_date:
-            data_query = data_query.filter(
-                Examination.examination_date >= start_date)
+            conditions.append(Examination.examination_date >= start_date)
 
         if end_date:
-            data_query = data_query.filter(
-                Examination.examination_date <= end_date)
+            conditions.append(Examination.examination_date <= end_date)
+
+        # 分页数据（只查询要返回的列），按 (examination_date, id) 倒序，支持游标翻页
+        result = await paginate_async(
+            session,
+            select(*EXAMINATION_FIELDS.select(names)).where(*conditions),
+            page, page_size, count,
+            keyset=(Examination.examination_date, Examination.id), cursor=cursor
+        )
+        examinations = result.items
 
-        # 分页
-        offset = (page - 1) * page_size
-        examinations = data_query.order_by(Examination.examination_date.desc(), Examination.id.desc())\
-            .offset(offset)\
-            .limit(page_size)\
-            .all()
+        # 关联的检查类型、医生与技师按表批量查询（医生与技师共用一次用户查询）
+        exam_types = await load_by_ids_async(session, ExaminationType, EXAMINATION_FIELDS.related_ids(
+            examinations, names, "examination_type"))
+        users = await load_by_ids_async(session, User, EXAMINATION_FIELDS.related_ids(
+            examinations, names, "doctor", "technician"))
 
         # 转换为响应模型，并添加关联信息
         examination_list = []
         for exam in examinations:
-            exam_dict = ExaminationResponse.model_validate(exam).model_dump()
-
-            # 查询关联的检查类型
-            if exam.examination_type_id:
-                exam_type = session.query(ExaminationType).filter(
-                    ExaminationType.id == exam.examination_type_id
-                ).first()
-                if exam_type:
-                    exam_dict['examination_type'] = ExaminationTypeInfo.model_validate(
-                        exam_type).model_dump()
-
-            # 查询关联的医生
-            if exam.doctor_id:
-                doctor = session.query(User).filter(
-                    User.id == exam.doctor_id).first()
-                if doctor:
-                    exam_dict['doctor'] = UserInfo.model_validate(
-                        doctor).model_dump()
-
-            # 查询关联的技师
-            if exam.technician_id:
-                technician = session.query(User).filter(
-                    User.id == exam.technician_id).first()
-                if technician:
-                    exam_dict['technician'] = UserInfo.model_validate(
-                        technician).model_dump()
+            exam_dict = EXAMINATION_FIELDS.to_dict(exam, names)
+            for relation in EXAMINATION_FIELDS.relations:
+                if relation in names:
+                    exam_dict[relation] = None
+
+            if "examination_type" in names and exam.examination_type_id in exam_types:
+                exam_dict['examination_type'] = ExaminationTypeInfo.model_validate(
+                    exam_types[exam.examination_type_id]).model_dump()
+
+            if "doctor" in names and exam.doctor_id in users:
+                exam_dict['doctor'] = UserInfo.model_validate(
+                    users[exam.doctor_id]).model_dump()
+
+            if "technician" in names and exam.technician_id in users:
+                exam_dict['technician'] = UserInfo.model_validate(
+                    users[exam.technician_id]).model_dump()
 
             examination_list.append(exam_dict)
 
-        log.info(f"查询检查记录列表成功: 页码={page}, 每页={page_size}, 总数={total}")
+        log.info(f"查询检查记录列表成功: 页码={page}, 每页={page_size}, 总数={result.total}")
         return success_response(data={
             "items": examination_list,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            **result.meta
         })
 
+    except ValueError as e:
+        log.warning(f"查询检查记录列表参数错误: {str(e)}")
+        return error_response(msg=str(e), code=400)
     except Exception as e:
         log.error(f"查询检查记录列表失败: {str(e)}")
         return error_response(msg=f"查询检查记录列表失败: {str(e)}", code=500)
@@ -510,7 +485,7 @@ async def get_patient_today_examination(patient_id: int, session: Session = Depe
 @router.get("/{examination_id}", response_model=ResponseModel, summary="查询单个检查记录", dependencies=[Depends(get_current_user_info), Depends(require_permission('EXAMINATION_VIEW'))])
 async def get_examination(
     examination_id: int,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     根据ID查询单个检查记录
@@ -518,10 +493,10 @@ async def get_examination(
     - **examination_id**: 检查记录ID
     """
     try:
-        examination = session.query(Examination).filter(
+        examination = await session.scalar(select(Examination).where(
             Examination.id == examination_id,
             Examination.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not examination:
             log.warning(f"检查记录不存在: ID={examination_id}")
@@ -533,50 +508,43 @@ async def get_examination(
 
         # 查询关联的患者信息
         if examination.patient_id:
-            patient_info = session.query(Patient).filter(
+            patient_info = await session.scalar(select(Patient).where(
                 Patient.id == examination.patient_id
-            ).first()
+            ))
             if patient_info:
                 exam_dict['patient'] = PatientResponse.model_validate(patient_info).model_dump()
 
         # 查询关联的检查类型
         if examination.examination_type_id:
-            exam_type = session.query(ExaminationType).filter(
+            exam_type = await session.scalar(select(ExaminationType).where(
                 ExaminationType.id == examination.examination_type_id
-            ).first()
+            ))
             if exam_type:
                 exam_dict['examination_type'] = ExaminationTypeInfo.model_validate(
                     exam_type).model_dump()
 
-        # 查询关联的医生
-        if examination.doctor_id:
-            doctor = session.query(User).filter(
-                User.id == examination.doctor_id).first()
-            if doctor:
-                exam_dict['doctor'] = UserInfo.model_validate(
-                    doctor).model_dump()
-
-        # 查询关联的技师
-        if examination.technician_id:
-            technician = session.query(User).filter(
-                User.id == examination.technician_id).first()
-            if technician:
-                exam_dict['technician'] = UserInfo.model_validate(
-                    technician).model_dump()
+        # 查询关联的医生与技师（一次用户查询）
+        users = await load_by_ids_async(session, User, (examination.doctor_id, examination.technician_id))
+        if examination.doctor_id in users:
+            exam_dict['doctor'] = UserInfo.model_validate(
+                users[examination.doctor_id]).model_dump()
+        if examination.technician_id in users:
+            exam_dict['technician'] = UserInfo.model_validate(
+                users[examination.technician_id]).model_dump()
         # 查询关联的诊断记录
-        diagnosis_record_res = session.query(DiagnosisRecord).filter(
+        diagnosis_record_res = (await session.scalars(select(DiagnosisRecord).where(
             DiagnosisRecord.examination_id==examination_id,
             FundusImage.deleted_at.is_(None)
-        ).order_by(DiagnosisRecord.updated_at.desc()).all()
+        ).order_by(DiagnosisRecord.updated_at.desc()))).all()
         if diagnosis_record_res:
             exam_dict['diagnosis_records']=[ DiagnosisRecordResponse.model_validate(record).model_dump() for record in diagnosis_record_res]
             
             # [DiagnosisRecordResponse.model_validate(diagnosis_record_res).model_dump()]
         # 查询关联的眼底图像
-        fundus_images = session.query(FundusImage).filter(
+        fundus_images = (await session.scalars(select(FundusImage).where(
             FundusImage.examination_id == examination_id,
             FundusImage.deleted_at.is_(None)
-        ).order_by(FundusImage.is_primary.desc(), FundusImage.created_at.asc()).all()
+        ).order_by(FundusImage.is_primary.desc(), FundusImage.created_at.asc()))).all()
 
         if fundus_images:
             exam_dict['fundus_images'] = [
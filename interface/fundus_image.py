@@ -5,20 +5,29 @@
 - 查询眼底图像（单个查询、分页查询）
 - 更新眼底图像信息
 - 删除眼底图像（单个删除、批量删除，软删除）
+- 获取眼底图像文件（支持 Range、ETag 条件请求与按配置翻转）
+- 深度缩放（DZI）瓦片金字塔
 """
+import pathlib
 from typing import Optional, List
 from datetime import datetime
 from collections import defaultdict
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field as PydanticField
 from decimal import Decimal
 
 from models.fundus_image import FundusImage
-from database import get_db
+from database import get_db, get_async_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.file_serving import image_file_response
+from utils.tile_pyramid import tile_pyramid
+from utils.query_fields import FIELDS_DESCRIPTION, FieldSet
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, CURSOR_DESCRIPTION, paginate_async
 
 router = APIRouter()
 
@@ -53,7 +62,7 @@ class FundusImageCreate(BaseModel):
         None, max_length=100, description="采集设备")
     acquisition_parameters: Optional[dict] = PydanticField(
         None, description="采集参数（JSON）")
-    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图数据")
+    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图访问URL")
     is_primary: bool = PydanticField(default=False, description="是否主图")
     upload_status: str = PydanticField(
         default="uploaded", description="上传状态：uploading/uploaded/failed/processing")
@@ -107,7 +116,7 @@ class FundusImageUpdate(BaseModel):
         None, max_length=100, description="采集设备")
     acquisition_parameters: Optional[dict] = PydanticField(
         None, description="采集参数（JSON）")
-    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图数据")
+    thumbnail_data: Optional[str] = PydanticField(None, description="缩略图访问URL")
     is_primary: Optional[bool] = PydanticField(None, description="是否主图")
     upload_status: Optional[str] = PydanticField(
         None, description="上传状态：uploading/uploaded/failed/processing")
@@ -150,6 +159,10 @@ class FundusImageResponse(BaseModel):
         from_attributes = True
 
 
+# 列表接口字段集：采集参数（JSONB）默认不返回；缩略图已是派生图像URL，默认返回
+FUNDUS_IMAGE_FIELDS = FieldSet(FundusImage, FundusImageResponse, heavy=("acquisition_parameters",))
+
+
 class FundusImageDeleteRequest(BaseModel):
     """眼底图像批量删除请求模型"""
     ids: List[int] = PydanticField(..., min_length=1, description="要删除的图像ID列表")
@@ -201,7 +214,7 @@ async def create_fundus_image(
 @router.get("/by_examination_id/{examination_id}", response_model=ResponseModel, summary="查询指定检查的所有眼底图像（按image_number分组）", dependencies=[Depends(get_current_user_info), Depends(require_permission('IMAGE_VIEW'))])
 async def get_fundus_images_by_examination_id(
     examination_id: int,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     根据检查ID查询该检查下的所有眼底图像，按image_number分组
@@ -226,14 +239,14 @@ async def get_fundus_images_by_examination_id(
     try:
         # 查询该检查下的所有未删除的眼底图像
         # 按image_number和is_primary、创建时间排序
-        all_images = session.query(FundusImage).filter(
+        all_images = (await session.scalars(select(FundusImage).where(
             FundusImage.examination_id == examination_id,
             FundusImage.deleted_at.is_(None)
         ).order_by(
             FundusImage.created_at.desc(),    # 相同is_primary时，最新的在前
             FundusImage.image_number.desc(),
             FundusImage.is_primary.desc()  # is_primary=True的记录在前
-        ).all()
+        ))).all()
         
         if not all_images:
             log.warning(f"眼底图像不存在: examination ID={examination_id}")
@@ -276,7 +289,10 @@ async def get_fundus_images(
     upload_status: Optional[str] = Query(None, description="按上传状态筛选"),
     is_primary: Optional[bool] = Query(None, description="按是否主图筛选"),
     include_deleted: bool = Query(False, description="是否包含已删除记录"),
-    session: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     分页查询眼底图像列表
@@ -288,91 +304,58 @@ async def get_fundus_images(
     - 影像质量
     - 上传状态
     - 是否主图
-    """
-    try:
-        # 构建基础查询 - 用于计算总数
-        count_query = session.query(FundusImage)
-
-        # 应用筛选条件
-        if not include_deleted:
-            count_query = count_query.filter(FundusImage.deleted_at.is_(None))
-
-        if examination_id:
-            count_query = count_query.filter(
-                FundusImage.examination_id == examination_id)
-
-        if eye_side:
-            count_query = count_query.filter(FundusImage.eye_side == eye_side)
-
-        if capture_mode:
-            count_query = count_query.filter(
-                FundusImage.capture_mode == capture_mode)
-
-        if image_quality:
-            count_query = count_query.filter(
-                FundusImage.image_quality == image_quality)
-
-        if upload_status:
-            count_query = count_query.filter(
-                FundusImage.upload_status == upload_status)
-
-        if is_primary is not None:
-            count_query = count_query.filter(
-                FundusImage.is_primary == is_primary)
 
-        # 计算总数
-        total = count_query.count()
+    **fields** 指定返回字段，采集参数（acquisition_parameters）需显式指定
 
-        # 重新构建查询用于分页数据获取
-        data_query = session.query(FundusImage)
+    **cursor** 传入上一页返回的 next_cursor 按 (created_at, id) 游标翻页
+    """
+    try:
+        names = FUNDUS_IMAGE_FIELDS.resolve(fields)
 
-        # 应用相同的筛选条件
+        # 筛选条件
+        conditions = []
         if not include_deleted:
-            data_query = data_query.filter(FundusImage.deleted_at.is_(None))
+            conditions.append(FundusImage.deleted_at.is_(None))
 
         if examination_id:
-            data_query = data_query.filter(
-                FundusImage.examination_id == examination_id)
+            conditions.append(FundusImage.examination_id == examination_id)
 
         if eye_side:
-            data_query = data_query.filter(FundusImage.eye_side == eye_side)
+            conditions.append(FundusImage.eye_side == eye_side)
 
         if capture_mode:
-            data_query = data_query.filter(
-                FundusImage.capture_mode == capture_mode)
+            conditions.append(FundusImage.capture_mode == capture_mode)
 
         if image_quality:
-            data_query = data_query.filter(
-                FundusImage.image_quality == image_quality)
+            conditions.append(FundusImage.image_quality == image_quality)
 
         if upload_status:
-            data_query = data_query.filter(
-                FundusImage.upload_status == upload_status)
+            conditions.append(FundusImage.upload_status == upload_status)
 
         if is_primary is not None:
-            data_query = data_query.filter(
-                FundusImage.is_primary == is_primary)
-
-        # 分页
-        offset = (page - 1) * page_size
-        images = data_query.order_by(FundusImage.created_at.desc())\
-            .offset(offset)\
-            .limit(page_size)\
-            .all()
+            conditions.append(FundusImage.is_primary == is_primary)
+
+        # 分页数据（只查询要返回的列），按 (created_at, id) 倒序，支持游标翻页
+        result = await paginate_async(
+            session,
+            select(*FUNDUS_IMAGE_FIELDS.select(names)).where(*conditions),
+            page, page_size, count,
+            keyset=(FundusImage.created_at, FundusImage.id), cursor=cursor
+        )
+        images = result.items
 
-        # 转换为响应模型
-        image_list = [FundusImageResponse.model_validate(
-            img).model_dump() for img in images]
+        # 转换为响应字典
+        image_list = [FUNDUS_IMAGE_FIELDS.to_dict(img, names) for img in images]
 
-        log.info(f"查询眼底图像列表成功: 页码={page}, 每页={page_size}, 总数={total}")
+        log.info(f"查询眼底图像列表成功: 页码={page}, 每页={page_size}, 总数={result.total}")
         return success_response(data={
             "items": image_list,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            **result.meta
         })
 
+    except ValueError as e:
+        log.warning(f"查询眼底图像列表参数错误: {str(e)}")
+        return error_response(msg=str(e), code=400)
     except Exception as e:
         log.error(f"查询眼底图像列表失败: {str(e)}")
         return error_response(msg=f"查询眼底图像列表失败: {str(e)}", code=500)
@@ -381,7 +364,7 @@ async def get_fundus_images(
 @router.get("/{image_id}", response_model=ResponseModel, summary="查询单个眼底图像", dependencies=[Depends(get_current_user_info), Depends(require_permission('IMAGE_VIEW'))])
 async def get_fundus_image(
     image_id: int,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     根据ID查询单个眼底图像记录
@@ -389,10 +372,10 @@ async def get_fundus_image(
     - **image_id**: 图像ID
     """
     try:
-        image = session.query(FundusImage).filter(
+        image = await session.scalar(select(FundusImage).where(
             FundusImage.id == image_id,
             FundusImage.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not image:
             log.warning(f"眼底图像不存在: ID={image_id}")
@@ -408,10 +391,107 @@ async def get_fundus_image(
         return error_response(msg=f"查询眼底图像失败: {str(e)}", code=500)
 
 
+async def _image_file_path(session: AsyncSession, image_id: int) -> Optional[str]:
+    """查询眼底图像文件路径，记录不存在时返回 None"""
+    image = (await session.execute(select(FundusImage.file_path, FundusImage.file_name).where(
+        FundusImage.id == image_id,
+        FundusImage.deleted_at.is_(None)
+    ))).first()
+    if not image:
+        return None
+    return str(pathlib.Path(image.file_path).joinpath(image.file_name))
+
+
+@router.get("/{image_id}/file", summary="获取眼底图像文件", dependencies=[Depends(get_current_user_info), Depends(require_permission('IMAGE_VIEW'))])
+async def get_fundus_image_file(
+    image_id: int,
+    flip: bool = Query(False, description="是否按 image_view 配置翻转图像"),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    输出眼底图像原图文件
+
+    - **image_id**: 图像ID
+    - **flip**: 是否按 image_view.flipx/flipy 配置翻转（翻转结果会被缓存）
+
+    支持 Range 分段请求与 If-None-Match 条件请求（304）
+    """
+    source = await _image_file_path(session, image_id)
+    if source is None:
+        log.warning(f"眼底图像不存在: ID={image_id}")
+        return error_response(msg="眼底图像不存在", code=404)
+
+    try:
+        return await image_file_response(source, if_none_match, flip)
+    except FileNotFoundError:
+        log.warning(f"眼底图像文件不存在: ID={image_id}")
+        return error_response(msg="眼底图像文件不存在", code=404)
+    except Exception as e:
+        log.error(f"获取眼底图像文件失败: {str(e)}")
+        return error_response(msg=f"获取眼底图像文件失败: {str(e)}", code=500)
+
+
+@router.get("/{image_id}/tiles.dzi", summary="获取眼底图像DZI描述文件", dependencies=[Depends(get_current_user_info), Depends(require_permission('IMAGE_VIEW'))])
+async def get_fundus_image_dzi(
+    image_id: int,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取眼底图像的深度缩放（DZI）描述文件
+
+    瓦片地址为同级的 tiles_files/{level}/{col}_{row}.jpg
+    """
+    source = await _image_file_path(session, image_id)
+    if source is None:
+        log.warning(f"眼底图像不存在: ID={image_id}")
+        return error_response(msg="眼底图像不存在", code=404)
+    try:
+        return Response(content=await tile_pyramid.get_descriptor(source), media_type="application/xml")
+    except FileNotFoundError:
+        log.warning(f"眼底图像文件不存在: ID={image_id}")
+        return error_response(msg="眼底图像文件不存在", code=404)
+    except Exception as e:
+        log.error(f"获取眼底图像DZI描述文件失败: {str(e)}")
+        return error_response(msg=f"获取眼底图像DZI描述文件失败: {str(e)}", code=500)
+
+
+@router.get("/{image_id}/tiles_files/{level}/{col}_{row}.jpg", summary="获取眼底图像瓦片", dependencies=[Depends(get_current_user_info), Depends(require_permission('IMAGE_VIEW'))])
+async def get_fundus_image_tile(
+    image_id: int,
+    level: int,
+    col: int,
+    row: int,
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取眼底图像的深度缩放瓦片，所在层级尚未生成时按需生成并缓存
+
+    - **level**: DZI 层级
+    - **col** / **row**: 瓦片列号 / 行号
+    """
+    source = await _image_file_path(session, image_id)
+    if source is None:
+        log.warning(f"眼底图像不存在: ID={image_id}")
+        return error_response(msg="眼底图像不存在", code=404)
+    try:
+        tile = await tile_pyramid.get_tile(source, level, col, row)
+        return await image_file_response(str(tile), if_none_match)
+    except FileNotFoundError:
+        log.warning(f"眼底图像文件不存在: ID={image_id}")
+        return error_response(msg="眼底图像文件不存在", code=404)
+    except ValueError as e:
+        return error_response(msg=str(e), code=404)
+    except Exception as e:
+        log.error(f"获取眼底图像瓦片失败: {str(e)}")
+        return error_response(msg=f"获取眼底图像瓦片失败: {str(e)}", code=500)
+
+
 @router.get("/by-number/{image_number}", response_model=ResponseModel, summary="根据影像编号查询", dependencies=[Depends(get_current_user_info), Depends(require_permission('IMAGE_VIEW'))])
 async def get_fundus_image_by_number(
     image_number: str,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     根据影像编号查询眼底图像
@@ -419,10 +499,10 @@ async def get_fundus_image_by_number(
     - **image_number**: 影像编号
     """
     try:
-        image = session.query(FundusImage).filter(
+        image = (await session.scalars(select(FundusImage).where(
             FundusImage.image_number == image_number,
             FundusImage.deleted_at.is_(None)
-        ).first()
+        ).limit(1))).first()
 
         if not image:
             log.warning(f"眼底图像不存在: 影像编号={image_number}")
@@ -3,27 +3,34 @@
 从Go项目迁移的图像保存功能，适配ViewImages.vue页面
 """
 import os
-import base64
+import asyncio
+import time
 from datetime import datetime
 import pathlib
 from typing import List, Optional
 from pathlib import Path
-from PIL import Image
-from io import BytesIO
 
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field as PydanticField
 
 from models.fundus_image import FundusImage
-from database import get_db, db
+from database import get_db
 from utils.response import success_response, error_response, ResponseModel
 from utils.jwt_auth import get_current_user_id
 from loguru_logging import log
+from ai.inference_pool import inference_pool
+from ai.preprocess import StageTimer
+from utils.ingest import channel_of, ingest_files
+from utils.tile_pyramid import tile_pyramid
+from utils.thumbnail import store_thumbnail_from_file
+from jobs.handlers import JOB_COLORIZATION
+from jobs.queue import enqueue
 
 # 导入 AI 处理函数，但允许导入失败
 try:
-    from ai.ai_process import process_colorization
+    from ai.ai_process import colorize_capture
 except ImportError as e:
     log.warning(f"AI 模块导入失败: {e}")
 
@@ -85,7 +92,7 @@ class ImageInfo(BaseModel):
     """图片信息响应模型"""
     id: int = PydanticField(..., description="图片ID")
     image_path: str = PydanticField(..., description="图片路径")
-    thumbnail_data: str = PydanticField(..., description="缩略图base64数据")
+    thumbnail_data: str = PydanticField(..., description="缩略图访问URL")
 
 
 class ColorModeResponse(BaseModel):
@@ -97,36 +104,22 @@ class ColorModeResponse(BaseModel):
 
 # ==================== 工具函数 ====================
 
-def img_path_to_base64(img_path: str, quality: int = 40) -> str:
+def make_thumbnail(img_path: str) -> str:
     """
-    将图片路径转换为base64编码（压缩后）
+    生成图片的缩略图并保存到派生图像存储（JPEG，开启 WebP 时另存 WebP 变体）
 
     Args:
         img_path: 图片文件路径
-        quality: JPEG压缩质量（1-100）
 
     Returns:
-        str: base64编码的图片数据
+        str: 缩略图访问URL
     """
     try:
-        # 打开图片
-        with Image.open(img_path) as img:
-            # 转换为RGB模式（如果是RGBA或其他模式）
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            # 压缩图片
-            buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=quality, optimize=True)
-            buffer.seek(0)
-
-            # 转换为base64
-            thumbnail_data = f"data:image/jpeg;base64,{base64.b64encode(buffer.read()).decode('utf-8')}"
-            return thumbnail_data
+        return store_thumbnail_from_file(img_path)
 
     except Exception as e:
-        log.error(f"转换图片为Base64失败: {img_path}, 错误: {str(e)}")
-        raise ValueError(f"转换图片为Base64失败: {str(e)}")
+        log.error(f"生成缩略图失败: {img_path}, 错误: {str(e)}")
+        raise ValueError(f"生成缩略图失败: {str(e)}")
 
 
 def generate_image_number(examination_id: int) -> str:
@@ -156,133 +149,129 @@ def generate_color_filename() -> str:
     return f"{timestamp}_color.jpg"
 
 
-def insert_fundus_image(
-    session: Session,
+def fundus_image_values(
     examination_id: int,
     image_number: str,
     eye_side: str,
     capture_mode: str,
     file_dir: str,
     image_name: str,
-    file_size: int,
+    file_size: Optional[int],
     file_format: str,
-    thumbnail_data: str,
+    thumbnail_data: Optional[str],
     user_id: Optional[int],
     image_type: Optional[str] = None,
     acquisition_device: Optional[str] = None,
-    is_primary: bool = False
-) -> int:
+    is_primary: bool = False,
+    upload_status: str = "uploaded"
+) -> dict:
+    """
+    构建眼底图像记录的插入字段（各记录字段一致，才能合并为一条批量 INSERT）
     """
-    插入眼底图像记录到数据库
+    return {
+        "examination_id": examination_id,
+        "image_number": image_number,
+        "eye_side": eye_side,
+        "capture_mode": capture_mode,
+        "image_type": image_type,
+        "file_path": file_dir,
+        "file_name": image_name,
+        "file_size": file_size,
+        "file_format": file_format,
+        "acquisition_device": acquisition_device,
+        "upload_status": upload_status,
+        "thumbnail_data": thumbnail_data,
+        "is_primary": is_primary,
+        "created_by": user_id
+    }
+
+
+def insert_fundus_images(session: Session, rows: List[dict]) -> List[int]:
+    """
+    以一条 INSERT ... RETURNING 批量插入眼底图像记录（不提交，由调用方在同一事务中提交）
 
     Returns:
-        int: 插入的记录ID
+        List[int]: 插入的记录ID，顺序与 rows 一致
     """
-    try:
-        fundus_image = FundusImage(
-            examination_id=examination_id,
-            image_number=image_number,
-            eye_side=eye_side,
-            capture_mode=capture_mode,
-            image_type=image_type,
-            file_path=file_dir,
-            file_name=image_name,
-            file_size=file_size,
-            file_format=file_format,
-            acquisition_device=acquisition_device,
-            upload_status="uploaded",
-            thumbnail_data=thumbnail_data,
-            is_primary=is_primary,
-            created_by=user_id
-        )
+    stmt = insert(FundusImage).returning(FundusImage.id, sort_by_parameter_order=True)
+    return list(session.execute(stmt, rows).scalars().all())
+
+
+def warm_up_tiles(rows: List[dict]):
+    """后台预生成已入库图像的查看器瓦片金字塔低分辨率层级（合成中的占位记录由任务完成后生成）"""
+    for row in rows:
+        if row["upload_status"] == "uploaded":
+            tile_pyramid.schedule_warm_up(str(pathlib.Path(row["file_path"]).joinpath(row["file_name"])))
 
-        session.add(fundus_image)
-        session.commit()
-        session.refresh(fundus_image)
 
-        log.info(f"插入眼底图像记录成功: ID={fundus_image.id}, 编号={image_number}")
-        return fundus_image.id
+def save_fundus_images(session: Session, rows: List[dict]) -> List[int]:
+    """
+    在同一事务中批量插入眼底图像记录并提交
 
+    Returns:
+        List[int]: 插入的记录ID，顺序与 rows 一致
+    """
+    try:
+        ids = insert_fundus_images(session, rows)
+        session.commit()
     except Exception as e:
         session.rollback()
         log.error(f"插入眼底图像记录失败: {str(e)}")
         raise
+    log.info(f"插入眼底图像记录成功: ID={ids}, 编号={rows[0]['image_number'] if rows else None}")
+    warm_up_tiles(rows)
+    return ids
 
 
-def process_colorization_background(
+def colorization_values(
     ir_img: str,
-    green_img: str,
     examination_id: int,
     image_number: str,
     eye_side: str,
     capture_mode: str,
     file_format: str,
-    user_id: int,
+    user_id: Optional[int],
     image_type: Optional[str] = None,
     acquisition_device: Optional[str] = None
+) -> dict:
+    """
+    构建彩色图像占位记录（upload_status=processing）的插入字段，
+    由任务工作进程完成合成后回填文件大小与缩略图
+    """
+    color_img_path = pathlib.Path(ir_img).parent.joinpath(generate_color_filename())
+    return fundus_image_values(
+        examination_id=examination_id,
+        image_number=image_number,
+        eye_side=eye_side,
+        capture_mode=capture_mode,
+        file_dir=str(color_img_path.parent),
+        image_name=color_img_path.name,
+        file_size=None,
+        file_format=file_format,
+        thumbnail_data=None,
+        user_id=user_id,
+        image_type=image_type,
+        acquisition_device=acquisition_device,
+        is_primary=True,
+        upload_status="processing"
+    )
+
+
+def enqueue_colorization(
+    session: Session,
+    color_image_id: int,
+    ir_img: str,
+    green_img: str
 ):
     """
-    后台任务：处理彩色图像合成并保存到数据库
+    提交彩色合成任务（不提交事务，与彩色图像占位记录在同一事务中提交）
     """
-    try:
-        # 检查AI处理函数是否可用
-        try:
-            from ai.ai_process import process_colorization
-        except ImportError:
-            log.error("后台任务失败：AI模块未导入，无法处理彩色图像合成")
-            return
-
-        log.info(f"后台任务开始：AI合成彩色图像 ir={ir_img}, green={green_img}")
-
-        # 生成彩色图像文件名和路径
-        color_img_name = generate_color_filename()
-        file_dir = pathlib.Path(ir_img).parent
-        color_img_path = file_dir.joinpath(color_img_name)
-
-        # 调用本地AI处理函数（只需要IR和Green通道）
-        save_path = process_colorization(
-            ir_path=ir_img,
-            green_path=green_img,
-            save_path=str(color_img_path)
-        )
-
-        if not save_path:
-            log.error("AI合成失败：process_colorization 返回 None")
-            return
-
-        log.info(f"AI合成成功: {save_path}")
-
-        # 获取彩色图像文件大小
-        color_file_size = color_img_path.stat().st_size
-
-        # 转换彩色图像为Base64
-        color_thumbnail_data = img_path_to_base64(str(color_img_path))
-
-        # 创建新的数据库session用于后台任务
-        with db.session() as session:
-            # 保存彩色图像到数据库
-            color_inserted_id = insert_fundus_image(
-                session=session,
-                examination_id=examination_id,
-                image_number=image_number,
-                eye_side=eye_side,
-                capture_mode=capture_mode,
-                file_dir=str(color_img_path.parent),
-                image_name=color_img_path.name,
-                file_size=color_file_size,
-                file_format=file_format,
-                thumbnail_data=color_thumbnail_data,
-                user_id=user_id,
-                image_type=image_type,
-                acquisition_device=acquisition_device,
-                is_primary=True
-            )
-
-            log.info(f"后台任务完成：彩色图像保存成功 ID={color_inserted_id}")
-
-    except Exception as e:
-        log.error(f"后台任务失败：AI合成彩色图像时出错: {str(e)}")
-        log.exception(e)
+    job = enqueue(session, JOB_COLORIZATION, {
+        "image_id": color_image_id,
+        "ir_img": ir_img,
+        "green_img": green_img
+    })
+    log.info(f"彩色图像合成任务已提交: job={job.id}, 彩色图像ID={color_image_id}")
 
 
 # ==================== API 端点 ====================
@@ -322,13 +311,13 @@ async def save_image_to_local(
         file_size = full_path.stat().st_size
         log.info(f"图片文件大小: {file_size} bytes")
 
-        # 转换为Base64（压缩）
-        thumbnail_data = img_path_to_base64(str(full_path))
-        log.info(f"缩略图Base64长度: {len(thumbnail_data)}")
+        # 生成缩略图（解码、缩放、编码与写入在线程中执行，避免阻塞事件循环）
+        thumbnail_data = await asyncio.get_running_loop().run_in_executor(
+            None, make_thumbnail, str(full_path))
+        log.info(f"缩略图: {thumbnail_data}")
 
         # 插入数据库
-        inserted_id = insert_fundus_image(
-            session=session,
+        inserted_id = save_fundus_images(session, [fundus_image_values(
             examination_id=request.examination_id,
             image_number=image_number,
             eye_side=request.eye_side,
@@ -342,7 +331,7 @@ async def save_image_to_local(
             image_type=request.image_type,
             acquisition_device=request.acquisition_device,
             is_primary=True
-        )
+        )])[0]
 
         log.info(f"图片保存成功: ID={inserted_id}")
 
@@ -370,7 +359,6 @@ async def save_image_to_local(
 @router.post("/save-multi-image", response_model=ResponseModel, summary="保存多张图片（彩色模式）")
 async def save_multi_image_to_local(
     request: SaveMultiImageRequest,
-    background_tasks: BackgroundTasks,
     session: Session = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
@@ -385,9 +373,9 @@ async def save_multi_image_to_local(
     - **capture_mode**: 拍摄模式（gray/color）
 
     功能流程：
-    1. 保存所有原始图片到数据库
-    2. 调用AI合成API生成彩色图像
-    3. 保存合成的彩色图像到数据库
+    1. 并行处理各通道图片（缩略图）
+    2. 原始图片与彩色图像占位记录（upload_status=processing）批量插入，与AI合成任务在同一事务中提交
+    3. 任务工作进程合成彩色图像后回填记录（upload_status=uploaded，多次重试失败为 failed）
     """
     try:
         log.info(
@@ -403,83 +391,47 @@ async def save_multi_image_to_local(
             "images": []
         }
 
-        # 保存所有原始图片并识别各个通道
-        ir_img = None
-        green_img = None
-        red_img = None
-        blue_img = None
-
-        tmp_images_li = []
-
-        for img_name in request.image_name:
-            log.info(f"处理图片: {img_name}")
-
-            # 识别图片类型
-            if img_name.endswith("_G.jpg"):
-                green_img = img_name
-            elif img_name.endswith("_IR.jpg"):
-                ir_img = img_name
-            elif img_name.endswith("_R.jpg"):
-                red_img = img_name
-            elif img_name.endswith("_B.jpg"):
-                blue_img = img_name
-
-            # 构建完整文件路径
-            full_path = pathlib.Path(img_name)
-
-            # 检查文件是否存在
-            if not full_path.exists():
-                log.error(f"图片文件不存在: {full_path}")
-                return error_response(msg=f"图片文件不存在: {full_path}", code=404)
-
-            # 获取文件大小
-            file_size = full_path.stat().st_size
-            # 转换为Base64（压缩）
-            thumbnail_data = img_path_to_base64(str(full_path))
+        # 彩色合成在任务工作进程中执行，这里只按缩略图尺寸解码（在线程中执行，避免阻塞事件循环）
+        timer = StageTimer()
+        try:
+            ingested = await asyncio.get_running_loop().run_in_executor(
+                None, ingest_files, request.image_name, timer, ())
+        except FileNotFoundError as e:
+            log.error(str(e))
+            return error_response(msg=str(e), code=404)
+
+        # 识别各个通道
+        channels = {}
+        for img in ingested:
+            channel = channel_of(img.path.name)
+            if channel:
+                channels[channel] = str(img.path)
+        ir_img, green_img = channels.get("ir"), channels.get("green")
+        # 打印识别的通道
+        log.info(f"识别的通道: {channels}")
 
-            # 插入数据库
-            inserted_id = insert_fundus_image(
-                session=session,
+        rows = [
+            fundus_image_values(
                 examination_id=request.examination_id,
                 image_number=image_number,
                 eye_side=request.eye_side,
                 capture_mode=request.capture_mode,
-                file_dir=str(full_path.parent),
-                image_name=full_path.name,
-                file_size=file_size,
+                file_dir=str(img.path.parent),
+                image_name=img.path.name,
+                file_size=img.file_size,
                 file_format=request.file_format,
-                thumbnail_data=thumbnail_data,
+                thumbnail_data=img.thumbnail_data,
                 user_id=user_id,
                 image_type=request.image_type,
                 acquisition_device=request.acquisition_device
             )
-
-            # 添加到响应列表
-            tmp_images_li.append({
-                "id": inserted_id,
-                "image_path": full_path,
-                "thumbnail_data": thumbnail_data,
-                "eye_side": request.eye_side,
-                "image_number": image_number,
-                "is_primary": False
-            })
-
-            log.info(f"图片保存成功: ID={inserted_id}, 文件={img_name}")
-
-        # 打印识别的通道
-        log.info(
-            f"识别的通道: IR={ir_img}, Green={green_img}, Red={red_img}, Blue={blue_img}")
-
-        # 将原始图片添加到响应列表
-        color_mode_response["images"].extend(tmp_images_li)
-
-        # 如果有IR和Green通道，将AI合成任务添加到后台任务
+            for img in ingested
+        ]
+        # 如果有IR和Green通道，同时创建彩色图像占位记录并提交AI合成任务，由独立的工作进程执行
         if ir_img and green_img:
-            log.info("检测到IR和Green通道，将彩色图像合成任务添加到后台执行")
-            background_tasks.add_task(
-                process_colorization_background,
+            log.info("检测到IR和Green通道，提交彩色图像合成任务")
+            rows.append(colorization_values(
                 ir_img=ir_img,
-                green_img=green_img,
                 examination_id=request.examination_id,
                 image_number=image_number,
                 eye_side=request.eye_side,
@@ -488,12 +440,43 @@ async def save_multi_image_to_local(
                 user_id=user_id,
                 image_type=request.image_type,
                 acquisition_device=request.acquisition_device
-            )
+            ))
         else:
             log.warning("未找到IR或Green通道图片，跳过AI合成")
 
+        # 原始图片、彩色图像占位记录与合成任务以一条批量 INSERT 在同一事务中写入
+        start = time.perf_counter()
+        try:
+            inserted_ids = insert_fundus_images(session, rows)
+            if ir_img and green_img:
+                enqueue_colorization(session, inserted_ids[-1], ir_img, green_img)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        timer.add("db", start)
+        warm_up_tiles(rows)
+
+        for img, inserted_id in zip(ingested, inserted_ids):
+            color_mode_response["images"].append({
+                "id": inserted_id,
+                "image_path": img.path,
+                "thumbnail_data": img.thumbnail_data,
+                "eye_side": request.eye_side,
+                "image_number": image_number,
+                "is_primary": False
+            })
+            log.info(f"图片保存成功: ID={inserted_id}, 文件={img.path}")
+        if ir_img and green_img:
+            color_mode_response["color_image"] = {
+                "id": inserted_ids[-1],
+                "upload_status": "processing"
+            }
+
+        color_mode_response["timings"] = timer.as_dict()
         log.info(
-            f"多张图片保存完成，总计: {len(color_mode_response['images'])} 张（彩色图像合成在后台执行）")
+            f"多张图片保存完成，总计: {len(color_mode_response['images'])} 张（彩色图像合成在任务队列中执行），"
+            f"各阶段耗时(ms): {color_mode_response['timings']}")
 
         return success_response(
             data=color_mode_response,
@@ -517,46 +500,56 @@ async def hande_save_image(
     log.info(f"request={request}")
     # 生成影像编号
     image_number = generate_image_number(request.examination_id)
+    # 每个文件只读取解码一次：IR/Green 通道的解码结果同时用于缩略图与彩色合成，
+    # 其余图像只按缩略图尺寸解码（在线程中执行，避免阻塞事件循环）
+    timer = StageTimer()
+    if request.mode == "gray":
+        files, keep_pixels = request.file[:1], ()
+    else:
+        files, keep_pixels = request.file, ("ir", "green")
+    try:
+        ingested = await asyncio.get_running_loop().run_in_executor(
+            None, ingest_files, files, timer, keep_pixels)
+    except FileNotFoundError as e:
+        log.error(str(e))
+        return error_response(msg=str(e), code=404)
+    except ValueError as e:
+        log.error(f"参数错误: {str(e)}")
+        return error_response(msg=str(e), code=400)
+
     if request.mode == "gray":
         # 单摄
         try:
-            # 构建完整文件路径
-            full_path = pathlib.Path(request.file[0])
-            # 检查文件是否存在
-            if not full_path.exists():
-                log.error(f"图片文件不存在: {full_path}")
-                return error_response(msg=f"图片文件不存在: {full_path}", code=404)
-            # 获取文件大小
-            file_size = full_path.stat().st_size
-            log.info(f"图片文件大小: {file_size} bytes")
-            # 转换为Base64（压缩）
-            thumbnail_data = img_path_to_base64(str(full_path))
-            log.info(f"缩略图Base64长度: {len(thumbnail_data)}")
+            img = ingested[0]
+            log.info(f"图片文件大小: {img.file_size} bytes")
+            log.info(f"缩略图: {img.thumbnail_data}")
             # 插入数据库
-            inserted_id = insert_fundus_image(
-                session=session,
+            start = time.perf_counter()
+            inserted_id = save_fundus_images(session, [fundus_image_values(
                 examination_id=request.examination_id,
                 image_number=image_number,
                 eye_side=request.eye_side,
                 capture_mode=request.mode,
-                file_dir=str(full_path.parent),
-                image_name=full_path.name,
-                file_size=file_size,
+                file_dir=str(img.path.parent),
+                image_name=img.path.name,
+                file_size=img.file_size,
                 file_format=request.file_format,
-                thumbnail_data=thumbnail_data,
+                thumbnail_data=img.thumbnail_data,
                 user_id=None,
                 is_primary=True
-            )
+            )])[0]
+            timer.add("db", start)
 
-            log.info(f"图片保存成功: ID={inserted_id}")
+            log.info(f"图片保存成功: ID={inserted_id}, 各阶段耗时(ms): {timer.as_dict()}")
             return success_response(
                 data={
                     "id": inserted_id,
-                    "image_path": full_path,
-                    "thumbnailData": thumbnail_data,
+                    "image_path": img.path,
+                    "thumbnailData": img.thumbnail_data,
                     "image_number": image_number,
                     "eye_side": request.eye_side,
-                    "is_primary": True
+                    "is_primary": True,
+                    "timings": timer.as_dict()
                 },
                 msg="图像保存成功"
             )
@@ -578,134 +571,109 @@ async def hande_save_image(
                 "image_number": image_number,
                 "images": []
             }
-            # 保存所有原始图片并识别各个通道
-            ir_img = None
-            green_img = None
-            red_img = None
-            blue_img = None
-
-            tmp_images_li = []
-            for img_name in request.file:
-                log.info(f"处理图片: {img_name}")
-
-                # 识别图片类型
-                if img_name.endswith("_G.jpg"):
-                    green_img = img_name
-                elif img_name.endswith("_IR.jpg"):
-                    ir_img = img_name
-                elif img_name.endswith("_R.jpg"):
-                    red_img = img_name
-                elif img_name.endswith("_B.jpg"):
-                    blue_img = img_name
-
-                # 构建完整文件路径
-                full_path = pathlib.Path(img_name)
-                # 检查文件是否存在
-                if not full_path.exists():
-                    log.error(f"图片文件不存在: {full_path}")
-                    return error_response(msg=f"图片文件不存在: {full_path}", code=404)
-
-                # 获取文件大小
-                file_size = full_path.stat().st_size
-                # 转换为Base64（压缩）
-                thumbnail_data = img_path_to_base64(str(full_path))
-
-                # 插入数据库
-                inserted_id = insert_fundus_image(
-                    session=session,
+            # 识别各个通道
+            channels = {}
+            for img in ingested:
+                channel = channel_of(img.path.name)
+                if channel:
+                    channels[channel] = img
+            # 打印识别的通道
+            log.info(f"识别的通道: {list(channels)}")
+
+            rows = [
+                fundus_image_values(
                     examination_id=request.examination_id,
                     image_number=image_number,
                     eye_side=request.eye_side,
                     capture_mode=request.mode,
-                    file_dir=str(full_path.parent),
-                    image_name=full_path.name,
-                    file_size=file_size,
+                    file_dir=str(img.path.parent),
+                    image_name=img.path.name,
+                    file_size=img.file_size,
                     file_format=request.file_format,
-                    thumbnail_data=thumbnail_data,
+                    thumbnail_data=img.thumbnail_data,
                     user_id=None
                 )
+                for img in ingested
+            ]
 
-                # 添加到响应列表
-                tmp_images_li.append({
-                    "id": inserted_id,
-                    "image_path": full_path,
-                    "thumbnail_data": thumbnail_data,
-                    "image_number": image_number,
-                    "eye_side": request.eye_side,
-                    "is_primary": False
-                })
-
-                log.info(f"图片保存成功: ID={inserted_id}, 文件={img_name}")
-            # 打印识别的通道
-            log.info(
-                f"识别的通道: IR={ir_img}, Green={green_img}, Red={red_img}, Blue={blue_img}")
             # 调用AI合成彩色图像
+            colorized = None
+            model_unavailable = False
+            ir_img, green_img = channels.get("ir"), channels.get("green")
             if ir_img and green_img:
                 log.info("开始调用AI合成彩色图像...")
 
                 # 生成彩色图像文件名和路径
                 color_img_name = generate_color_filename()
-                file_dir = pathlib.Path(ir_img).parent
-                color_img_path = file_dir.joinpath(color_img_name)
+                color_img_path = ir_img.path.parent.joinpath(color_img_name)
 
                 # 调用本地AI合成模块
                 try:
                     log.info(
-                        f"开始AI合成彩色图像: ir={ir_img}, green={green_img}, save={color_img_path}")
-
-                    # 调用本地AI处理函数（只需要IR和Green通道）
-                    save_path = process_colorization(
-                        ir_path=ir_img,
-                        green_path=green_img,
-                        save_path=str(color_img_path)
-                    )
-                    if save_path:
-                        log.info(f"AI合成成功: {save_path}")
+                        f"开始AI合成彩色图像: ir={ir_img.path}, green={green_img.path}, save={color_img_path}")
+
+                    # 在推理工作池中合成（只需要IR和Green通道），直接使用入库时已解码的通道像素，避免阻塞事件循环
+                    colorized = await inference_pool.run(
+                        colorize_capture, ir_img.gray, green_img.gray, str(color_img_path))
+                    if colorized:
+                        log.info(f"AI合成成功: {colorized['save_path']}")
+                        for stage, ms in colorized["timings"].items():
+                            timer.timings[f"color_{stage}"] += ms
+                        rows.append(fundus_image_values(
+                            examination_id=request.examination_id,
+                            image_number=image_number,
+                            eye_side=request.eye_side,
+                            capture_mode=request.mode,
+                            file_dir=str(color_img_path.parent),
+                            image_name=color_img_path.name,
+                            file_size=colorized["file_size"],
+                            file_format=request.file_format,
+                            thumbnail_data=colorized["thumbnail_data"],
+                            user_id=None,
+                            is_primary=True
+                        ))
                     else:
-                        return error_response(msg="AI 模块处理错误！", code=400)
-                    # 获取彩色图像文件大小
-                    color_file_size = color_img_path.stat().st_size
-
-                    # 转换彩色图像为Base64
-                    color_thumbnail_data = img_path_to_base64(
-                        str(color_img_path))
-
-                    # 保存彩色图像到数据库
-                    color_inserted_id = insert_fundus_image(
-                        session=session,
-                        examination_id=request.examination_id,
-                        image_number=image_number,
-                        eye_side=request.eye_side,
-                        capture_mode=request.mode,
-                        file_dir=str(color_img_path.parent),
-                        image_name=color_img_path.name,
-                        file_size=color_file_size,
-                        file_format=request.file_format,
-                        thumbnail_data=color_thumbnail_data,
-                        user_id=None,
-                        is_primary=True
-                    )
-
-                    # 添加彩色图像到响应列表
-                    color_mode_response["images"].append({
-                        "id": color_inserted_id,
-                        "image_path": save_path,
-                        "thumbnail_data": color_thumbnail_data,
-                        "image_number": image_number,
-                        "eye_side": request.eye_side,
-                        "is_primary": True
-                    })
-                    color_mode_response["images"].extend(tmp_images_li)
-                    log.info(f"彩色图像保存成功: ID={color_inserted_id}")
+                        model_unavailable = True
 
                 except Exception as e:
                     log.error(f"AI合成失败: {str(e)}")
                     # AI合成失败不影响原始图片的保存，继续返回成功
-                    log.warning("AI合成失败，但原始图片已保存")
+                    log.warning("AI合成失败，但原始图片仍会保存")
             else:
                 log.warning("未找到完整的四个通道图片，跳过AI合成")
 
-            log.info(f"多张图片保存完成，总计: {len(color_mode_response['images'])} 张")
+            # 原始图片与彩色图像以一条批量 INSERT 在同一事务中写入
+            start = time.perf_counter()
+            inserted_ids = save_fundus_images(session, rows)
+            timer.add("db", start)
+
+            if colorized:
+                # 添加彩色图像到响应列表
+                color_mode_response["images"].append({
+                    "id": inserted_ids[-1],
+                    "image_path": colorized["save_path"],
+                    "thumbnail_data": colorized["thumbnail_data"],
+                    "image_number": image_number,
+                    "eye_side": request.eye_side,
+                    "is_primary": True
+                })
+                log.info(f"彩色图像保存成功: ID={inserted_ids[-1]}")
+            for img, inserted_id in zip(ingested, inserted_ids):
+                color_mode_response["images"].append({
+                    "id": inserted_id,
+                    "image_path": img.path,
+                    "thumbnail_data": img.thumbnail_data,
+                    "image_number": image_number,
+                    "eye_side": request.eye_side,
+                    "is_primary": False
+                })
+                log.info(f"图片保存成功: ID={inserted_id}, 文件={img.path}")
+            if model_unavailable:
+                return error_response(msg="AI 模块处理错误！", code=400)
+
+            color_mode_response["timings"] = timer.as_dict()
+            log.info(f"多张图片保存完成，总计: {len(color_mode_response['images'])} 张，"
+                     f"各阶段耗时(ms): {color_mode_response['timings']}")
 
             return success_response(
                 data=color_mode_response,
@@ -0,0 +1,38 @@
+"""
+运行监控API
+提供事件循环延迟与阻塞统计（需开启 loop_monitor.enabled）、各舱壁的排队深度与等待时间
+"""
+from fastapi import APIRouter, Depends
+
+from utils.bulkhead import bulkheads
+from utils.jwt_auth import get_current_user_info, require_permission
+from utils.loop_monitor import loop_monitor
+from utils.response import success_response, ResponseModel
+
+router = APIRouter()
+
+
+@router.get("/event-loop", response_model=ResponseModel, summary="查询事件循环延迟统计", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def get_event_loop_stats():
+    """
+    查询事件循环调度延迟分位数（ms）、按累计阻塞时长排序的接口路由，
+    以及最近的阻塞记录（含阻塞时事件循环线程的调用栈）
+    """
+    return success_response(data=loop_monitor.stats())
+
+
+@router.delete("/event-loop", response_model=ResponseModel, summary="清空事件循环延迟统计", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def reset_event_loop_stats():
+    """
+    清空延迟采样与阻塞统计（改造接口前后分别统计对比）
+    """
+    loop_monitor.reset()
+    return success_response(msg="事件循环延迟统计已清空")
+
+
+@router.get("/bulkheads", response_model=ResponseModel, summary="查询舱壁隔离统计", dependencies=[Depends(get_current_user_info), Depends(require_permission('SYSTEM_SETTINGS'))])
+async def get_bulkhead_stats():
+    """
+    查询各子系统舱壁的执行中与排队请求数、拒绝（503）次数与排队等待时间分位数（ms）
+    """
+    return success_response(data=bulkheads.stats())
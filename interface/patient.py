@@ -5,6 +5,7 @@
 from typing import Optional, List
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, Field as PydanticField
 
@@ -13,6 +14,8 @@ from database import get_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.query_fields import FIELDS_DESCRIPTION, FieldSet
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, paginate
 
 router = APIRouter()
 
@@ -80,6 +83,11 @@ class PatientResponse(BaseModel):
         from_attributes = True
 
 
+# 列表接口字段集：病史、过敏史、用药、保险信息等大字段默认不返回
+PATIENT_FIELDS = FieldSet(Patient, PatientResponse, heavy=(
+    "medical_history", "allergies", "current_medications", "insurance_info"))
+
+
 class PatientDeleteRequest(BaseModel):
     """批量删除患者请求模型"""
     patient_ids: List[int] = PydanticField(..., min_length=1, description="要删除的患者ID列表")
@@ -157,6 +165,8 @@ def list_patients(
     gender: Optional[str] = Query(None, description="性别筛选 (male/female/other)"),
     name: Optional[str] = Query(None, description="姓名模糊查询"),
     patient_id: Optional[str] = Query(None, description="患者编号模糊查询"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
@@ -169,56 +179,43 @@ def list_patients(
     - **gender**: 性别筛选
     - **name**: 姓名模糊查询
     - **patient_id**: 患者编号模糊查询
+    - **fields**: 返回字段，病史、过敏史等大字段需显式指定
+    - **count**: 总数计算方式（exact/estimate）
     """
     log.debug(f"分页查询患者: page={page}, page_size={page_size}, status={status}, gender={gender}")
-    
-    offset = (page - 1) * page_size
-    
-    # 构建查询用于计算总数，排除软删除的患者
-    count_query = db.query(Patient).filter(Patient.deleted_at.is_(None))
-    
-    # 添加筛选条件
-    if status:
-        count_query = count_query.filter(Patient.status == status)
-    if gender:
-        count_query = count_query.filter(Patient.gender == gender)
-    if name:
-        count_query = count_query.filter(Patient.name.like(f"%{name}%"))
-    if patient_id:
-        count_query = count_query.filter(Patient.patient_id.like(f"%{patient_id}%"))
-    
-    # 获取总数
-    total = count_query.count()
-    
-    # 重新构建查询用于获取分页数据
-    data_query = db.query(Patient).filter(Patient.deleted_at.is_(None))
-    
-    # 添加筛选条件
+    try:
+        names = PATIENT_FIELDS.resolve(fields)
+    except ValueError as e:
+        log.warning(f"分页查询患者参数错误: {str(e)}")
+        return error_response(msg=str(e), code=400)
+    
+    # 筛选条件，排除软删除的患者
+    conditions = [Patient.deleted_at.is_(None)]
     if status:
-        data_query = data_query.filter(Patient.status == status)
+        conditions.append(Patient.status == status)
     if gender:
-        data_query = data_query.filter(Patient.gender == gender)
+        conditions.append(Patient.gender == gender)
     if name:
-        data_query = data_query.filter(Patient.name.like(f"%{name}%"))
+        conditions.append(Patient.name.like(f"%{name}%"))
     if patient_id:
-        data_query = data_query.filter(Patient.patient_id.like(f"%{patient_id}%"))
+        conditions.append(Patient.patient_id.like(f"%{patient_id}%"))
     
-    # 获取分页数据
-    patients = data_query.order_by(Patient.created_at.desc()).offset(offset).limit(page_size).all()
+    # 获取分页数据（只查询要返回的列），总数由窗口计数一并返回
+    result = paginate(
+        db,
+        select(*PATIENT_FIELDS.select(names)).where(*conditions).order_by(Patient.created_at.desc()),
+        page, page_size, count
+    )
+    patients = result.items
     
-    log.debug(f"查询到 {total} 个患者，当前页 {len(patients)} 个")
+    log.debug(f"查询到 {result.total} 个患者，当前页 {len(patients)} 个")
     
-    # 转换为响应模型列表
-    patients_response = [PatientResponse.model_validate(patient).model_dump() for patient in patients]
+    # 转换为响应字典列表
+    patients_response = [PATIENT_FIELDS.to_dict(patient, names) for patient in patients]
     
     return success_response(data={
         "patients": patients_response,
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        "pagination": result.meta
     })
 
 
@@ -10,6 +10,7 @@ from typing import Optional, List
 from datetime import datetime, date, time as time_type
 from decimal import Decimal
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field as PydanticField
 
@@ -18,6 +19,7 @@ from database import get_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, paginate
 
 router = APIRouter()
 
@@ -246,6 +248,7 @@ async def get_registrations(
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
     include_deleted: bool = Query(False, description="是否包含已删除记录"),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
     session: Session = Depends(get_db)
 ):
     """
@@ -263,107 +266,62 @@ async def get_registrations(
     - 日期范围
     """
     try:
-        # 构建基础查询 - 用于计算总数
-        count_query = session.query(Registration)
+        # 筛选条件
+        conditions = []
 
-        # 应用筛选条件
         if not include_deleted:
-            count_query = count_query.filter(Registration.deleted_at.is_(None))
+            conditions.append(Registration.deleted_at.is_(None))
 
         if patient_id:
-            count_query = count_query.filter(Registration.patient_id == patient_id)
+            conditions.append(Registration.patient_id == patient_id)
 
         if doctor_id:
-            count_query = count_query.filter(Registration.doctor_id == doctor_id)
+            conditions.append(Registration.doctor_id == doctor_id)
 
         if examination_type_id:
-            count_query = count_query.filter(
+            conditions.append(
                 Registration.examination_type_id == examination_type_id)
 
         if status:
-            count_query = count_query.filter(Registration.status == status)
+            conditions.append(Registration.status == status)
 
         if registration_type:
-            count_query = count_query.filter(
+            conditions.append(
                 Registration.registration_type == registration_type)
 
         if payment_status:
-            count_query = count_query.filter(Registration.payment_status == payment_status)
+            conditions.append(Registration.payment_status == payment_status)
 
         if priority:
-            count_query = count_query.filter(Registration.priority == priority)
+            conditions.append(Registration.priority == priority)
 
         if registration_number:
-            count_query = count_query.filter(Registration.registration_number.ilike(
+            conditions.append(Registration.registration_number.ilike(
                 f"%{registration_number}%"))
 
         if start_date:
-            count_query = count_query.filter(Registration.scheduled_date >= start_date)
+            conditions.append(Registration.scheduled_date >= start_date)
 
         if end_date:
-            count_query = count_query.filter(Registration.scheduled_date <= end_date)
-
-        # 计算总数
-        total = count_query.count()
-
-        # 重新构建查询用于分页数据获取
-        data_query = session.query(Registration)
-
-        # 应用相同的筛选条件
-        if not include_deleted:
-            data_query = data_query.filter(Registration.deleted_at.is_(None))
-
-        if patient_id:
-            data_query = data_query.filter(Registration.patient_id == patient_id)
-
-        if doctor_id:
-            data_query = data_query.filter(Registration.doctor_id == doctor_id)
-
-        if examination_type_id:
-            data_query = data_query.filter(
-                Registration.examination_type_id == examination_type_id)
-
-        if status:
-            data_query = data_query.filter(Registration.status == status)
-
-        if registration_type:
-            data_query = data_query.filter(
-                Registration.registration_type == registration_type)
-
-        if payment_status:
-            data_query = data_query.filter(Registration.payment_status == payment_status)
-
-        if priority:
-            data_query = data_query.filter(Registration.priority == priority)
-
-        if registration_number:
-            data_query = data_query.filter(Registration.registration_number.ilike(
-                f"%{registration_number}%"))
-
-        if start_date:
-            data_query = data_query.filter(Registration.scheduled_date >= start_date)
-
-        if end_date:
-            data_query = data_query.filter(Registration.scheduled_date <= end_date)
-
-        # 分页
-        offset = (page - 1) * page_size
-        registrations = data_query.order_by(Registration.scheduled_date.desc(), Registration.id.desc())\
-            .offset(offset)\
-            .limit(page_size)\
-            .all()
+            conditions.append(Registration.scheduled_date <= end_date)
+
+        # 获取分页数据，总数由窗口计数一并返回
+        result = paginate(
+            session,
+            select(Registration).where(*conditions)
+            .order_by(Registration.scheduled_date.desc(), Registration.id.desc()),
+            page, page_size, count
+        )
+        registrations = result.items
 
         # 转换为响应模型
         registration_list = [RegistrationResponse.model_validate(
             reg).model_dump() for reg in registrations]
 
-        log.info(f"查询挂号记录列表成功: 页码={page}, 每页={page_size}, 总数={total}")
+        log.info(f"查询挂号记录列表成功: 页码={page}, 每页={page_size}, 总数={result.total}")
         return success_response(data={
             "items": registration_list,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            **result.meta
         })
 
     except Exception as e:
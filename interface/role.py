@@ -4,6 +4,7 @@
 from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field as PydanticField
 
@@ -14,6 +15,7 @@ from database import get_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, paginate
 
 router = APIRouter()
 
@@ -139,6 +141,7 @@ def list_roles(
     is_active: Optional[bool] = Query(None, description="是否启用筛选"),
     is_system_role: Optional[bool] = Query(None, description="是否系统角色筛选"),
     role_name: Optional[str] = Query(None, description="角色名称模糊查询"),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
@@ -150,52 +153,36 @@ def list_roles(
     - **is_active**: 是否启用
     - **is_system_role**: 是否系统角色
     - **role_name**: 角色名称模糊查询
+    - **count**: 总数计算方式（exact/estimate）
     """
     log.debug(f"分页查询角色: page={page}, page_size={page_size}")
     
-    offset = (page - 1) * page_size
+    # 筛选条件，排除软删除的角色
+    conditions = [Role.deleted_at.is_(None)]
     
-    # 构建查询用于计算总数，排除软删除的角色
-    count_query = db.query(Role).filter(Role.deleted_at.is_(None))
-    
-    # 添加筛选条件
     if is_active is not None:
-        count_query = count_query.filter(Role.is_active == is_active)
+        conditions.append(Role.is_active == is_active)
     if is_system_role is not None:
-        count_query = count_query.filter(Role.is_system_role == is_system_role)
+        conditions.append(Role.is_system_role == is_system_role)
     if role_name:
-        count_query = count_query.filter(Role.role_name.like(f"%{role_name}%"))
-    
-    # 获取总数
-    total = count_query.count()
-    
-    # 重新构建查询用于获取分页数据
-    data_query = db.query(Role).filter(Role.deleted_at.is_(None))
-    
-    # 添加筛选条件
-    if is_active is not None:
-        data_query = data_query.filter(Role.is_active == is_active)
-    if is_system_role is not None:
-        data_query = data_query.filter(Role.is_system_role == is_system_role)
-    if role_name:
-        data_query = data_query.filter(Role.role_name.like(f"%{role_name}%"))
-    
-    # 获取分页数据
-    roles = data_query.order_by(Role.created_at.desc()).offset(offset).limit(page_size).all()
+        conditions.append(Role.role_name.like(f"%{role_name}%"))
+
+    # 获取分页数据，总数由窗口计数一并返回
+    result = paginate(
+        db,
+        select(Role).where(*conditions).order_by(Role.created_at.desc()),
+        page, page_size, count
+    )
+    roles = result.items
     
-    log.debug(f"查询到 {total} 个角色，当前页 {len(roles)} 个")
+    log.debug(f"查询到 {result.total} 个角色，当前页 {len(roles)} 个")
     
     # 转换为响应模型列表
     roles_response = [RoleResponse.model_validate(role).model_dump() for role in roles]
     
     return success_response(data={
         "roles": roles_response,
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        "pagination": result.meta
     })
 
 
@@ -5,6 +5,7 @@
 from typing import Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
@@ -13,6 +14,7 @@ from database import get_db
 from utils.response import success_response, error_response, ResponseModel
 from loguru_logging import log
 from utils.jwt_auth import get_current_user_info, require_permission
+from utils.pagination import COUNT_DESCRIPTION, COUNT_PATTERN, CURSOR_DESCRIPTION, paginate
 from datetime import timedelta
 
 router = APIRouter()
@@ -79,6 +81,8 @@ def list_system_logs(
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
     message_keyword: Optional[str] = Query(None, description="消息关键词搜索"),
+    count: str = Query("exact", pattern=COUNT_PATTERN, description=COUNT_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
@@ -96,80 +100,56 @@ def list_system_logs(
     - **start_date**: 开始日期
     - **end_date**: 结束日期
     - **message_keyword**: 消息关键词
+    - **count**: 总数计算方式，日志量很大时可使用 estimate 按数据库统计信息估算
+    - **cursor**: 上一页返回的 next_cursor，按 (created_at, id) 游标翻页，深度翻页时代替 page
     """
     log.debug(f"分页查询系统日志: page={page}, page_size={page_size}")
     
-    offset = (page - 1) * page_size
+    # 筛选条件
+    conditions = []
     
-    # 构建查询用于计算总数
-    count_query = db.query(SystemLog)
-    
-    # 添加筛选条件
     if log_level:
-        count_query = count_query.filter(SystemLog.log_level == log_level)
+        conditions.append(SystemLog.log_level == log_level)
     if module:
-        count_query = count_query.filter(SystemLog.module == module)
+        conditions.append(SystemLog.module == module)
     if action:
-        count_query = count_query.filter(SystemLog.action == action)
+        conditions.append(SystemLog.action == action)
     if user_id is not None:
-        count_query = count_query.filter(SystemLog.user_id == user_id)
+        conditions.append(SystemLog.user_id == user_id)
     if resource_type:
-        count_query = count_query.filter(SystemLog.resource_type == resource_type)
+        conditions.append(SystemLog.resource_type == resource_type)
     if operation_result:
-        count_query = count_query.filter(SystemLog.operation_result == operation_result)
+        conditions.append(SystemLog.operation_result == operation_result)
     if start_date:
-        count_query = count_query.filter(SystemLog.created_at >= start_date)
+        conditions.append(SystemLog.created_at >= start_date)
     if end_date:
         # 结束日期包含当天的所有时间
         end_datetime = datetime.combine(end_date, datetime.max.time())
-        count_query = count_query.filter(SystemLog.created_at <= end_datetime)
+        conditions.append(SystemLog.created_at <= end_datetime)
     if message_keyword:
-        count_query = count_query.filter(SystemLog.message.like(f"%{message_keyword}%"))
-    
-    # 获取总数
-    total = count_query.count()
-    
-    # 重新构建查询用于获取分页数据
-    data_query = db.query(SystemLog)
-    
-    # 添加筛选条件
-    if log_level:
-        data_query = data_query.filter(SystemLog.log_level == log_level)
-    if module:
-        data_query = data_query.filter(SystemLog.module == module)
-    if action:
-        data_query = data_query.filter(SystemLog.action == action)
-    if user_id is not None:
-        data_query = data_query.filter(SystemLog.user_id == user_id)
-    if resource_type:
-        data_query = data_query.filter(SystemLog.resource_type == resource_type)
-    if operation_result:
-        data_query = data_query.filter(SystemLog.operation_result == operation_result)
-    if start_date:
-        data_query = data_query.filter(SystemLog.created_at >= start_date)
-    if end_date:
-        # 结束日期包含当天的所有时间
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        data_query = data_query.filter(SystemLog.created_at <= end_datetime)
-    if message_keyword:
-        data_query = data_query.filter(SystemLog.message.like(f"%{message_keyword}%"))
-    
-    # 获取分页数据
-    system_logs = data_query.order_by(SystemLog.created_at.desc()).offset(offset).limit(page_size).all()
-    
-    log.debug(f"查询到 {total} 条系统日志，当前页 {len(system_logs)} 条")
+        conditions.append(SystemLog.message.like(f"%{message_keyword}%"))
+
+    # 获取分页数据，按 (created_at, id) 倒序，支持游标翻页
+    try:
+        result = paginate(
+            db,
+            select(SystemLog).where(*conditions),
+            page, page_size, count,
+            keyset=(SystemLog.created_at, SystemLog.id), cursor=cursor
+        )
+    except ValueError as e:
+        log.warning(f"查询系统日志列表参数错误: {str(e)}")
+        return error_response(code=400, msg=str(e))
+    system_logs = result.items
+    
+    log.debug(f"查询到 {result.total} 条系统日志，当前页 {len(system_logs)} 条")
     
     # 转换为响应模型列表
     logs_response = [SystemLogResponse.model_validate(sys_log).model_dump() for sys_log in system_logs]
     
     return success_response(data={
         "logs": logs_response,
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        "pagination": result.meta
     })
 
 
@@ -0,0 +1,3 @@
+"""
+后台任务队列模块
+"""
@@ -0,0 +1,71 @@
+"""
+后台任务处理函数
+每种任务类型对应一个执行函数与一个进入 dead 状态时的回调，执行函数抛出异常即视为本次执行失败
+"""
+import pathlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from ai.preprocess import StageTimer
+from loguru_logging import log
+from models.fundus_image import FundusImage
+from utils.ingest import decode_file
+from utils.tile_pyramid import tile_pyramid
+
+# 任务类型
+JOB_COLORIZATION = 'colorization'
+
+
+@dataclass
+class JobHandler:
+    """任务处理定义"""
+    # 执行任务：(数据库会话, 任务参数)
+    run: Callable[[Session, dict], None]
+    # 任务进入 dead 状态时的回调：(数据库会话, 任务参数, 错误信息)
+    on_dead: Optional[Callable[[Session, dict, str], None]] = None
+
+
+def run_colorization(session: Session, payload: dict):
+    """
+    AI合成彩色图像，并回填提交任务时创建的彩图占位记录（upload_status: processing → uploaded）
+    """
+    from ai.ai_process import colorize_capture
+
+    image = session.get(FundusImage, payload["image_id"])
+    if image is None or image.deleted_at is not None:
+        log.warning(f"彩色图像记录不存在或已删除，跳过合成: ID={payload['image_id']}")
+        return
+
+    color_img_path = pathlib.Path(image.file_path).joinpath(image.file_name)
+    log.info(f"开始AI合成彩色图像: ir={payload['ir_img']}, green={payload['green_img']}")
+    timer = StageTimer()
+    ir_img = decode_file(payload["ir_img"], timer)
+    green_img = decode_file(payload["green_img"], timer)
+    colorized = colorize_capture(ir_img.gray, green_img.gray, str(color_img_path))
+    if not colorized:
+        raise RuntimeError("AI合成失败：彩色化模型不可用")
+
+    image.file_size = colorized["file_size"]
+    image.thumbnail_data = colorized["thumbnail_data"]
+    image.upload_status = 'uploaded'
+    timings = {**timer.as_dict(), **colorized["timings"]}
+    log.info(f"彩色图像合成完成: ID={image.id}, 文件={color_img_path}, 各阶段耗时(ms): {timings}")
+    # 预生成查看器瓦片金字塔的低分辨率层级（失败不影响合成结果，瓦片仍可按需生成）
+    try:
+        tile_pyramid.warm_up(str(color_img_path))
+    except Exception as e:
+        log.warning(f"瓦片金字塔预生成失败: {color_img_path}, {e}")
+
+
+def colorization_dead(session: Session, payload: dict, error: str):
+    """多次重试仍失败时，将彩图占位记录标记为 failed"""
+    session.query(FundusImage).filter(FundusImage.id == payload["image_id"]).update(
+        {"upload_status": 'failed'}, synchronize_session=False)
+    log.error(f"彩色图像合成最终失败: ID={payload['image_id']}, 错误: {error}")
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    JOB_COLORIZATION: JobHandler(run=run_colorization, on_dead=colorization_dead),
+}
@@ -0,0 +1,109 @@
+"""
+基于 PostgreSQL 的持久化任务队列
+任务写入 jobs 表，与业务数据在同一事务中提交；工作进程通过 SELECT ... FOR UPDATE SKIP LOCKED
+并发领取任务，互不阻塞。失败任务按指数退避重试，超过最大次数进入 dead 状态；
+被领取后超过可见性超时仍未完成的任务（工作进程崩溃）可被重新领取
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from config import config
+from models.job import Job
+
+# 任务状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_DEAD = 'dead'
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(session: Session, job_type: str, payload: dict,
+            max_attempts: Optional[int] = None) -> Job:
+    """
+    添加任务（只 flush 不提交），由调用方与业务数据在同一事务中提交
+    """
+    job = Job(
+        job_type=job_type,
+        payload=payload,
+        status=STATUS_PENDING,
+        max_attempts=max_attempts or config.config.jobs.max_attempts
+    )
+    session.add(job)
+    session.flush()
+    return job
+
+
+def claim(session: Session, worker_id: str, job_types: Optional[list] = None) -> Optional[Job]:
+    """
+    领取一个可执行的任务：到期的 pending 任务，或可见性超时的 running 任务
+    行锁在调用方提交事务前一直持有，并发的工作进程会跳过该行
+    """
+    now = _now()
+    query = session.query(Job).filter(
+        or_(
+            (Job.status == STATUS_PENDING) & (Job.run_at <= now),
+            (Job.status == STATUS_RUNNING) & (Job.locked_until < now)
+        )
+    )
+    if job_types:
+        query = query.filter(Job.job_type.in_(job_types))
+    job = query.order_by(Job.run_at, Job.id).limit(1).with_for_update(skip_locked=True).first()
+    if job is None:
+        return None
+    job.status = STATUS_RUNNING
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_until = now + timedelta(seconds=config.config.jobs.visibility_timeout_s)
+    return job
+
+
+def backoff_seconds(attempts: int) -> float:
+    """第 attempts 次失败后的重试间隔：指数退避并加入随机抖动，避免大量任务同时重试"""
+    jobs_config = config.config.jobs
+    delay = min(jobs_config.backoff_max_s, jobs_config.backoff_base_s * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def complete(session: Session, job: Job):
+    """标记任务完成"""
+    job.status = STATUS_COMPLETED
+    job.locked_by = None
+    job.locked_until = None
+    job.last_error = None
+    job.finished_at = _now()
+
+
+def fail(session: Session, job: Job, error: str) -> bool:
+    """
+    记录任务失败：未超过最大执行次数时按退避时间重新排队，否则进入 dead 状态
+
+    Returns:
+        任务是否进入 dead 状态
+    """
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = STATUS_DEAD
+        job.finished_at = _now()
+        return True
+    job.status = STATUS_PENDING
+    job.run_at = _now() + timedelta(seconds=backoff_seconds(job.attempts))
+    return False
+
+
+def queue_stats(session: Session) -> dict:
+    """按任务类型与状态统计任务数量"""
+    stats = {}
+    for job_type, status, count in session.query(
+            Job.job_type, Job.status, func.count(Job.id)).group_by(Job.job_type, Job.status).all():
+        stats.setdefault(job_type, {})[status] = count
+    return stats
@@ -0,0 +1,174 @@
+"""
+后台任务工作进程
+循环领取并执行 jobs 表中的任务，可随服务启动（jobs.workers 配置），
+也可在其他机器或进程中单独运行，增加工作进程即可提高任务吞吐量
+
+用法（在项目根目录执行）:
+    python -m jobs.worker [--types colorization]
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from typing import List, Optional
+
+from config import config
+from database import db
+from jobs.handlers import JOB_HANDLERS
+from jobs.queue import STATUS_RUNNING, claim, complete, fail
+from loguru_logging import log
+from models.job import Job
+
+
+class LeaseLostError(Exception):
+    """任务执行超过可见性超时，已被其他工作进程重新领取"""
+
+
+class JobWorker:
+    """任务工作者：领取任务 → 执行 → 标记完成/重试/dead"""
+
+    def __init__(self, job_types: Optional[List[str]] = None, worker_id: Optional[str] = None):
+        self.job_types = job_types
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def run_once(self) -> bool:
+        """
+        领取并执行一个任务
+
+        Returns:
+            是否领取到任务
+        """
+        # 领取任务使用单独的短事务，提交后即释放行锁，执行期间由可见性超时保证不被重复领取
+        with db.session() as session:
+            job = claim(session, self.worker_id, self.job_types)
+            if job is None:
+                return False
+            job_id, job_type, payload = job.id, job.job_type, dict(job.payload)
+            handler = JOB_HANDLERS.get(job_type)
+            if handler is None or job.attempts > job.max_attempts:
+                # 未知任务类型，或最后一次执行时工作进程崩溃（可见性超时后被重新领取）
+                error = f"未知的任务类型: {job_type}" if handler is None else "任务执行超时（可见性超时）"
+                job.attempts = job.max_attempts
+                fail(session, job, error)
+                if handler is not None and handler.on_dead is not None:
+                    handler.on_dead(session, payload, error)
+                log.error(f"任务进入 dead 状态: id={job_id}, type={job_type}, {error}")
+                return True
+
+        log.info(f"开始执行任务: id={job_id}, type={job_type}, worker={self.worker_id}")
+        try:
+            # 业务数据更新与任务完成标记在同一事务中提交
+            with db.session() as session:
+                handler.run(session, payload)
+                job = self._locked_job(session, job_id)
+                complete(session, job)
+            log.info(f"任务执行完成: id={job_id}, type={job_type}")
+        except LeaseLostError as e:
+            log.warning(f"任务结果已丢弃: id={job_id}, {e}")
+        except Exception as e:
+            log.exception(f"任务执行失败: id={job_id}, type={job_type}, {e}")
+            self._record_failure(job_id, handler, payload, str(e))
+        return True
+
+    def _locked_job(self, session, job_id: int) -> Job:
+        """锁定并返回仍由当前工作者持有的任务，已被重新领取时抛出 LeaseLostError"""
+        job = session.query(Job).filter(Job.id == job_id).with_for_update().first()
+        if job is None or job.status != STATUS_RUNNING or job.locked_by != self.worker_id:
+            raise LeaseLostError("任务已被其他工作进程重新领取")
+        return job
+
+    def _record_failure(self, job_id: int, handler, payload: dict, error: str):
+        """记录执行失败：按退避时间重新排队，超过最大执行次数时进入 dead 状态"""
+        try:
+            with db.session() as session:
+                job = self._locked_job(session, job_id)
+                if fail(session, job, error):
+                    if handler.on_dead is not None:
+                        handler.on_dead(session, payload, error)
+                    log.error(f"任务进入 dead 状态: id={job_id}, 已执行 {job.attempts} 次")
+                else:
+                    log.info(f"任务将于 {job.run_at} 重试: id={job_id}, 已执行 {job.attempts} 次")
+        except LeaseLostError as e:
+            log.warning(f"任务失败状态未记录: id={job_id}, {e}")
+        except Exception as e:
+            log.error(f"记录任务失败状态出错: id={job_id}, {e}")
+
+    def run(self, stop_event):
+        """持续执行任务直到 stop_event 被设置，队列为空时按轮询间隔等待"""
+        log.info(f"任务工作进程启动: worker={self.worker_id}, types={self.job_types or 'all'}")
+        poll_interval = config.config.jobs.poll_interval_s
+        while not stop_event.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                log.error(f"领取任务失败: {e}")
+            stop_event.wait(poll_interval)
+        log.info(f"任务工作进程退出: worker={self.worker_id}")
+
+
+def _worker_main(stop_event, job_types: Optional[List[str]] = None):
+    """工作进程入口"""
+    JobWorker(job_types).run(stop_event)
+
+
+class WorkerProcesses:
+    """随服务启动的任务工作进程 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(WorkerProcesses, cls).__new__(cls)
+            cls._instance._processes = []
+            cls._instance._stop_event = None
+        return cls._instance
+
+    def start(self):
+        """按配置启动工作进程（在服务启动时调用）"""
+        workers = max(0, int(config.config.jobs.workers))
+        if self._processes or workers == 0:
+            return
+        # 使用 spawn 方式，与 Windows 及打包后的运行方式一致
+        context = multiprocessing.get_context("spawn")
+        self._stop_event = context.Event()
+        for n in range(workers):
+            process = context.Process(target=_worker_main, args=(self._stop_event,),
+                                      name=f"job-worker-{n}", daemon=True)
+            process.start()
+            self._processes.append(process)
+        log.info(f"任务工作进程已启动: workers={workers}")
+
+    def shutdown(self, timeout: float = 10.0):
+        """通知工作进程在当前任务完成后退出，超时仍未退出时强制结束"""
+        if not self._processes:
+            return
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                log.warning(f"任务工作进程未能及时退出，强制结束: pid={process.pid}")
+                process.terminate()
+        self._processes = []
+        log.info("任务工作进程已关闭")
+
+
+# 创建全局工作进程管理实例，方便导入使用
+job_workers = WorkerProcesses()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后台任务工作进程")
+    parser.add_argument("--types", help="只处理指定类型的任务，逗号分隔（缺省处理全部类型）")
+    args = parser.parse_args()
+
+    stop_event = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop_event.set())
+    job_types = [t for t in args.types.split(",") if t] if args.types else None
+    JobWorker(job_types).run(stop_event)
+
+
+if __name__ == "__main__":
+    main()
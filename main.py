@@ -1,7 +1,9 @@
 """
 眼科检查系统后端服务器启动入口
 """
+import asyncio
 import contextlib
+import sys
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +12,13 @@ import scipy.signal
 from config import config
 from database import db
 from interface import api_router
+from ai.inference_pool import inference_pool
+from ai.model_registry import DETECT_MODEL, model_registry
+from ai.detect_service import detect_jobs
+from jobs.worker import job_workers
+from utils.tile_pyramid import tile_pyramid
+from utils.loop_monitor import loop_monitor, LoopMonitorMiddleware
+from utils.bulkhead import bulkheads
 from loguru_logging import log  # 导入全局日志对象
 
 
@@ -18,10 +27,32 @@ async def lifespan(app: FastAPI):
     # 启动事件
     log.info("服务器启动中...")
     
+    # 启动AI推理工作池，工作进程启动时一次性加载并预热模型，避免首个请求承担模型加载开销
+    inference_pool.start()
+    # 预先计算检测模型指纹（首次计算需哈希整个模型文件），请求中只读取缓存值
+    await asyncio.get_running_loop().run_in_executor(None, model_registry.fingerprint, DETECT_MODEL)
+    # 上次运行中断的异步AI诊断任务不会再被处理，标记为超时
+    try:
+        with db.session() as session:
+            stale = detect_jobs.recover_stale(session)
+        if stale:
+            log.warning(f"已将 {stale} 条中断的AI诊断任务标记为超时")
+    except Exception as e:
+        log.error(f"恢复中断的AI诊断任务失败: {e}")
+    # 启动后台任务工作进程（彩色合成等），也可通过 python -m jobs.worker 单独部署
+    job_workers.start()
+    # 事件循环延迟监控（loop_monitor.enabled 开启时）
+    loop_monitor.start()
     # 可以在这里添加其他启动时需要执行的操作
     yield
     # 关闭事件
     log.info("服务器关闭中...")
+    loop_monitor.stop()
+    job_workers.shutdown()
+    tile_pyramid.shutdown()
+    bulkheads.shutdown()
+    inference_pool.shutdown()
+    await db.dispose_async()
     # 可以在这里添加其他关闭时需要执行的操作
 
 
@@ -44,6 +75,10 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # 事件循环延迟监控：登记每个请求所在的任务，阻塞时定位到路由
+    if loop_monitor.enabled:
+        app.add_middleware(LoopMonitorMiddleware)
+
     # 注册API路由
     app.include_router(api_router, prefix="/api")
     
@@ -51,9 +86,11 @@ def create_app() -> FastAPI:
     @app.exception_handler(HTTPException)
     async def http_exception_handler(request, exc):
         log.error(f"HTTP异常: {exc.status_code} - {exc.detail}")
+        # 保留异常附带的响应头（如 401 的 WWW-Authenticate、503 的 Retry-After）
         return JSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail},
+            headers=exc.headers,
         )
     
     @app.exception_handler(Exception)
@@ -90,6 +127,10 @@ def main():
         server_config = config.config.server
         log.info(f"服务器配置: host={server_config.host}, port={server_config.port}")
         
+        # psycopg 异步驱动不支持 Windows 默认的 ProactorEventLoop
+        if sys.platform == "win32":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
         # 启动服务器
         log.info(f"启动服务器: http://{server_config.host}:{server_config.port}")
         uvicorn.run(
@@ -97,6 +138,8 @@ def main():
             host=server_config.host,
             port=server_config.port,
             log_level="debug",
+            # Windows 下使用上面设置的 Selector 事件循环策略，不由 uvicorn 指定事件循环
+            loop="none" if sys.platform == "win32" else "auto",
             reload=False  # 开发模式下启用热重载
         )
     except Exception as e:
@@ -16,6 +16,7 @@ from .permission import Permission
 from .user_role import UserRole
 from .role_permission import RolePermission
 from .system_log import SystemLog
+from .job import Job
 
 __all__ = [
     'User',
@@ -32,4 +33,5 @@ __all__ = [
     'UserRole',
     'RolePermission',
     'SystemLog',
+    'Job',
 ]
\ No newline at end of file
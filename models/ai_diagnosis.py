@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional
 from decimal import Decimal
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Text, CheckConstraint, DateTime, text, Numeric, Integer
+from sqlalchemy import Column, Text, CheckConstraint, DateTime, Index, text, Numeric, Integer
 from sqlalchemy.dialects.postgresql import JSONB
 
 class AIDiagnosis(SQLModel, table=True):
@@ -47,6 +47,8 @@ class AIDiagnosis(SQLModel, table=True):
         CheckConstraint("severity_level IN ('normal', 'mild', 'moderate', 'severe', 'critical')", name='check_severity_level'),
         CheckConstraint("processing_status IN ('pending', 'processing', 'completed', 'failed', 'timeout')", name='check_processing_status'),
         CheckConstraint("review_status IN ('pending', 'approved', 'rejected', 'modified')", name='check_review_status'),
+        # 列表按 (created_at, id) 倒序游标分页（反向扫描）
+        Index('idx_ai_diagnoses_created_at_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
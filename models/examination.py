@@ -4,7 +4,7 @@
 from datetime import datetime, date, time
 from typing import Optional
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Date, Time, Text, CheckConstraint, DateTime, text
+from sqlalchemy import Column, Date, Time, Text, CheckConstraint, DateTime, Index, text
 
 class Examination(SQLModel, table=True):
     """检查记录表:记录每次眼底检查的基本信息和结果(可独立存在或与挂号关联)"""
@@ -43,6 +43,8 @@ class Examination(SQLModel, table=True):
     __table_args__ = (
         CheckConstraint("eye_side IN ('left', 'right', 'both')", name='check_eye_side'),
         CheckConstraint("status IN ('pending', 'in_progress', 'completed', 'cancelled')", name='check_examination_status'),
+        # 列表按 (examination_date, id) 倒序游标分页（反向扫描）
+        Index('idx_examinations_date_id', 'examination_date', 'id'),
     )
     
     def __repr__(self):
@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Text, Boolean, BigInteger, CheckConstraint, DateTime, text
+from sqlalchemy import Column, Text, Boolean, BigInteger, CheckConstraint, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 
 class FundusImage(SQLModel, table=True):
@@ -46,6 +46,8 @@ class FundusImage(SQLModel, table=True):
         CheckConstraint("file_size >= 0", name='check_file_size'),
         CheckConstraint("image_quality IN ('excellent', 'good', 'fair', 'poor')", name='check_image_quality'),
         CheckConstraint("upload_status IN ('uploading', 'uploaded', 'failed', 'processing')", name='check_upload_status'),
+        # 列表按 (created_at, id) 倒序游标分页（反向扫描）
+        Index('idx_fundus_images_created_at_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
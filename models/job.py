@@ -0,0 +1,46 @@
+"""
+后台任务队列模型
+"""
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Text, CheckConstraint, DateTime, Index, text, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+
+class Job(SQLModel, table=True):
+    """后台任务表:持久化的任务队列，由独立的工作进程通过 FOR UPDATE SKIP LOCKED 并发领取"""
+    __tablename__ = 'jobs'
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_type: str = Field(max_length=50)
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    status: str = Field(default='pending', max_length=20)
+    attempts: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default=text('0')))
+    max_attempts: int = Field(default=5, sa_column=Column(Integer, nullable=False, server_default=text('5')))
+    run_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=text('CURRENT_TIMESTAMP'))
+    )
+    locked_by: Optional[str] = Field(default=None, max_length=100)
+    locked_until: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    finished_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    )
+
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'running', 'completed', 'dead')", name='check_job_status'),
+        CheckConstraint("attempts >= 0", name='check_job_attempts'),
+        # 领取任务时按 run_at 扫描待执行/可见性超时的任务
+        Index('idx_jobs_status_run_at', 'status', 'run_at',
+              postgresql_where=text("status IN ('pending', 'running')")),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.job_type}', status='{self.status}', attempts={self.attempts})>"
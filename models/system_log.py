@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Text, CheckConstraint, DateTime, text, Integer
+from sqlalchemy import Column, Text, CheckConstraint, DateTime, Index, text, Integer
 from sqlalchemy.dialects.postgresql import JSONB, INET
 
 class SystemLog(SQLModel, table=True):
@@ -30,12 +30,14 @@ class SystemLog(SQLModel, table=True):
     additional_data: Optional[dict] = Field(default=None, sa_column=Column(JSONB))
     created_at: Optional[datetime] = Field(
         default=None,
-        sa_column=Column(DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), index=True)
+        sa_column=Column(DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
     )
     
     __table_args__ = (
         CheckConstraint("log_level IN ('DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL')", name='check_log_level'),
         CheckConstraint("operation_result IN ('success', 'failure', 'partial')", name='check_operation_result'),
+        # 列表按 (created_at, id) 倒序游标分页（反向扫描）
+        Index('idx_system_logs_created_at_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
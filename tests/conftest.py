@@ -0,0 +1,122 @@
+"""
+pytest 公共配置：将项目根目录加入模块搜索路径，测试中可直接导入 config、utils、interface 等模块
+数据库相关测试使用内存 SQLite（PostgreSQL 专有类型按 SQLite 类型建表），
+异步接口通过 AsyncSessionAdapter 在同一个同步会话上执行，便于统一统计语句数
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import ARRAY, create_engine, event
+from sqlalchemy.dialects.postgresql import INET, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+import models  # noqa: F401  注册全部数据表
+from config import config
+from utils.jwt_auth import create_token_pair
+
+
+@compiles(JSONB, "sqlite")
+@compiles(ARRAY, "sqlite")
+def _compile_json(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(INET, "sqlite")
+def _compile_inet(type_, compiler, **kw):
+    return "TEXT"
+
+
+def auth_headers(*permissions: str) -> dict:
+    """生成带指定权限的访问令牌请求头"""
+    token = create_token_pair(1, "tester", "admin", permissions=list(permissions))["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def save_folder(tmp_path, monkeypatch):
+    """将图像保存目录指向临时目录"""
+    monkeypatch.setattr(config.config, "save_folder_path", str(tmp_path))
+    return tmp_path
+
+
+class StatementCounter:
+    """统计引擎执行的 SQL 语句数（before_cursor_execute 事件）"""
+
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self):
+        self.statements = []
+
+
+class AsyncConnectionAdapter:
+    """以协程方式调用同步 Connection"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    async def exec_driver_sql(self, *args, **kwargs):
+        return self._connection.exec_driver_sql(*args, **kwargs)
+
+
+class AsyncSessionAdapter:
+    """以协程方式调用同步 Session，供 AsyncSession 接口在 SQLite 上测试"""
+
+    def __init__(self, session: Session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    async def execute(self, *args, **kwargs):
+        return self._session.execute(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return self._session.scalars(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return self._session.scalar(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return self._session.get(*args, **kwargs)
+
+    async def connection(self):
+        return AsyncConnectionAdapter(self._session.connection())
+
+    async def flush(self, *args, **kwargs):
+        self._session.flush(*args, **kwargs)
+
+    async def commit(self):
+        self._session.commit()
+
+    async def rollback(self):
+        self._session.rollback()
+
+
+@pytest.fixture
+def db_engine():
+    """建好全部数据表的内存 SQLite 引擎"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    with Session(db_engine) as session:
+        yield session
@@ -0,0 +1,79 @@
+"""
+同步AI诊断接口测试：新检测的结果一次插入并提交，提交成功后才写入结果缓存
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import AsyncSessionAdapter, auth_headers
+from database import get_async_db
+from interface import ai_diagnosis
+from models import AIDiagnosis
+
+REQUEST = {"images": [
+    {"image_id": i + 1, "detect_file_path": "/data", "detect_file_name": f"{i}_IR.jpg"} for i in range(3)
+]}
+
+
+def _outcome() -> dict:
+    results = {
+        idx: {"image_id": idx + 1, "ai_model_name": "best.onnx", "ai_model_version": "abc",
+              "detect_file_path": "/data", "detect_file_name": f"{idx}_IR_detect.jpg",
+              "thumbnail_data": None, "diagnostic_markers": {"labels": []},
+              "processing_time_ms": 10, "is_primary": idx == 0}
+        for idx in range(3)
+    }
+    # 第 2 张命中缓存，已有诊断记录
+    results[1]["id"] = 99
+    return {"results": results, "fresh": {0: [], 2: []}, "cache_keys": ["k0", "k1", "k2"],
+            "degraded": False, "tiling": {"mode": "single", "tile_size": None}}
+
+
+@pytest.fixture
+def detect(db_session, monkeypatch):
+    remembered = []
+
+    async def fake_detect_images(detect_img_li, mode, tile_size):
+        return _outcome()
+
+    monkeypatch.setattr(ai_diagnosis, "detect_images", fake_detect_images)
+    monkeypatch.setattr(ai_diagnosis, "remember_result",
+                        lambda outcome, idx: remembered.append(outcome["results"][idx]["id"]))
+    adapter = AsyncSessionAdapter(db_session)
+    app = FastAPI()
+    app.include_router(ai_diagnosis.router, prefix="/api/ai-diagnoses")
+    app.dependency_overrides[get_async_db] = lambda: adapter
+    client = TestClient(app)
+
+    def post():
+        return client.post("/api/ai-diagnoses/detect", json=REQUEST,
+                           headers=auth_headers("DIAGNOSIS_CREATE")).json()
+
+    return post, adapter, remembered
+
+
+def test_fresh_results_inserted_once_then_cached(detect, db_session):
+    post, _, remembered = detect
+    body = post()
+
+    assert body["code"] == 200
+    ids = sorted(row.id for row in db_session.query(AIDiagnosis))
+    assert len(ids) == 2
+    assert sorted(remembered) == ids
+    returned = {item["image_id"]: item["id"] for item in body["data"]["detect_img_li"]}
+    assert returned[2] == 99
+    assert sorted([returned[1], returned[3]]) == ids
+
+
+def test_failed_commit_rolls_back_all_rows(detect, db_session, monkeypatch):
+    post, adapter, remembered = detect
+
+    async def failing_commit():
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(adapter, "commit", failing_commit)
+    body = post()
+
+    assert body["code"] != 200
+    assert db_session.query(AIDiagnosis).count() == 0
+    assert remembered == []
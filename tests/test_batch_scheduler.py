@@ -0,0 +1,69 @@
+"""
+跨请求合批调度器测试
+"""
+import threading
+
+import numpy as np
+import pytest
+
+from ai import batch_scheduler
+from ai.batch_scheduler import BatchScheduler
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """以逐元素乘 2 代替模型推理"""
+    monkeypatch.setattr(batch_scheduler.model_registry, "run_batch", lambda name, batch: batch * 2)
+
+
+def _submit_concurrently(scheduler: BatchScheduler, count: int) -> dict:
+    """多个线程同时提交请求（与 thread 模式下并发的检测任务相同），返回各请求的输出"""
+    outputs = {}
+    barrier = threading.Barrier(count)
+
+    def submit(i):
+        with scheduler.track():
+            barrier.wait()
+            outputs[i] = scheduler.infer(np.full((2, 1), i, dtype=np.float32))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outputs
+
+
+def test_concurrent_requests_are_merged(fake_model):
+    scheduler = BatchScheduler("test", window_ms=200, max_batch_size=16)
+    outputs = _submit_concurrently(scheduler, 3)
+
+    # 每个请求取回自己的输出
+    for i in range(3):
+        np.testing.assert_array_equal(outputs[i], np.full((2, 1), i * 2))
+    stats = scheduler.stats()
+    assert stats["total_requests"] == 3
+    assert stats["merged_batches"] >= 1
+    assert stats["merged_requests"] >= 2
+    assert stats["total_batches"] < 3
+
+
+def test_single_request_is_not_counted_as_merged(fake_model):
+    scheduler = BatchScheduler("test", window_ms=0, max_batch_size=16)
+    with scheduler.track():
+        scheduler.infer(np.zeros((2, 1), dtype=np.float32))
+
+    stats = scheduler.stats()
+    assert stats["total_batches"] == 1
+    assert stats["merged_batches"] == 0
+    assert stats["merged_requests"] == 0
+
+
+def test_max_batch_size_limits_merging(fake_model):
+    # 每个请求 2 张图，上限 2 时每个请求单独成批
+    scheduler = BatchScheduler("test", window_ms=200, max_batch_size=2)
+    _submit_concurrently(scheduler, 3)
+
+    stats = scheduler.stats()
+    assert stats["total_batches"] == 3
+    assert stats["merged_batches"] == 0
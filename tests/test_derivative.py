@@ -0,0 +1,134 @@
+"""
+派生图像（缩略图）访问接口测试
+"""
+from datetime import date
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import config
+from conftest import AsyncSessionAdapter, auth_headers
+from database import get_async_db
+from interface import fundus_image
+from interface.derivative import router
+from models import Examination, ExaminationType, FundusImage, Patient
+from utils.derivative_store import derivative_store
+from utils.thumbnail import store_thumbnail_from_array
+
+app = FastAPI()
+app.include_router(router, prefix="/api/derivatives")
+client = TestClient(app)
+
+
+def test_unsigned_url_rejected(save_folder):
+    url = derivative_store.put(b"thumbnail")
+    assert client.get(url).json()["code"] == 403
+
+
+def test_tampered_or_expired_signature_rejected(save_folder):
+    url = derivative_store.put(b"thumbnail")
+    other = derivative_store.put(b"other thumbnail")
+    signed = derivative_store.sign_url(url)
+    query = signed.split("?", 1)[1]
+
+    # 签名与文件名绑定，不能用于其他文件
+    assert client.get(f"{other}?{query}").json()["code"] == 403
+    assert client.get(signed[:-1] + ("0" if signed[-1] != "0" else "1")).json()["code"] == 403
+    # 过期的签名
+    expired = derivative_store.sign_url(url, now=0)
+    assert client.get(expired).json()["code"] == 403
+
+
+def test_signed_url_stable_within_ttl_window(monkeypatch):
+    monkeypatch.setattr(config.config.thumbnail, "url_ttl_s", 3600)
+    url = "/api/derivatives/" + "a" * 64 + ".jpg"
+
+    assert derivative_store.sign_url(url, now=7200) == derivative_store.sign_url(url, now=10799)
+    assert derivative_store.sign_url(url, now=7200) != derivative_store.sign_url(url, now=10800)
+    # 非派生图像URL 原样返回
+    assert derivative_store.sign_url("/api/other/x.jpg") == "/api/other/x.jpg"
+
+
+def test_served_with_private_cache_control(save_folder):
+    url = derivative_store.sign_url(derivative_store.put(b"thumbnail"))
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.content == b"thumbnail"
+    assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
+
+    etag = response.headers["etag"]
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+
+def test_missing_file_uses_error_response(save_folder):
+    url = derivative_store.sign_url("/api/derivatives/" + "0" * 64 + ".jpg")
+    assert client.get(url).json()["code"] == 404
+
+
+def _stored_thumbnail() -> str:
+    image = np.zeros((600, 800, 3), dtype=np.uint8)
+    image[100:300, 200:500] = (0, 128, 255)
+    return store_thumbnail_from_array(image)
+
+
+def test_thumbnail_url_is_canonical_jpeg(save_folder):
+    url = _stored_thumbnail()
+    assert url.endswith(".jpg")
+
+
+def test_format_negotiated_per_request(save_folder):
+    url = derivative_store.sign_url(_stored_thumbnail())
+    webp = client.get(url, headers={"Accept": "image/webp,image/*"})
+    jpeg = client.get(url, headers={"Accept": "image/jpeg"})
+
+    assert webp.headers["content-type"] == "image/webp"
+    assert jpeg.headers["content-type"] == "image/jpeg"
+    assert webp.headers["vary"] == jpeg.headers["vary"] == "Accept"
+    # 同一URL 的不同格式使用不同的 ETag
+    assert webp.headers["etag"] != jpeg.headers["etag"]
+    assert client.get(url, headers={"Accept": "image/jpeg",
+                                    "If-None-Match": webp.headers["etag"]}).status_code == 200
+
+
+def test_jpeg_only_when_webp_disabled(save_folder, monkeypatch):
+    monkeypatch.setattr(config.config.thumbnail, "webp_enabled", False)
+    url = derivative_store.sign_url(_stored_thumbnail())
+
+    response = client.get(url, headers={"Accept": "image/webp"})
+    assert response.headers["content-type"] == "image/jpeg"
+
+
+def test_list_response_url_loads_without_bearer_token(save_folder, db_session):
+    # 列表接口返回的缩略图URL 原样用于 <img src>：浏览器不会携带 Authorization 头
+    exam_type = ExaminationType(type_code="T0", type_name="检查类型")
+    patient = Patient(patient_id="P0001", name="测试患者")
+    db_session.add_all([exam_type, patient])
+    db_session.flush()
+    exam = Examination(examination_number="EX000001", patient_id=patient.id,
+                       examination_type_id=exam_type.id, examination_date=date(2025, 1, 1))
+    db_session.add(exam)
+    db_session.flush()
+    stored = _stored_thumbnail()
+    db_session.add(FundusImage(examination_id=exam.id, image_number="IMG0001", eye_side="OD",
+                               capture_mode="gray", file_path="/data", file_name="0_IR.jpg",
+                               thumbnail_data=stored))
+    db_session.commit()
+
+    list_app = FastAPI()
+    list_app.include_router(fundus_image.router, prefix="/api/fundus-images")
+    list_app.include_router(router, prefix="/api/derivatives")
+    list_app.dependency_overrides[get_async_db] = lambda: AsyncSessionAdapter(db_session)
+    list_client = TestClient(list_app)
+
+    body = list_client.get("/api/fundus-images/", headers=auth_headers("IMAGE_VIEW")).json()
+    url = body["data"]["items"][0]["thumbnail_data"]
+    assert url.startswith(stored + "?")
+    # 数据库中保存的仍是不带签名的URL
+    assert db_session.get(FundusImage, 1).thumbnail_data == stored
+
+    response = list_client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
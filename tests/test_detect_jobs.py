@@ -0,0 +1,141 @@
+"""
+异步检测任务管理器测试：提交时先查询结果缓存、批量插入诊断记录，推理期间不占用数据库会话，超时后记录放弃的推理
+"""
+import asyncio
+
+import pytest
+
+from ai import detect_service
+from ai.detect_service import DetectJobManager
+from config import config
+from conftest import AsyncSessionAdapter, StatementCounter
+from models import AIDiagnosis
+
+
+class FakeSession:
+    """记录执行的更新语句，并统计当前打开的会话数"""
+    open_sessions = 0
+    statements = []
+
+    async def __aenter__(self):
+        FakeSession.open_sessions += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        FakeSession.open_sessions -= 1
+
+    async def execute(self, statement):
+        FakeSession.statements.append(statement.compile().params)
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    FakeSession.open_sessions = 0
+    FakeSession.statements = []
+    monkeypatch.setattr(detect_service.db, "async_session", FakeSession, raising=False)
+    return FakeSession
+
+
+def _statuses(statements) -> list:
+    return [params["processing_status"] for params in statements]
+
+
+def test_no_session_held_during_inference(fake_db, monkeypatch):
+    sessions_during_inference = []
+
+    async def fake_detect(detect_img_li, mode, tile_size, cached=None):
+        sessions_during_inference.append(fake_db.open_sessions)
+        return None
+
+    monkeypatch.setattr(detect_service, "detect_images", fake_detect)
+    asyncio.run(DetectJobManager()._run([1, 2], [], "single", None))
+
+    assert sessions_during_inference == [0]
+    assert _statuses(fake_db.statements) == ["processing", "failed"]
+    assert fake_db.open_sessions == 0
+
+
+def test_timeout_records_abandoned_inference(fake_db, monkeypatch):
+    async def slow_detect(detect_img_li, mode, tile_size, cached=None):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(detect_service, "detect_images", slow_detect)
+    monkeypatch.setattr(config.config.inference, "job_timeout_s", 0.05)
+    manager = DetectJobManager()
+    abandoned = manager.stats()["abandoned_after_timeout"]
+
+    asyncio.run(manager._run([3], [], "single", None))
+
+    assert _statuses(fake_db.statements) == ["processing", "timeout"]
+    assert manager.stats()["abandoned_after_timeout"] == abandoned + 1
+
+
+def _images(count: int) -> list:
+    return [{"image_id": i + 1, "detect_file_path": "/data", "detect_file_name": f"{i}_IR.jpg"}
+            for i in range(count)]
+
+
+@pytest.fixture
+def submitted(db_engine, db_session, monkeypatch):
+    """提交异步检测任务（指定命中缓存的图片），返回 (任务信息, 后台任务收到的参数, 执行的 SQL)"""
+    started = []
+
+    async def fake_run(self, ids, detect_img_li, mode, tile_size, cached=None):
+        started.append((ids, detect_img_li, cached))
+
+    monkeypatch.setattr(DetectJobManager, "_run", fake_run)
+    counter = StatementCounter(db_engine)
+
+    def submit(images: list, hits: dict):
+        async def lookup_cached(detect_img_li, mode, tile_size):
+            pending = [idx for idx in range(len(detect_img_li)) if idx not in hits]
+            return dict(hits), pending, [f"key{idx}" for idx in range(len(detect_img_li))]
+
+        monkeypatch.setattr(detect_service, "lookup_cached", lookup_cached)
+
+        async def run():
+            jobs = await DetectJobManager().submit(AsyncSessionAdapter(db_session), images, "single", None)
+            await asyncio.sleep(0)
+            return jobs
+
+        return asyncio.run(run()), started, counter.statements
+
+    return submit
+
+
+def test_submit_inserts_rows_without_refresh(submitted, db_session):
+    jobs, started, statements = submitted(_images(3), {})
+
+    # flush 插入时取回主键，不逐行 refresh（PostgreSQL 上合并为一条批量 INSERT ... RETURNING，SQLite 逐行插入）
+    assert statements and all(sql.startswith("INSERT") for sql in statements)
+    assert [job["image_id"] for job in jobs] == [1, 2, 3]
+    assert {job["processing_status"] for job in jobs} == {"pending"}
+    assert [ids for ids, _, _ in started] == [[job["id"] for job in jobs]]
+    assert db_session.query(AIDiagnosis).count() == 3
+
+
+def test_submit_returns_cached_results_without_new_rows(submitted, db_session):
+    images = _images(3)
+    hit = {"id": 99, "image_id": 2, "detect_file_path": "/data", "detect_file_name": "1_IR_detect.jpg"}
+    jobs, started, _ = submitted(images, {1: hit})
+
+    assert jobs[1] == {"id": 99, "image_id": 2, "processing_status": "completed"}
+    assert [job["processing_status"] for job in jobs] == ["pending", "completed", "pending"]
+    # 只为未命中的图片插入记录，后台任务只检测未命中的图片
+    assert db_session.query(AIDiagnosis).count() == 2
+    ids, detect_img_li, cached = started[0]
+    assert ids == [jobs[0]["id"], jobs[2]["id"]]
+    assert [img["image_id"] for img in detect_img_li] == [1, 3]
+    assert cached == ({}, [0, 1], ["key0", "key2"])
+
+
+def test_submit_all_cached_starts_no_task(submitted, db_session):
+    hits = {0: {"id": 7, "image_id": 1}, 1: {"id": 8, "image_id": 2}}
+    jobs, started, statements = submitted(_images(2), hits)
+
+    assert [job["id"] for job in jobs] == [7, 8]
+    assert started == []
+    assert statements == []
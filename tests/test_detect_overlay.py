@@ -0,0 +1,31 @@
+"""
+检测叠加图保存测试：叠加图缩略图与叠加图一起在推理任务中生成
+"""
+import cv2
+import numpy as np
+import pytest
+
+from ai.ai_detect_img import draw_and_save
+from ai.preprocess import StageTimer
+from utils.derivative_store import derivative_store
+
+
+@pytest.fixture
+def source_image(save_folder):
+    path = save_folder / "112632_IR.jpg"
+    cv2.imwrite(str(path), np.full((1200, 1600), 90, dtype=np.uint8))
+    return path
+
+
+@pytest.mark.parametrize("boxes, class_ids", [([], []), ([[100, 100, 400, 300]], [0])])
+def test_overlay_thumbnail_generated_with_overlay(source_image, boxes, class_ids):
+    timer = StageTimer()
+    save_path, thumbnail_data = draw_and_save(str(source_image), boxes, class_ids, timer)
+
+    assert save_path.name == "112632_IR_detected.jpg"
+    assert save_path.exists()
+    resolved = derivative_store.resolve(thumbnail_data.rsplit("/", 1)[-1])
+    assert resolved is not None
+    thumbnail = cv2.imread(str(resolved[0]))
+    assert max(thumbnail.shape[:2]) == 512
+    assert "thumbnail" in timer.as_dict()
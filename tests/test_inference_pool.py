@@ -0,0 +1,82 @@
+"""
+推理工作池 process 模式测试：任务在专用推理进程中执行，并发的检测任务共用进程内的合批调度器
+"""
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from ai import batch_scheduler, inference_pool as inference_pool_module
+from ai.batch_scheduler import worker_scheduler_stats
+from ai.inference_pool import POOL_MODE_PROCESS, InferencePool
+from config import config
+
+
+def _fake_detect(i: int) -> np.ndarray:
+    """与 ai_detect 相同的调度器用法：标记进行中的请求并提交批次"""
+    scheduler = batch_scheduler.detect_scheduler
+    with scheduler.track():
+        return scheduler.infer(np.full((2, 1), i, dtype=np.float32))
+
+
+def _sleep(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _exit():
+    os._exit(1)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # 推理进程由 fork 创建，继承以下替换：不加载真实模型，以逐元素乘 2 代替推理，加大合批窗口使并发请求必然合批
+    monkeypatch.setattr(inference_pool_module, "_init_worker", lambda profile_counters: None)
+    monkeypatch.setattr(batch_scheduler.model_registry, "run_batch", lambda name, batch: batch * 2)
+    monkeypatch.setattr(batch_scheduler.detect_scheduler, "window", 1.0)
+    monkeypatch.setattr(config.config.inference, "pool_mode", POOL_MODE_PROCESS)
+    monkeypatch.setattr(config.config.inference, "pool_workers", 4)
+    pool = InferencePool()
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_process_mode_is_default():
+    assert type(config.config.inference).__dataclass_fields__["pool_mode"].default == POOL_MODE_PROCESS
+
+
+def test_concurrent_detect_jobs_merge_in_inference_process(pool):
+    async def run_all():
+        return await asyncio.gather(*(pool.run(_fake_detect, i) for i in range(4)))
+
+    outputs = asyncio.run(run_all())
+    stats = asyncio.run(pool.run(worker_scheduler_stats))
+
+    for i, output in enumerate(outputs):
+        np.testing.assert_array_equal(output, np.full((2, 1), i * 2, dtype=np.float32))
+    # 任务在推理进程中执行，并发请求合并为一个批次
+    assert stats["pid"] != os.getpid()
+    assert stats["total_requests"] == 4
+    assert stats["merged_batches"] >= 1
+    assert stats["total_batches"] < 4
+
+
+def test_cancelled_job_result_ignored(pool):
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run(_sleep, 0.5), timeout=0.05)
+        return await pool.run(_sleep, 0)
+
+    assert asyncio.run(run()) != os.getpid()
+
+
+def test_process_exit_fails_pending_and_rebuilds(pool):
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(pool.run(_exit))
+
+    # 下次提交时重建推理进程
+    assert asyncio.run(pool.run(_sleep, 0)) != os.getpid()
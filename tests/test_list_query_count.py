@@ -0,0 +1,89 @@
+"""
+列表接口语句数测试：关联信息按表批量查询，每个请求的 SQL 语句数不随每页条数增长
+"""
+from datetime import date, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import AsyncSessionAdapter, StatementCounter, auth_headers
+from database import get_async_db, get_db
+from interface import diagnosis_record, examination
+from models import DiagnosisRecord, Examination, ExaminationType, Patient, User
+
+PAGE_SIZES = (1, 10, 50)
+RECORD_COUNT = 60
+
+
+def seed(session):
+    """插入医生、检查类型各若干，及 RECORD_COUNT 条检查记录与对应的诊断记录"""
+    users = [User(username=f"doctor{i}", password_hash="x", full_name=f"医生{i}") for i in range(5)]
+    types = [ExaminationType(type_code=f"T{i}", type_name=f"检查类型{i}") for i in range(3)]
+    patient = Patient(patient_id="P0001", name="测试患者")
+    session.add_all([*users, *types, patient])
+    session.flush()
+    examinations = [
+        Examination(
+            examination_number=f"EX{i:06d}",
+            patient_id=patient.id,
+            examination_type_id=types[i % len(types)].id,
+            doctor_id=users[i % len(users)].id,
+            technician_id=users[(i + 1) % len(users)].id,
+            examination_date=date(2025, 1, 1) + timedelta(days=i)
+        )
+        for i in range(RECORD_COUNT)
+    ]
+    session.add_all(examinations)
+    session.flush()
+    session.add_all(
+        DiagnosisRecord(examination_id=exam.id, doctor_id=exam.doctor_id,
+                        diagnosis_type="primary", diagnosis_name="测试诊断")
+        for exam in examinations
+    )
+    session.commit()
+
+
+@pytest.fixture
+def client(db_engine, db_session):
+    seed(db_session)
+    app = FastAPI()
+    app.include_router(examination.router, prefix="/api/examinations")
+    app.include_router(diagnosis_record.router, prefix="/api/diagnosis-records")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_async_db] = lambda: AsyncSessionAdapter(db_session)
+    return TestClient(app), StatementCounter(db_engine)
+
+
+@pytest.mark.parametrize("path, permission", [
+    ("/api/examinations/", "EXAMINATION_VIEW"),
+    ("/api/diagnosis-records/", "DIAGNOSIS_VIEW"),
+])
+def test_statement_count_independent_of_page_size(client, path, permission):
+    client, counter = client
+    counts = {}
+    for page_size in PAGE_SIZES:
+        counter.reset()
+        response = client.get(path, params={"page_size": page_size, "fields": "*"},
+                              headers=auth_headers(permission))
+        body = response.json()
+        assert body["code"] == 200, body["msg"]
+        assert len(body["data"]["items"]) == page_size
+        assert body["data"]["total"] == RECORD_COUNT
+        counts[page_size] = counter.count
+
+    # 分页查询（含窗口计数）1 次，两张关联表各 1 次 IN 查询
+    assert set(counts.values()) == {3}, counts
+
+
+def test_relations_filled_from_batched_queries(client):
+    client, _ = client
+    response = client.get("/api/examinations/", params={"page_size": 5, "fields": "id,doctor,technician"},
+                          headers=auth_headers("EXAMINATION_VIEW"))
+    items = response.json()["data"]["items"]
+
+    assert len(items) == 5
+    for item in items:
+        assert set(item) == {"id", "doctor", "technician"}
+        assert item["doctor"]["username"].startswith("doctor")
+        assert item["technician"]["id"] != item["doctor"]["id"]
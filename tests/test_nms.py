@@ -0,0 +1,41 @@
+"""
+向量化NMS测试
+"""
+import numpy as np
+
+from ai.nms import nms_indices
+
+
+def test_per_class_nms_with_negative_coordinates():
+    # 两个类别的框大部分位于图像左上角外侧（坐标为负），最大坐标接近 0
+    boxes = np.array([
+        [-100, -100, 2, 2],
+        [-98, -99, 2, 1],
+        [-101, -100, 1, 2],
+        [-99, -101, 2, 1],
+    ], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.85, 0.7])
+    class_ids = np.array([0, 0, 1, 1])
+
+    keep = nms_indices(boxes, scores, 0.5, class_ids=class_ids, agnostic=False)
+
+    # 每个类别各保留置信度最高的一个，不同类别之间不抑制
+    assert sorted(keep.tolist()) == [0, 2]
+
+
+def test_per_class_nms_keeps_disjoint_classes_apart():
+    # 类别1的框平移后不应与类别0原位置的框重叠
+    boxes = np.array([[-5, -5, 5, 5], [100, 100, 110, 110], [-5, -5, 5, 5]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7])
+
+    keep = nms_indices(boxes, scores, 0.5, class_ids=np.array([0, 1, 2]), agnostic=False)
+
+    assert sorted(keep.tolist()) == [0, 1, 2]
+
+
+def test_agnostic_nms_suppresses_across_classes():
+    boxes = np.array([[-30, -30, 10, 10], [-31, -30, 9, 12]], dtype=np.float32)
+
+    keep = nms_indices(boxes, [0.9, 0.8], 0.5, class_ids=[0, 1], agnostic=True)
+
+    assert keep.tolist() == [0]
@@ -0,0 +1,178 @@
+"""
+分页查询测试：窗口计数、估算计数、页码超出范围与游标分页
+"""
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from conftest import AsyncSessionAdapter, StatementCounter
+from models import Examination, ExaminationType, Patient
+from utils import pagination
+from utils.pagination import decode_cursor, encode_cursor, paginate, paginate_async
+
+RECORD_COUNT = 25
+
+
+@pytest.fixture
+def session(db_session):
+    exam_type = ExaminationType(type_code="T0", type_name="检查类型")
+    patient = Patient(patient_id="P0001", name="测试患者")
+    db_session.add_all([exam_type, patient])
+    db_session.flush()
+    db_session.add_all(
+        Examination(examination_number=f"EX{i:06d}", patient_id=patient.id, examination_type_id=exam_type.id,
+                    examination_date=date(2025, 1, 1) + timedelta(days=i // 3))
+        for i in range(RECORD_COUNT)
+    )
+    db_session.commit()
+    return db_session
+
+
+def _stmt():
+    return select(Examination.id, Examination.examination_number).order_by(Examination.id)
+
+
+def test_exact_count_in_one_statement(session, db_engine):
+    counter = StatementCounter(db_engine)
+    page = paginate(session, _stmt(), page=2, page_size=10)
+
+    assert counter.count == 1
+    assert [row.id for row in page.items] == list(range(11, 21))
+    assert page.meta == {"total": RECORD_COUNT, "page": 2, "page_size": 10, "total_pages": 3,
+                         "total_estimated": False}
+
+
+def test_exact_count_async(session):
+    page = asyncio.run(paginate_async(AsyncSessionAdapter(session), _stmt(), page=3, page_size=10))
+
+    assert len(page.items) == 5
+    assert page.total == RECORD_COUNT
+
+
+def test_single_entity_returns_entities(session):
+    page = paginate(session, select(Examination).order_by(Examination.id), page=1, page_size=3)
+
+    assert all(isinstance(item, Examination) for item in page.items)
+    assert page.total == RECORD_COUNT
+
+
+def test_out_of_range_page_falls_back_to_count(session, db_engine):
+    counter = StatementCounter(db_engine)
+    page = asyncio.run(paginate_async(AsyncSessionAdapter(session), _stmt(), page=9, page_size=10))
+
+    # 窗口计数没有返回行，单独计数
+    assert page.items == []
+    assert page.total == RECORD_COUNT
+    assert counter.count == 2
+
+
+def test_empty_first_page_skips_count(session, db_engine):
+    counter = StatementCounter(db_engine)
+    page = paginate(session, _stmt().where(Examination.id < 0), page=1, page_size=10)
+
+    assert page.total == 0
+    assert counter.count == 1
+
+
+def _fake_explain(rows: int):
+    """SQLite 没有 EXPLAIN (FORMAT JSON)，以返回同样结构的查询代替"""
+    plan = json.dumps([{"Plan": {"Plan Rows": rows}}])
+    return lambda stmt, dialect: ("SELECT ?", (plan,))
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_estimate_uses_planner_rows(session, monkeypatch, asynchronous):
+    monkeypatch.setattr(pagination, "_explain_sql", _fake_explain(1000))
+    if asynchronous:
+        page = asyncio.run(paginate_async(AsyncSessionAdapter(session), _stmt(), 1, 10, count="estimate"))
+    else:
+        page = paginate(session, _stmt(), 1, 10, count="estimate")
+
+    assert len(page.items) == 10
+    assert page.total == 1000
+    assert page.meta["total_estimated"] is True
+
+
+def test_estimate_not_below_rows_fetched(session, monkeypatch):
+    monkeypatch.setattr(pagination, "_explain_sql", _fake_explain(3))
+    page = paginate(session, _stmt(), page=2, page_size=10, count="estimate")
+
+    assert page.total == 20
+
+
+def test_explain_sql_for_postgresql():
+    sql, params = pagination._explain_sql(_stmt().where(Examination.id.in_([1, 2])), postgresql.dialect())
+
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "ORDER BY" not in sql
+    assert list(params.values()) == [1, 2]
+
+
+def test_plan_rows_accepts_text_and_parsed_json():
+    plan = [{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}]
+
+    assert pagination._plan_rows(plan) == 42
+    assert pagination._plan_rows(json.dumps(plan)) == 42
+
+
+KEYSET = (Examination.examination_date, Examination.id)
+
+
+def _keyset_stmt():
+    return select(Examination.id, Examination.examination_date)
+
+
+def test_cursor_round_trip():
+    values = (datetime(2025, 3, 1, 8, 30, 15, 123456), 42)
+    assert decode_cursor(encode_cursor(values)) == values
+    assert decode_cursor(encode_cursor((date(2025, 3, 1), 7))) == (date(2025, 3, 1), 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor([1]), encode_cursor([1, 2, 3]),
+                                    "eyJkdCI6MX0", encode_cursor([{"x": 1}, 2])])
+def test_invalid_cursor_rejected(cursor):
+    with pytest.raises(ValueError, match="无效的分页游标"):
+        decode_cursor(cursor)
+
+
+def test_cursor_pages_cover_all_rows_in_order(session):
+    adapter = AsyncSessionAdapter(session)
+    seen, cursor = [], None
+    while True:
+        page = asyncio.run(paginate_async(adapter, _keyset_stmt(), 1, 10, keyset=KEYSET, cursor=cursor))
+        assert page.total == RECORD_COUNT
+        seen.extend((row.examination_date, row.id) for row in page.items)
+        cursor = page.meta["next_cursor"]
+        if cursor is None:
+            break
+
+    # 按 (examination_date, id) 倒序，不重不漏（同一日期有多行）
+    expected = session.execute(select(*KEYSET).order_by(KEYSET[0].desc(), KEYSET[1].desc())).all()
+    assert seen == [tuple(row) for row in expected]
+    assert len(seen) == RECORD_COUNT
+
+
+def test_next_cursor_encodes_last_row(session):
+    page = paginate(session, _keyset_stmt(), 1, 10, keyset=KEYSET)
+    last = page.items[-1]
+
+    assert decode_cursor(page.next_cursor) == (last.examination_date, last.id)
+    # 未取满一页时没有下一页
+    assert paginate(session, _keyset_stmt(), 1, 100, keyset=KEYSET).next_cursor is None
+
+
+def test_cursor_mode_ignores_page_offset(session):
+    first = paginate(session, _keyset_stmt(), 1, 10, keyset=KEYSET)
+    after = paginate(session, _keyset_stmt(), 5, 10, keyset=KEYSET, cursor=first.next_cursor)
+
+    assert after.items[0].id != first.items[-1].id
+    assert (after.items[0].examination_date, after.items[0].id) < (first.items[-1].examination_date,
+                                                                     first.items[-1].id)
+
+
+def test_meta_without_keyset_has_no_cursor(session):
+    assert "next_cursor" not in paginate(session, _keyset_stmt(), 1, 10).meta
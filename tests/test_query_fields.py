@@ -0,0 +1,75 @@
+"""
+列表接口稀疏字段集（fields= 参数）测试
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import AsyncSessionAdapter, auth_headers
+from database import get_async_db
+from interface import examination
+from interface.examination import EXAMINATION_FIELDS
+from models import Examination
+
+HEAVY = set(EXAMINATION_FIELDS.heavy)
+
+
+def test_default_excludes_heavy_fields():
+    names = EXAMINATION_FIELDS.resolve(None)
+
+    assert "id" in names
+    assert "examination_number" in names
+    assert not HEAVY & set(names)
+    # 关联信息默认返回
+    assert set(EXAMINATION_FIELDS.relations) <= set(names)
+    assert EXAMINATION_FIELDS.resolve("  ") == names
+
+
+def test_star_returns_all_fields():
+    names = EXAMINATION_FIELDS.resolve("*")
+
+    assert HEAVY <= set(names)
+    assert names == EXAMINATION_FIELDS.columns + list(EXAMINATION_FIELDS.relations)
+
+
+def test_heavy_field_opt_in():
+    names = EXAMINATION_FIELDS.resolve("examination_number, chief_complaint")
+
+    # id 总是包含，按响应模型的字段顺序输出
+    assert names == ["id", "examination_number", "chief_complaint"]
+    assert HEAVY & set(names) == {"chief_complaint"}
+
+
+def test_unknown_field_rejected():
+    with pytest.raises(ValueError, match="password_hash"):
+        EXAMINATION_FIELDS.resolve("id,password_hash")
+
+
+def test_select_expands_relation_to_foreign_key():
+    columns = EXAMINATION_FIELDS.select(EXAMINATION_FIELDS.resolve("doctor,examination_type"))
+
+    assert set(columns) == {Examination.id, Examination.doctor_id, Examination.examination_type_id}
+
+
+def test_to_dict_and_related_ids_follow_requested_fields():
+    names = EXAMINATION_FIELDS.resolve("doctor")
+    rows = [Examination(id=1, doctor_id=7, technician_id=8), Examination(id=2, doctor_id=None, technician_id=9),
+            Examination(id=3, doctor_id=7, technician_id=None)]
+
+    # 外键列只用于填充关联信息，不输出
+    assert EXAMINATION_FIELDS.to_dict(rows[0], names) == {"id": 1}
+    # 去重、去空；未请求的关联（technician）不查询
+    assert EXAMINATION_FIELDS.related_ids(rows, names, "doctor", "technician") == {7}
+
+
+def test_endpoint_rejects_unknown_field_with_400(db_session):
+    app = FastAPI()
+    app.include_router(examination.router, prefix="/api/examinations")
+    app.dependency_overrides[get_async_db] = lambda: AsyncSessionAdapter(db_session)
+
+    response = TestClient(app).get("/api/examinations/", params={"fields": "id,nonexistent"},
+                                   headers=auth_headers("EXAMINATION_VIEW"))
+
+    body = response.json()
+    assert body["code"] == 400
+    assert "nonexistent" in body["msg"]
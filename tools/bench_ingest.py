@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+拍摄图像入库流程基准测试
+对比原流程（PIL 逐张生成缩略图、cv2.imread 重新读取 IR/Green 通道、重新读取合成结果生成缩略图）
+与解码一次的入库流水线（utils/ingest.py，各通道并行处理）处理一组四通道拍摄图像的 CPU 耗时与墙钟耗时
+
+彩色化模型本身的耗时两种流程相同，这里以通道合并代替模型推理，只比较解码与编码开销
+
+用法（在项目根目录执行）:
+    python -m tools.bench_ingest [--images /path/to/capture_dir] [--size 2048] [--repeat 10]
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from ai.preprocess import StageTimer
+from tools.bench_thumbnail import legacy_full_res
+from utils.ingest import channel_of, encode_thumbnail, ingest_files, save_image
+
+
+def fake_colorize(r_channel: np.ndarray, g_channel: np.ndarray) -> np.ndarray:
+    """以通道合并代替彩色化模型推理"""
+    return cv2.merge([g_channel, g_channel, r_channel])
+
+
+def legacy_ingest(paths: list[str], save_path: str):
+    """原流程：缩略图、彩色合成输入、合成结果缩略图各自重新解码文件"""
+    channels = {}
+    for path in paths:
+        os.stat(path)
+        legacy_full_res(path)
+        channels[channel_of(os.path.basename(path))] = path
+    r_channel = cv2.imread(channels["ir"], 0)
+    g_channel = cv2.imread(channels["green"], 0)
+    cv2.imwrite(save_path, fake_colorize(r_channel, g_channel))
+    os.stat(save_path)
+    legacy_full_res(save_path)
+
+
+def pipeline_ingest(paths: list[str], save_path: str):
+    """入库流水线：每个文件只解码一次（非合成通道只按缩略图尺寸解码），合成结果直接生成缩略图"""
+    timer = StageTimer()
+    images = {channel_of(img.path.name): img
+              for img in ingest_files(paths, timer, keep_pixels=("ir", "green"))}
+    colored = fake_colorize(images["ir"].gray, images["green"].gray)
+    save_image(colored, save_path, timer)
+    encode_thumbnail(colored, timer)
+    return timer
+
+
+def make_capture(directory: str, size: int) -> list[str]:
+    """生成一组模拟的四通道灰度拍摄图像"""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:size, 0:size]
+    base = (127 + 100 * np.sin(xx / 50.0) * np.cos(yy / 70.0)).astype(np.float32)
+    paths = []
+    for suffix in ("_IR.jpg", "_G.jpg", "_R.jpg", "_B.jpg"):
+        img = np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype(np.uint8)
+        path = os.path.join(directory, f"150447{suffix}")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(path)
+    return paths
+
+
+def measure(fn, paths: list[str], save_path: str, repeat: int) -> tuple[list[float], list[float]]:
+    """返回每次执行的 CPU 耗时与墙钟耗时（毫秒）"""
+    fn(paths, save_path)
+    cpu_samples, wall_samples = [], []
+    for _ in range(repeat):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        fn(paths, save_path)
+        cpu_samples.append((time.process_time() - cpu_start) * 1000)
+        wall_samples.append((time.perf_counter() - wall_start) * 1000)
+    return cpu_samples, wall_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="拍摄图像入库流程基准测试")
+    parser.add_argument("--images", help="包含 *_IR.jpg/_G.jpg/_R.jpg/_B.jpg 的拍摄目录，缺省生成模拟图像")
+    parser.add_argument("--size", type=int, default=2048, help="模拟图像边长")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.images:
+            paths = [path for path in sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+                     if channel_of(os.path.basename(path))]
+        else:
+            paths = make_capture(directory, args.size)
+        save_path = os.path.join(directory, "color.jpg")
+
+        for title, fn in (("原流程", legacy_ingest), ("解码一次流水线", pipeline_ingest)):
+            cpu_samples, wall_samples = measure(fn, paths, save_path, args.repeat)
+            print(f"[{title}] 每组拍摄 CPU 耗时: 平均 {np.mean(cpu_samples):.1f}ms, "
+                  f"最小 {np.min(cpu_samples):.1f}ms; 墙钟耗时: 平均 {np.mean(wall_samples):.1f}ms"
+                  f"（{len(paths)} 张输入，{os.cpu_count()} 核）")
+        print(f"    流水线各阶段耗时(ms): {pipeline_ingest(paths, save_path).as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+列表接口关联查询基准测试（N+1 检查）
+在进程内（httpx ASGITransport）请求检查记录与诊断记录列表接口，统计每个请求执行的 SQL 语句数与延迟，
+按 page_size 逐级对比：关联信息按表批量查询时，语句数不随每页条数增长；增长时以非零状态码退出，可用于发布前检查。
+另在同一页数据上对比逐行查询关联信息（原实现，每行最多 3 次查询）与按表 IN 批量查询的语句数与耗时
+
+需连接已有数据的数据库；指定 --seed N 时先插入 N 条检查记录及对应的诊断记录（编号前缀 BENCH-），结束后删除
+
+用法（在项目根目录执行）:
+    python -m tools.bench_list_queries [--seed 200] [--page-sizes 1 10 100] [--repeat 20]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+from sqlalchemy import delete, event, select
+
+from database import db
+from interface.diagnosis_record import DIAGNOSIS_RECORD_FIELDS
+from interface.examination import EXAMINATION_FIELDS
+from main import app
+from models import DiagnosisRecord, Examination, ExaminationType, Patient, User
+from utils.jwt_auth import create_token_pair
+from utils.query_fields import load_by_ids
+
+# 压测的列表接口与所需权限
+LIST_PATHS = {
+    "/api/examinations/": "EXAMINATION_VIEW",
+    "/api/diagnosis-records/": "DIAGNOSIS_VIEW",
+}
+SEED_PREFIX = "BENCH-"
+
+
+class StatementCounter:
+    """统计同步引擎与异步引擎执行的 SQL 语句数"""
+
+    def __init__(self):
+        self.count = 0
+        self._engines = [db._engine, db._async_engine.sync_engine]
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+# ==================== 测试数据 ====================
+
+def seed(count: int) -> str:
+    """插入 count 条检查记录（医生、技师轮流取已有用户）及每条一个诊断记录，返回本次数据的编号前缀"""
+    prefix = f"{SEED_PREFIX}{uuid.uuid4().hex[:8]}-"
+    with db._session_factory() as session:
+        user_ids = session.scalars(select(User.id).order_by(User.id)).all()
+        type_ids = session.scalars(select(ExaminationType.id).order_by(ExaminationType.id)).all()
+        if not user_ids or not type_ids:
+            raise SystemExit("数据库中没有用户或检查类型，请先执行 init_database")
+        patient = Patient(patient_id=f"{prefix}P", name="基准测试患者")
+        session.add(patient)
+        session.flush()
+        examinations = [
+            Examination(
+                examination_number=f"{prefix}{i:06d}",
+                patient_id=patient.id,
+                examination_type_id=type_ids[i % len(type_ids)],
+                doctor_id=user_ids[i % len(user_ids)],
+                technician_id=user_ids[(i + 1) % len(user_ids)],
+                examination_date=date.today() - timedelta(days=i % 365)
+            )
+            for i in range(count)
+        ]
+        session.add_all(examinations)
+        session.flush()
+        session.add_all(
+            DiagnosisRecord(examination_id=exam.id, doctor_id=exam.doctor_id,
+                            diagnosis_type="primary", diagnosis_name="基准测试诊断")
+            for exam in examinations
+        )
+        session.commit()
+    print(f"已插入测试数据: 检查记录 {count} 条、诊断记录 {count} 条（编号前缀 {prefix}）")
+    return prefix
+
+
+def cleanup(prefix: str):
+    """删除 seed 插入的测试数据"""
+    with db._session_factory() as session:
+        exam_ids = select(Examination.id).where(Examination.examination_number.startswith(prefix))
+        session.execute(delete(DiagnosisRecord).where(DiagnosisRecord.examination_id.in_(exam_ids)))
+        session.execute(delete(Examination).where(Examination.examination_number.startswith(prefix)))
+        session.execute(delete(Patient).where(Patient.patient_id == f"{prefix}P"))
+        session.commit()
+    print("已删除测试数据")
+
+
+# ==================== 接口语句数 ====================
+
+def make_token() -> str:
+    with db._session_factory() as session:
+        user = session.scalars(select(User).order_by(User.id)).first()
+    if user is None:
+        raise SystemExit("数据库中没有用户，请先执行 init_database")
+    return create_token_pair(user.id, user.username, user.user_type,
+                             permissions=list(LIST_PATHS.values()))["access_token"]
+
+
+async def bench_endpoints(page_sizes: list[int], repeat: int) -> bool:
+    """
+    按 page_size 逐级请求列表接口，输出每个请求的语句数与延迟
+
+    Returns:
+        各接口的语句数是否都不随 page_size 增长
+    """
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    passed = True
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        print(f"{'接口':<28} {'每页':>6} {'行数':>6} {'语句数':>8} {'p50(ms)':>10} {'p95(ms)':>10}")
+        for path in LIST_PATHS:
+            statements = set()
+            for page_size in page_sizes:
+                params = {"page_size": page_size, "fields": "*"}
+                with StatementCounter() as counter:
+                    response = await client.get(path, params=params)
+                body = response.json()
+                if body.get("code") != 200:
+                    raise SystemExit(f"请求 {path} 失败: {body.get('msg')}")
+                rows = len(body["data"]["items"])
+                latencies = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    await client.get(path, params=params)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                p50, p95 = np.percentile(latencies, [50, 95])
+                print(f"{path:<28} {page_size:>6} {rows:>6} {counter.count:>8} {p50:>10.1f} {p95:>10.1f}")
+                # 只有取满多行时语句数才能反映是否逐行查询
+                if rows > 1:
+                    statements.add(counter.count)
+            if len(statements) > 1:
+                print(f"  !! {path} 的语句数随每页条数变化: {sorted(statements)}")
+                passed = False
+    return passed
+
+
+# ==================== 逐行查询与批量查询对比 ====================
+
+def per_row_relations(session, exams, records):
+    """原实现：逐行查询关联的检查类型、医生、技师与检查"""
+    for exam in exams:
+        session.scalar(select(ExaminationType).where(ExaminationType.id == exam.examination_type_id))
+        if exam.doctor_id:
+            session.scalar(select(User).where(User.id == exam.doctor_id))
+        if exam.technician_id:
+            session.scalar(select(User).where(User.id == exam.technician_id))
+    for record in records:
+        session.scalar(select(User).where(User.id == record.doctor_id))
+        session.scalar(select(Examination).where(Examination.id == record.examination_id))
+
+
+def batched_relations(session, exams, records):
+    """批量实现：每张关联表一次 IN 查询"""
+    exam_names = list(EXAMINATION_FIELDS.relations)
+    record_names = list(DIAGNOSIS_RECORD_FIELDS.relations)
+    load_by_ids(session, ExaminationType, EXAMINATION_FIELDS.related_ids(exams, exam_names, "examination_type"))
+    load_by_ids(session, User, EXAMINATION_FIELDS.related_ids(exams, exam_names, "doctor", "technician"))
+    load_by_ids(session, User, DIAGNOSIS_RECORD_FIELDS.related_ids(records, record_names, "doctor"))
+    load_by_ids(session, Examination, DIAGNOSIS_RECORD_FIELDS.related_ids(records, record_names, "examination"))
+
+
+def bench_relations(page_size: int, repeat: int):
+    """在同一页数据上对比两种关联查询方式的语句数与耗时"""
+    with db._session_factory() as session:
+        exams = session.execute(select(Examination.examination_type_id, Examination.doctor_id,
+                                       Examination.technician_id)
+                                .order_by(Examination.examination_date.desc(), Examination.id.desc())
+                                .limit(page_size)).all()
+        records = session.execute(select(DiagnosisRecord.doctor_id, DiagnosisRecord.examination_id)
+                                  .order_by(DiagnosisRecord.id.desc()).limit(page_size)).all()
+        print(f"\n关联查询对比（检查记录 {len(exams)} 行 + 诊断记录 {len(records)} 行）")
+        print(f"{'方式':<10} {'语句数':>8} {'p50(ms)':>10} {'p95(ms)':>10}")
+        for name, fn in (("逐行查询", per_row_relations), ("批量查询", batched_relations)):
+            with StatementCounter() as counter:
+                fn(session, exams, records)
+            latencies = []
+            for _ in range(repeat):
+                # 清空会话标识映射，避免重复查询命中已加载的实体
+                session.expunge_all()
+                start = time.perf_counter()
+                fn(session, exams, records)
+                latencies.append((time.perf_counter() - start) * 1000)
+            p50, p95 = np.percentile(latencies, [50, 95])
+            print(f"{name:<10} {counter.count:>8} {p50:>10.1f} {p95:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表接口关联查询基准测试")
+    parser.add_argument("--seed", type=int, default=0, help="插入的测试检查记录数（结束后删除），0 表示使用已有数据")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[1, 10, 100], help="各级每页条数")
+    parser.add_argument("--repeat", type=int, default=20, help="每级重复请求次数")
+    args = parser.parse_args()
+
+    prefix = seed(args.seed) if args.seed else None
+    try:
+        passed = asyncio.run(bench_endpoints(args.page_sizes, args.repeat))
+        bench_relations(max(args.page_sizes), args.repeat)
+    finally:
+        if prefix:
+            cleanup(prefix)
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+NMS 性能对比工具
+对比原逐框循环实现与 ai/nms.py 向量化实现的耗时，并校验两者结果一致
+
+用法（在项目根目录执行）:
+    python -m tools.bench_nms [--candidates 8400] [--repeat 20]
+"""
+import argparse
+import time
+
+import numpy as np
+from loguru import logger
+
+from ai.nms import nms_indices, yolo_nms
+
+
+# ==================== 原实现（逐框Python循环，作为对照） ====================
+
+@logger.catch
+def legacy_compute_iou(b1, b2):
+    x1 = max(b1[0], b2[0])
+    y1 = max(b1[1], b2[1])
+    x2 = min(b1[2], b2[2])
+    y2 = min(b1[3], b2[3])
+    inter_area = max(0, x2 - x1) * max(0, y2 - y1)
+    area1 = (b1[2] - b1[0]) * (b1[3] - b1[1])
+    area2 = (b2[2] - b2[0]) * (b2[3] - b2[1])
+    union_area = area1 + area2 - inter_area
+    return inter_area / union_area if union_area > 0 else 0
+
+
+@logger.catch
+def legacy_non_max_suppression(boxes, scores, class_ids, iou_threshold=0.5):
+    if not boxes:
+        return [], [], []
+    boxes_arr = np.array(boxes)
+    scores_arr = np.array(scores)
+    order = np.argsort(scores_arr)[::-1]
+    keep_idx = []
+    while order.size > 0:
+        i = order[0]
+        keep_idx.append(i)
+        ious = np.array([legacy_compute_iou(boxes_arr[i], boxes_arr[j])
+                        for j in order[1:]])
+        indices = np.where(ious < iou_threshold)[0]
+        order = order[indices + 1]
+    return boxes_arr[keep_idx].tolist(), [scores[i] for i in keep_idx], [class_ids[i] for i in keep_idx]
+
+
+@logger.catch
+def legacy_get_inter(box1, box2):
+    box1_x1, box1_y1, box1_x2, box1_y2 = box1[0] - box1[2] / 2, box1[1] - box1[3] / 2, \
+        box1[0] + box1[2] / 2, box1[1] + box1[3] / 2
+    box2_x1, box2_y1, box2_x2, box2_y2 = box2[0] - box2[2] / 2, box2[1] - box2[3] / 2, \
+        box2[0] + box2[2] / 2, box2[1] + box2[3] / 2
+    if box1_x1 > box2_x2 or box1_x2 < box2_x1:
+        return 0
+    if box1_y1 > box2_y2 or box1_y2 < box2_y1:
+        return 0
+    x_list = np.sort([box1_x1, box1_x2, box2_x1, box2_x2])
+    y_list = np.sort([box1_y1, box1_y2, box2_y1, box2_y2])
+    return (x_list[2] - x_list[1]) * (y_list[2] - y_list[1])
+
+
+@logger.catch
+def legacy_get_iou(box1, box2, inter_area):
+    union = box1[2] * box1[3] + box2[2] * box2[3] - inter_area
+    return inter_area / union
+
+
+@logger.catch
+def legacy_nms(pred, conf_thres, iou_thres):
+    box = pred[pred[..., 4] > conf_thres]
+    if len(box) == 0:
+        return []
+    cls = [int(np.argmax(c)) for c in box[..., 5:]]
+    output_box = []
+    for clss in set(cls):
+        cls_box = []
+        for j in range(len(cls)):
+            if cls[j] == clss:
+                box[j][5] = clss
+                cls_box.append(box[j][:6])
+        cls_box = np.array(cls_box)
+        cls_box = cls_box[np.argsort(cls_box[..., 4])[::-1]]
+        while len(cls_box) > 0:
+            max_conf_box = cls_box[0]
+            output_box.append(max_conf_box)
+            cls_box = np.delete(cls_box, 0, 0)
+            if len(cls_box) == 0:
+                break
+            del_index = []
+            for j in range(len(cls_box)):
+                inter = legacy_get_inter(max_conf_box, cls_box[j])
+                if legacy_get_iou(max_conf_box, cls_box[j], inter) > iou_thres:
+                    del_index.append(j)
+            if del_index:
+                cls_box = np.delete(cls_box, del_index, 0)
+    return output_box
+
+
+# ==================== 测试数据 ====================
+
+def make_yolo_pred(candidates: int, num_classes: int = 3, seed: int = 0) -> np.ndarray:
+    """
+    生成模拟的YOLO输出（已插入置信度列）
+    每行格式: [cx, cy, w, h, conf, cls_0, cls_1, ...]
+    检测框围绕若干目标聚集，以模拟真实输出中的大量重叠框
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(50, 590, size=(40, 2))
+    idx = rng.integers(0, len(centers), size=candidates)
+    cxcy = centers[idx] + rng.normal(0, 6, size=(candidates, 2))
+    wh = rng.uniform(10, 120, size=(candidates, 2))
+    # 真实输出中绝大多数候选框置信度很低，仅少量通过置信度阈值
+    cls_scores = rng.uniform(0, 1, size=(candidates, num_classes)) ** 60
+    conf = cls_scores.max(axis=1, keepdims=True)
+    return np.hstack([cxcy, wh, conf, cls_scores]).astype(np.float32)
+
+
+def timeit(fn, repeat: int) -> float:
+    """返回多次执行的中位耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NMS 性能对比")
+    parser.add_argument("--candidates", type=int, default=8400, help="YOLO候选框数量")
+    parser.add_argument("--conf", type=float, default=0.25, help="置信度阈值")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    pred = make_yolo_pred(args.candidates)
+    survivors = int((pred[:, 4] > args.conf).sum())
+    print(f"候选框: {args.candidates}, 置信度过滤后: {survivors}")
+
+    # 单通道阶段：按类别NMS
+    legacy_out = legacy_nms(pred.copy(), args.conf, 0.7)
+    new_out = yolo_nms(pred, args.conf, 0.7)
+    assert len(legacy_out) == len(new_out), f"结果数量不一致: {len(legacy_out)} != {len(new_out)}"
+    t_legacy = timeit(lambda: legacy_nms(pred.copy(), args.conf, 0.7), args.repeat)
+    t_new = timeit(lambda: yolo_nms(pred, args.conf, 0.7), args.repeat)
+    print(f"[单通道 按类别NMS] 原实现: {t_legacy:.2f}ms, 向量化: {t_new:.2f}ms, "
+          f"加速比: {t_legacy / t_new:.1f}x, 保留框: {len(new_out)}")
+
+    # 彩图聚合阶段：类别无关NMS（模拟多通道检测结果合并）
+    dets = np.concatenate([yolo_nms(make_yolo_pred(args.candidates, seed=s), args.conf, 0.7)
+                           for s in range(4)])
+    boxes = np.column_stack([dets[:, 0] - dets[:, 2] / 2, dets[:, 1] - dets[:, 3] / 2,
+                             dets[:, 0] + dets[:, 2] / 2, dets[:, 1] + dets[:, 3] / 2]).tolist()
+    scores = dets[:, 4].tolist()
+    class_ids = dets[:, 5].astype(int).tolist()
+    legacy_keep = legacy_non_max_suppression(boxes, scores, class_ids, 0.5)[0]
+    new_keep = nms_indices(boxes, scores, 0.5)
+    assert len(legacy_keep) == len(new_keep), f"结果数量不一致: {len(legacy_keep)} != {len(new_keep)}"
+    t_legacy = timeit(lambda: legacy_non_max_suppression(boxes, scores, class_ids, 0.5), args.repeat)
+    t_new = timeit(lambda: nms_indices(boxes, scores, 0.5), args.repeat)
+    print(f"[彩图聚合 类别无关NMS] 输入框: {len(boxes)}, 原实现: {t_legacy:.2f}ms, 向量化: {t_new:.2f}ms, "
+          f"加速比: {t_legacy / t_new:.1f}x, 保留框: {len(new_keep)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+模型输入预处理性能对比工具
+对比原实现（全分辨率解码 + float64 归一化）与 ai/preprocess.py（DCT域降采样解码 +
+复用 float32 缓冲区）的各阶段耗时与峰值内存
+
+用法（在项目根目录执行）:
+    python -m tools.bench_preprocess [--size 2048] [--images 4] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from ai.preprocess import BatchBuffer, StageTimer, load_batch
+
+INPUT_SIZE = 640
+
+
+def legacy_load_batch(paths: list[str]) -> np.ndarray:
+    """原实现：全分辨率解码、复制、缩放后经 float64 中间数组归一化"""
+    batch = np.empty((len(paths), 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+    for n, path in enumerate(paths):
+        img = cv2.imread(path)
+        img0 = img.copy()  # noqa: F841 原实现中保留的副本
+        img_resized = cv2.resize(img, (INPUT_SIZE, INPUT_SIZE))
+        img_resized = img_resized / 255.0
+        batch[n] = np.transpose(img_resized, (2, 0, 1)).astype(np.float32)
+    return batch
+
+
+def make_images(directory: str, size: int, count: int) -> list[str]:
+    """生成模拟眼底图的JPEG文件"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        img = cv2.GaussianBlur(rng.integers(0, 255, (size, size, 3), dtype=np.uint8), (31, 31), 0)
+        cv2.circle(img, (size // 2, size // 2), size // 3, (40, 80, 160), -1)
+        path = os.path.join(directory, f"bench_{i}_IR.jpg")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(path)
+    return paths
+
+
+def measure(fn, repeat: int) -> tuple[float, float]:
+    """返回 (中位耗时ms, Python侧峰值内存MB)"""
+    samples = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return float(np.median(samples)), peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型输入预处理性能对比")
+    parser.add_argument("--size", type=int, default=2048, help="模拟图像边长")
+    parser.add_argument("--images", type=int, default=4, help="每批图像数量")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_images(directory, args.size, args.images)
+
+        legacy = legacy_load_batch(paths)
+        buffer = BatchBuffer(INPUT_SIZE, INPUT_SIZE)
+        timer = StageTimer()
+        batch, _ = load_batch(paths, buffer, timer)
+        diff = float(np.abs(legacy - batch).mean())
+
+        t_legacy, m_legacy = measure(lambda: legacy_load_batch(paths), args.repeat)
+        timer = StageTimer()
+        t_new, m_new = measure(lambda: load_batch(paths, buffer, timer), args.repeat)
+
+    print(f"图像: {args.images} 张 {args.size}x{args.size}, 与原实现输入的平均绝对差: {diff:.4f}")
+    print(f"[原实现] 耗时: {t_legacy:.2f}ms, 峰值内存: {m_legacy:.1f}MB")
+    print(f"[降采样解码] 耗时: {t_new:.2f}ms, 峰值内存: {m_new:.1f}MB, "
+          f"加速比: {t_legacy / t_new:.1f}x")
+    per_run = {stage: round(ms / args.repeat, 2) for stage, ms in timer.timings.items()}
+    print(f"[降采样解码] 各阶段平均耗时(ms): {per_run}")
+
+
+if __name__ == "__main__":
+    main()
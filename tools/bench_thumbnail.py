@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+缩略图生成基准测试
+对比原实现（全分辨率 JPEG 质量 40 重新编码、全分辨率解码后 LANCZOS 缩放）
+与统一缩略图生成（utils/thumbnail.py：JPEG draft 模式解码 + 快速缩放，JPEG/WebP 输出）
+的单张 CPU 耗时与 base64 后的数据大小
+
+用法（在项目根目录执行）:
+    python -m tools.bench_thumbnail [--images /path/to/jpgs] [--size 2048] [--repeat 10]
+"""
+import argparse
+import base64
+import glob
+import os
+import tempfile
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import config
+from utils.thumbnail import FORMAT_JPEG, FORMAT_WEBP, thumbnail_from_array, thumbnail_from_file, to_data_url
+
+
+def legacy_full_res(path: str, quality: int = 40) -> str:
+    """原 img_path_to_base64：全分辨率转 RGB 后以质量 40 重新编码"""
+    with Image.open(path) as img:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+
+def legacy_lanczos(path: str, max_width: int = 512, quality: int = 50) -> str:
+    """原 compress_image_to_base64：全分辨率解码后 LANCZOS 缩放"""
+    with Image.open(path) as img:
+        w, h = img.size
+        if w > max_width:
+            img = img.resize((max_width, int(h * max_width / w)), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+        return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+
+def make_images(directory: str, size: int, count: int = 4) -> list[str]:
+    """生成模拟的灰度眼底拍摄图像"""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:size, 0:size]
+    base = (127 + 100 * np.sin(xx / 50.0) * np.cos(yy / 70.0)).astype(np.float32)
+    paths = []
+    for n in range(count):
+        img = np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype(np.uint8)
+        path = os.path.join(directory, f"capture_{n}.jpg")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(path)
+    return paths
+
+
+def measure(fn, paths: list[str], repeat: int) -> tuple[float, float]:
+    """返回 (单张平均 CPU 耗时 ms, 单张平均 data URL 字节数)"""
+    sizes = [len(fn(path)) for path in paths]
+    start = time.process_time()
+    for _ in range(repeat):
+        for path in paths:
+            fn(path)
+    cpu_ms = (time.process_time() - start) * 1000 / (repeat * len(paths))
+    return cpu_ms, float(np.mean(sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缩略图生成基准测试")
+    parser.add_argument("--images", help="jpg 图像目录，缺省生成模拟图像")
+    parser.add_argument("--size", type=int, default=2048, help="模拟图像边长")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    max_size = config.config.thumbnail.max_size
+    with tempfile.TemporaryDirectory() as directory:
+        if args.images:
+            paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+        else:
+            paths = make_images(directory, args.size)
+        decoded = {path: cv2.imread(path, cv2.IMREAD_UNCHANGED) for path in paths}
+
+        cases = (
+            ("原实现 全分辨率 q40", legacy_full_res),
+            ("原实现 LANCZOS 512", legacy_lanczos),
+            (f"文件 draft {max_size} JPEG", lambda p: to_data_url(thumbnail_from_file(p), FORMAT_JPEG)),
+            (f"文件 draft {max_size} WebP",
+             lambda p: to_data_url(thumbnail_from_file(p, fmt=FORMAT_WEBP), FORMAT_WEBP)),
+            (f"已解码数组 {max_size} JPEG", lambda p: to_data_url(thumbnail_from_array(decoded[p]), FORMAT_JPEG)),
+            (f"已解码数组 {max_size} WebP",
+             lambda p: to_data_url(thumbnail_from_array(decoded[p], fmt=FORMAT_WEBP), FORMAT_WEBP)),
+        )
+        for title, fn in cases:
+            cpu_ms, size = measure(fn, paths, args.repeat)
+            print(f"[{title}] 单张 CPU 耗时: {cpu_ms:.1f}ms, data URL 大小: {size / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+单次缩放检测与分块检测的召回率-耗时对比工具
+使用实际检测模型（ai/best.onnx）对带YOLO格式标注的眼底图逐张检测，
+按类别输出精确率/召回率及平均、P95耗时
+
+数据目录结构: 每张图像 xxx.jpg 对应同名标注 xxx.txt（每行: cls cx cy w h，已归一化）
+
+用法（在项目根目录执行）:
+    python -m tools.bench_tiling --images /path/to/labeled [--tile-sizes 640,960] [--overlap 0.2]
+"""
+import argparse
+import glob
+import os
+import time
+
+from ai.ai_detect_img import (CONF_THRES, ID2NAME, INPUT_HEIGHT, INPUT_WIDTH, IOU_THRES,
+                              postprocess)
+from ai.model_registry import DETECT_MODEL, model_registry
+from ai.preprocess import BatchBuffer, StageTimer, image_size, load_batch
+from ai.tiling import detect_tiled
+from tools.detection_eval import DetectionEvaluator, load_yolo_labels, print_summary
+
+
+def run_single(path: str, buffer: BatchBuffer):
+    """单次缩放检测一张图像，返回 (检测结果, 耗时ms)"""
+    start = time.perf_counter()
+    batch, sizes = load_batch([path], buffer, StageTimer())
+    outputs = model_registry.run_batch(DETECT_MODEL, batch)
+    result = postprocess(outputs[0], sizes[0])
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_tiled(path: str, buffer: BatchBuffer, tile_size: int, overlap: float,
+              max_batch_size: int, merge_iou: float):
+    """分块检测一张图像，返回 (检测结果, 耗时ms)"""
+    start = time.perf_counter()
+    result = detect_tiled(
+        [path], [image_size(path)], tile_size, overlap,
+        lambda batch: model_registry.run_batch(DETECT_MODEL, batch), buffer, StageTimer(),
+        max_batch_size=max_batch_size, conf_thres=CONF_THRES, iou_thres=IOU_THRES,
+        merge_iou=merge_iou)[0]
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单次缩放检测与分块检测的召回率-耗时对比")
+    parser.add_argument("--images", required=True, help="带YOLO格式标注的图像目录")
+    parser.add_argument("--tile-sizes", default="640,960", help="参与对比的分块边长，逗号分隔")
+    parser.add_argument("--overlap", type=float, default=0.2, help="分块重叠比例")
+    parser.add_argument("--merge-iou", type=float, default=0.5, help="分块合并NMS的IoU阈值")
+    parser.add_argument("--max-batch-size", type=int, default=16, help="单次分块推理的最大分块数")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+    if not paths:
+        raise SystemExit(f"目录中没有 jpg 图像: {args.images}")
+    model_registry.get_session(DETECT_MODEL)
+    buffer = BatchBuffer(INPUT_HEIGHT, INPUT_WIDTH)
+
+    modes = {"single": DetectionEvaluator(ID2NAME)}
+    tile_sizes = [int(size) for size in args.tile_sizes.split(",") if size]
+    for tile_size in tile_sizes:
+        modes[f"tiled-{tile_size}"] = DetectionEvaluator(ID2NAME)
+
+    for path in paths:
+        labels = load_yolo_labels(os.path.splitext(path)[0] + ".txt", image_size(path))
+        (boxes, class_ids, scores), latency = run_single(path, buffer)
+        modes["single"].add(boxes, class_ids, scores, labels, latency)
+        for tile_size in tile_sizes:
+            (boxes, class_ids, scores), latency = run_tiled(
+                path, buffer, tile_size, args.overlap, args.max_batch_size, args.merge_iou)
+            modes[f"tiled-{tile_size}"].add(boxes, class_ids, scores, labels, latency)
+
+    for title, evaluator in modes.items():
+        print_summary(title, evaluator.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+检测结果评估工具函数
+读取YOLO格式标注，按类别统计检测结果的精确率与召回率，并汇总推理耗时，
+供检测相关的基准测试工具共用
+"""
+import os
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ai.nms import box_iou_matrix
+
+# 判定为正确检测的IoU阈值
+MATCH_IOU = 0.5
+
+
+def load_yolo_labels(label_path: str, img_size: Tuple[int, int]) -> List[Tuple[int, List[float]]]:
+    """
+    读取YOLO格式标注（每行: cls cx cy w h，坐标已按图像尺寸归一化）
+
+    Returns:
+        [(类别ID, [x1, y1, x2, y2])]，坐标为原图像素坐标
+    """
+    if not os.path.exists(label_path):
+        return []
+    width, height = img_size
+    labels = []
+    with open(label_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 5:
+                continue
+            cls_id = int(parts[0])
+            cx, cy, w, h = (float(v) for v in parts[1:])
+            labels.append((cls_id, [(cx - w / 2) * width, (cy - h / 2) * height,
+                                    (cx + w / 2) * width, (cy + h / 2) * height]))
+    return labels
+
+
+class DetectionEvaluator:
+    """按类别累计 TP/FP/FN 与每张图像的推理耗时"""
+
+    def __init__(self, class_names: Dict[int, str]):
+        self.class_names = class_names
+        self.tp = defaultdict(int)
+        self.fp = defaultdict(int)
+        self.fn = defaultdict(int)
+        self.latencies_ms: List[float] = []
+
+    def add(self, boxes: list, class_ids: list, scores: list,
+            labels: List[Tuple[int, List[float]]], latency_ms: float):
+        """累计一张图像的检测结果：同类别内按置信度从高到低贪心匹配标注框"""
+        self.latencies_ms.append(latency_ms)
+        for cls_id in set(class_ids) | {cls for cls, _ in labels}:
+            pred_idx = [i for i, c in enumerate(class_ids) if c == cls_id]
+            pred_idx.sort(key=lambda i: -scores[i])
+            gt_boxes = [box for cls, box in labels if cls == cls_id]
+            if not pred_idx or not gt_boxes:
+                self.fp[cls_id] += len(pred_idx)
+                self.fn[cls_id] += len(gt_boxes)
+                continue
+            all_boxes = np.array([boxes[i] for i in pred_idx] + gt_boxes, dtype=np.float32)
+            iou = box_iou_matrix(all_boxes)[:len(pred_idx), len(pred_idx):]
+            matched = np.zeros(len(gt_boxes), dtype=bool)
+            for row in iou:
+                candidates = np.where(~matched & (row >= MATCH_IOU))[0]
+                if len(candidates):
+                    matched[candidates[np.argmax(row[candidates])]] = True
+                    self.tp[cls_id] += 1
+                else:
+                    self.fp[cls_id] += 1
+            self.fn[cls_id] += int((~matched).sum())
+
+    def summary(self) -> dict:
+        """汇总每个类别的精确率/召回率与耗时统计"""
+        per_class = {}
+        for cls_id in sorted(set(self.tp) | set(self.fp) | set(self.fn)):
+            tp, fp, fn = self.tp[cls_id], self.fp[cls_id], self.fn[cls_id]
+            per_class[self.class_names.get(cls_id, str(cls_id))] = {
+                "tp": tp, "fp": fp, "fn": fn,
+                "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+                "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+            }
+        latencies = np.array(self.latencies_ms, dtype=np.float64)
+        return {
+            "images": len(latencies),
+            "per_class": per_class,
+            "latency_ms": {
+                "mean": round(float(latencies.mean()), 2) if len(latencies) else None,
+                "p95": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+            },
+        }
+
+
+def print_summary(title: str, summary: dict):
+    """以表格形式输出评估结果"""
+    latency = summary["latency_ms"]
+    print(f"[{title}] 图像数: {summary['images']}, 平均耗时: {latency['mean']}ms, P95耗时: {latency['p95']}ms")
+    for name, stats in summary["per_class"].items():
+        print(f"    {name}: precision={stats['precision']}, recall={stats['recall']}, "
+              f"tp={stats['tp']}, fp={stats['fp']}, fn={stats['fn']}")
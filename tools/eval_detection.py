@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+FP32 / INT8 检测模型对比评估工具
+分别加载原始模型与量化模型，对带YOLO格式标注的眼底图逐张检测，
+输出各类别精确率/召回率、平均与P95耗时以及模型内存占用，作为切换生产模型前的依据
+
+数据目录结构: 每张图像 xxx.jpg 对应同名标注 xxx.txt（每行: cls cx cy w h，已归一化）
+
+用法（在项目根目录执行）:
+    python -m tools.eval_detection --images /path/to/labeled [--fp32 ai/best.onnx] [--int8 ai/best.int8.onnx]
+"""
+import argparse
+import gc
+import glob
+import os
+import time
+
+import onnxruntime as ort
+
+from ai.ai_detect_img import ID2NAME, INPUT_HEIGHT, INPUT_WIDTH, postprocess
+from ai.model_registry import (DETECT_MODEL, MODEL_VARIANTS, build_session_options,
+                               current_rss_mb, get_providers, run_session)
+from ai.preprocess import BatchBuffer, StageTimer, image_size, load_batch
+from tools.detection_eval import DetectionEvaluator, load_yolo_labels, print_summary
+
+
+def evaluate(model_path: str, paths: list[str], warmup: int) -> dict:
+    """使用指定模型文件评估全部图像，返回评估汇总（含内存统计）"""
+    gc.collect()
+    rss_before = current_rss_mb()
+    session = ort.InferenceSession(
+        model_path, sess_options=build_session_options(DETECT_MODEL), providers=get_providers())
+    rss_loaded = current_rss_mb()
+
+    buffer = BatchBuffer(INPUT_HEIGHT, INPUT_WIDTH)
+    evaluator = DetectionEvaluator(ID2NAME)
+    for path in paths[:warmup]:
+        batch, _ = load_batch([path], buffer, StageTimer())
+        run_session(session, batch)
+
+    rss_peak = rss_loaded
+    for path in paths:
+        labels = load_yolo_labels(os.path.splitext(path)[0] + ".txt", image_size(path))
+        start = time.perf_counter()
+        batch, sizes = load_batch([path], buffer, StageTimer())
+        boxes, class_ids, scores = postprocess(run_session(session, batch)[0], sizes[0])
+        evaluator.add(boxes, class_ids, scores, labels, (time.perf_counter() - start) * 1000)
+        rss = current_rss_mb()
+        if rss is not None and rss_peak is not None:
+            rss_peak = max(rss_peak, rss)
+
+    summary = evaluator.summary()
+    summary["memory_mb"] = {
+        "model_load": round(rss_loaded - rss_before, 1) if rss_before is not None else None,
+        "peak_during_eval": round(rss_peak - rss_before, 1) if rss_before is not None else None,
+    }
+    del session
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FP32 / INT8 检测模型对比评估")
+    parser.add_argument("--images", required=True, help="带YOLO格式标注的图像目录")
+    parser.add_argument("--fp32", default=MODEL_VARIANTS[DETECT_MODEL]["fp32"], help="FP32 模型路径")
+    parser.add_argument("--int8", default=MODEL_VARIANTS[DETECT_MODEL]["int8"], help="INT8 模型路径")
+    parser.add_argument("--warmup", type=int, default=3, help="计时前预热的图像数量")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+    if not paths:
+        raise SystemExit(f"目录中没有 jpg 图像: {args.images}")
+
+    for title, model_path in (("fp32", args.fp32), ("int8", args.int8)):
+        if not os.path.exists(model_path):
+            print(f"[{title}] 模型文件不存在，跳过: {model_path}")
+            continue
+        summary = evaluate(model_path, paths, args.warmup)
+        print_summary(f"{title} {model_path}", summary)
+        print(f"    内存(MB): 模型加载 {summary['memory_mb']['model_load']}, "
+              f"评估期间峰值增量 {summary['memory_mb']['peak_during_eval']}")
+
+
+if __name__ == "__main__":
+    main()
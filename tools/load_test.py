@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+接口并发压测
+对运行中的服务按并发数逐级加压（每级 N 个客户端协程同时循环请求），统计吞吐量与延迟分位数，
+用于对比接口迁移到 AsyncSession 前后的并发扩展性：
+同步 Session 查询阻塞事件循环时，吞吐量不随并发数增长、延迟随并发数线性增加；
+异步查询时吞吐量随并发数增长，直至连接池或数据库饱和
+
+用法（在项目根目录执行，服务需已启动）:
+    python -m tools.load_test --username admin --password xxx \\
+        [--base-url http://127.0.0.1:8000] [--paths /api/fundus-images/ /api/ai-diagnoses/] \\
+        [--concurrency 1 2 4 8 16 32] [--requests 200]
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import time
+
+import httpx
+import numpy as np
+
+# 缺省压测的高频查询接口
+DEFAULT_PATHS = [
+    "/api/fundus-images/",
+    "/api/ai-diagnoses/",
+    "/api/examinations/",
+]
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """登录获取访问令牌（前端以 SHA-256 哈希传输密码）"""
+    response = await client.post("/api/auth/login", json={
+        "username": username,
+        "password": hashlib.sha256(password.encode("utf-8")).hexdigest()
+    })
+    body = response.json()
+    if body.get("code") != 200:
+        raise SystemExit(f"登录失败: {body.get('msg')}")
+    return body["data"]["token"]
+
+
+async def run_level(client: httpx.AsyncClient, paths: list[str], concurrency: int, total: int) -> dict:
+    """
+    以指定并发数发送 total 个请求
+
+    Returns:
+        {"concurrency", "rps", "p50", "p95", "p99", "errors"}，延迟单位 ms
+    """
+    targets = itertools.cycle(paths)
+    remaining = total
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            path = next(targets)
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                # 业务错误以 JSON code 表示，HTTP 状态码仍为 200
+                if response.status_code != 200 or response.json().get("code") != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"concurrency": concurrency, "rps": len(latencies) / elapsed,
+            "p50": p50, "p95": p95, "p99": p99, "errors": errors}
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        token = args.token or await login(client, args.username, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        # 预热：建立连接、填充连接池
+        await run_level(client, args.paths, max(args.concurrency), len(args.paths) * 2)
+
+        print(f"{'并发':>6} {'吞吐(req/s)':>12} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10} {'错误':>6}   相对首级吞吐")
+        baseline = None
+        for concurrency in args.concurrency:
+            stats = await run_level(client, args.paths, concurrency, args.requests)
+            baseline = baseline or stats["rps"]
+            print(f"{stats['concurrency']:>6} {stats['rps']:>12.1f} {stats['p50']:>10.1f} "
+                  f"{stats['p95']:>10.1f} {stats['p99']:>10.1f} {stats['errors']:>6}"
+                  f"   ×{stats['rps'] / baseline:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接口并发压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="服务地址")
+    parser.add_argument("--token", help="访问令牌，缺省使用 --username/--password 登录获取")
+    parser.add_argument("--username", help="登录用户名")
+    parser.add_argument("--password", help="登录密码（明文，发送前做 SHA-256）")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="压测的 GET 接口路径（轮流请求）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="各级并发数")
+    parser.add_argument("--requests", type=int, default=200, help="每级请求总数")
+    parser.add_argument("--timeout", type=float, default=30, help="单个请求超时（秒）")
+    args = parser.parse_args()
+    if not args.token and not (args.username and args.password):
+        parser.error("需要 --token 或 --username/--password")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+缩略图迁移工具（一次性）
+将 fundus_images / ai_diagnoses 表 thumbnail_data 列中遗留的 base64 data URL
+解码后写入派生图像存储（utils/derivative_store.py），并将该列更新为访问URL
+
+按 id 分批处理、每批提交一次，可中断后重复执行（已迁移的行不再是 data URL，会被跳过）
+
+用法（在项目根目录执行）:
+    python -m tools.migrate_thumbnails [--batch-size 200] [--dry-run]
+"""
+import argparse
+import base64
+import binascii
+
+from database import db
+from loguru_logging import log
+from models.ai_diagnosis import AIDiagnosis
+from models.fundus_image import FundusImage
+from utils.derivative_store import derivative_store
+
+# data URL 的 MIME 类型对应的存储格式
+DATA_URL_FORMATS = {
+    "data:image/jpeg;base64,": "jpeg",
+    "data:image/webp;base64,": "webp",
+}
+
+
+def parse_data_url(data_url: str):
+    """解析 data URL，返回 (图像字节, 格式)，不支持的格式返回 None"""
+    for prefix, fmt in DATA_URL_FORMATS.items():
+        if data_url.startswith(prefix):
+            try:
+                return base64.b64decode(data_url[len(prefix):], validate=True), fmt
+            except (binascii.Error, ValueError):
+                return None
+    return None
+
+
+def migrate_table(model, batch_size: int, dry_run: bool) -> dict:
+    """迁移一张表，返回 {"migrated", "skipped", "bytes"} 统计"""
+    stats = {"migrated": 0, "skipped": 0, "bytes": 0}
+    last_id = 0
+    while True:
+        with db.session() as session:
+            rows = session.query(model.id, model.thumbnail_data).filter(
+                model.id > last_id,
+                model.thumbnail_data.like("data:%")
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                parsed = parse_data_url(row.thumbnail_data)
+                if parsed is None:
+                    log.warning(f"{model.__tablename__} id={row.id} 缩略图格式无法识别，跳过")
+                    stats["skipped"] += 1
+                    continue
+                data, fmt = parsed
+                stats["migrated"] += 1
+                stats["bytes"] += len(row.thumbnail_data)
+                if dry_run:
+                    continue
+                url = derivative_store.put(data, fmt)
+                session.query(model).filter(model.id == row.id).update(
+                    {"thumbnail_data": url}, synchronize_session=False)
+        log.info(f"{model.__tablename__}: 已处理至 id={last_id}, 累计迁移 {stats['migrated']} 行")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缩略图迁移到派生图像存储")
+    parser.add_argument("--batch-size", type=int, default=200, help="每批处理行数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不写入存储与数据库")
+    args = parser.parse_args()
+
+    for model in (FundusImage, AIDiagnosis):
+        stats = migrate_table(model, args.batch_size, args.dry_run)
+        print(f"[{model.__tablename__}] 迁移: {stats['migrated']} 行, 跳过: {stats['skipped']} 行, "
+              f"释放列数据: {stats['bytes'] / 1024 / 1024:.1f}MB"
+              + ("（dry-run，未写入）" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
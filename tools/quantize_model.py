@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+检测模型 INT8 量化工具
+基于 onnxruntime.quantization 将 ai/best.onnx（FP32）量化为 ai/best.int8.onnx，
+支持动态量化（无需校准数据）与静态量化（使用眼底图像校准激活值范围）
+
+生成后在 config.yaml 中设置 inference.models.detect.variant: int8 即可加载量化模型，
+切换前请先用 tools/eval_detection.py 对比两者的精度与耗时
+
+用法（在项目根目录执行，需要安装 onnx）:
+    python -m tools.quantize_model --mode dynamic
+    python -m tools.quantize_model --mode static --calib /path/to/fundus_images [--calib-count 100]
+"""
+import argparse
+import glob
+import os
+import tempfile
+
+import onnxruntime as ort
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                      QuantType, quantize_dynamic, quantize_static)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from ai.model_registry import DETECT_MODEL, MODEL_PATHS, MODEL_VARIANTS
+from ai.preprocess import BatchBuffer, StageTimer, load_batch
+
+
+class FundusCalibrationReader(CalibrationDataReader):
+    """按检测时相同的预处理逐张读取校准图像"""
+
+    def __init__(self, model_path: str, image_paths: list[str]):
+        session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.buffer = BatchBuffer(model_input.shape[2], model_input.shape[3])
+        self.image_paths = iter(image_paths)
+
+    def get_next(self):
+        path = next(self.image_paths, None)
+        if path is None:
+            return None
+        batch, _ = load_batch([path], self.buffer, StageTimer())
+        return {self.input_name: batch.copy()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检测模型 INT8 量化")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="dynamic", help="量化方式")
+    parser.add_argument("--input", default=MODEL_PATHS[DETECT_MODEL], help="FP32 模型路径")
+    parser.add_argument("--output", default=MODEL_VARIANTS[DETECT_MODEL]["int8"], help="INT8 模型输出路径")
+    parser.add_argument("--calib", help="静态量化的校准图像目录（jpg）")
+    parser.add_argument("--calib-count", type=int, default=100, help="最多使用的校准图像数量")
+    parser.add_argument("--per-channel", action="store_true", help="按通道量化权重")
+    parser.add_argument("--method", choices=["minmax", "entropy", "percentile"], default="minmax",
+                        help="静态量化的校准方法")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 量化前先做形状推断与图优化，提高量化覆盖率
+        prepared = os.path.join(directory, "prepared.onnx")
+        quant_pre_process(args.input, prepared)
+
+        if args.mode == "dynamic":
+            quantize_dynamic(prepared, args.output, weight_type=QuantType.QUInt8,
+                             per_channel=args.per_channel)
+        else:
+            if not args.calib:
+                raise SystemExit("静态量化需要通过 --calib 指定校准图像目录")
+            images = sorted(glob.glob(os.path.join(args.calib, "*.jpg")))[:args.calib_count]
+            if not images:
+                raise SystemExit(f"校准目录中没有 jpg 图像: {args.calib}")
+            methods = {
+                "minmax": CalibrationMethod.MinMax,
+                "entropy": CalibrationMethod.Entropy,
+                "percentile": CalibrationMethod.Percentile,
+            }
+            quantize_static(
+                prepared, args.output, FundusCalibrationReader(prepared, images),
+                quant_format=QuantFormat.QDQ, per_channel=args.per_channel,
+                activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                calibrate_method=methods[args.method])
+
+    size_in = os.path.getsize(args.input) / 1024 / 1024
+    size_out = os.path.getsize(args.output) / 1024 / 1024
+    print(f"量化完成: mode={args.mode}, {args.input} ({size_in:.1f}MB) -> {args.output} ({size_out:.1f}MB)")
+
+
+if __name__ == "__main__":
+    main()
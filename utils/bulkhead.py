@@ -0,0 +1,195 @@
+"""
+舱壁隔离（Bulkhead）
+按子系统（auth/crud/imaging/ai）划分独立的并发上限与排队上限，某个子系统的慢请求只占满自己的舱壁，
+不会拖垮其他子系统（例如大量图像保存时登录仍可正常处理）：
+- 同步（def）接口在舱壁专用线程池中执行，不再共用 Starlette 的默认线程池；
+- 异步（async def）接口只做并发控制；
+- 执行中的请求达到上限时新请求排队，排队也已满时直接返回 503 并附带 Retry-After
+
+舱壁在 interface/__init__.py 中按路由器指定，排队深度与等待时间通过 /api/metrics/bulkheads 查询
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, status
+from fastapi.routing import APIRoute
+
+from config import BulkheadConfig, config
+from loguru_logging import log
+
+# 计算等待时间分位数的采样窗口（最近的请求数）
+WAIT_WINDOW = 1000
+
+
+def bulkhead_exempt(endpoint: Callable) -> Callable:
+    """
+    标记接口不受舱壁限制（装饰器，写在 @router.xxx 之下）
+
+    用于长时间挂起但不占用线程与事件循环的接口（如长轮询），避免其占满舱壁并发数
+    """
+    endpoint.__bulkhead_exempt__ = True
+    return endpoint
+
+
+class Bulkhead:
+    """一个子系统的舱壁：并发上限、排队上限与专用线程池"""
+
+    def __init__(self, name: str, settings: BulkheadConfig):
+        self.name = name
+        self.settings = settings
+        self._semaphore = asyncio.Semaphore(settings.max_workers)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._completed = 0
+        self._rejected = 0
+        self._waits = deque(maxlen=WAIT_WINDOW)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.settings.max_workers,
+                                                    thread_name_prefix=f"bulkhead-{self.name}")
+            return self._executor
+
+    def shutdown(self):
+        """关闭专用线程池"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== 并发控制 ====================
+
+    async def _acquire(self):
+        """
+        获取执行名额，名额已满时排队等待
+
+        Raises:
+            HTTPException: 排队已满（503，附带 Retry-After）
+        """
+        if self._semaphore.locked() and self._waiting >= self.settings.max_queue:
+            self._rejected += 1
+            log.warning(f"舱壁 {self.name} 已满: 执行中={self._active}, 排队={self._waiting}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"服务繁忙（{self.name}），请稍后重试",
+                headers={"Retry-After": str(self.settings.retry_after_s)}
+            )
+        self._waiting += 1
+        self._peak_waiting = max(self._peak_waiting, self._waiting)
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._waits.append((time.perf_counter() - start) * 1000)
+        self._active += 1
+
+    def _release(self):
+        self._active -= 1
+        self._completed += 1
+        self._semaphore.release()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """在舱壁专用线程池中执行阻塞函数（保留调用方的 contextvars）"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(),
+                                          functools.partial(context.run, fn, *args, **kwargs))
+
+    def wrap(self, endpoint: Callable) -> Callable:
+        """包装接口函数：先获取执行名额，同步接口再放到专用线程池中执行（保留原函数签名供 FastAPI 解析参数）"""
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def guarded(*args, **kwargs):
+                await self._acquire()
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    self._release()
+        else:
+            @functools.wraps(endpoint)
+            async def guarded(*args, **kwargs):
+                await self._acquire()
+                try:
+                    return await self.run(endpoint, *args, **kwargs)
+                finally:
+                    self._release()
+        return guarded
+
+    # ==================== 统计 ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """获取舱壁统计：执行中与排队请求数、拒绝次数与排队等待时间分位数（ms）"""
+        waits = np.fromiter(self._waits, dtype=np.float64)
+        if waits.size:
+            p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+            wait_ms = {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+                       "max": round(float(waits.max()), 2)}
+        else:
+            wait_ms = None
+        return {
+            "name": self.name,
+            "max_workers": self.settings.max_workers,
+            "max_queue": self.settings.max_queue,
+            "active": self._active,
+            "queued": self._waiting,
+            "peak_queued": self._peak_waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "wait_ms": wait_ms,
+        }
+
+
+class BulkheadRegistry:
+    """舱壁注册表 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(BulkheadRegistry, cls).__new__(cls)
+            cls._instance._bulkheads = {}
+        return cls._instance
+
+    def get(self, name: str) -> Bulkhead:
+        """获取舱壁，首次使用时按配置创建（未配置的名称使用默认配置）"""
+        if name not in self._bulkheads:
+            settings = config.config.bulkheads.get(name) or BulkheadConfig()
+            self._bulkheads[name] = Bulkhead(name, settings)
+        return self._bulkheads[name]
+
+    def isolate(self, router: APIRouter, name: str) -> APIRouter:
+        """
+        将路由器的全部接口放入指定舱壁（标记了 bulkhead_exempt 的接口除外）
+
+        需在 include_router 之前调用：include_router 按各路由的 endpoint 重新创建路由，
+        包装后的 endpoint 随之生效
+        """
+        bulkhead = self.get(name)
+        for route in router.routes:
+            if isinstance(route, APIRoute) and not getattr(route.endpoint, "__bulkhead_exempt__", False):
+                route.endpoint = bulkhead.wrap(route.endpoint)
+        return router
+
+    def stats(self) -> list:
+        return [bulkhead.stats() for bulkhead in self._bulkheads.values()]
+
+    def shutdown(self):
+        """关闭全部舱壁的专用线程池"""
+        for bulkhead in self._bulkheads.values():
+            bulkhead.shutdown()
+
+
+# 创建全局舱壁注册表实例，方便导入使用
+bulkheads = BulkheadRegistry()
@@ -0,0 +1,167 @@
+"""
+派生图像（缩略图等）内容寻址存储
+派生图像按内容的 SHA-256 命名保存在 save_folder_path/derivatives 下，数据库与接口响应只保存其访问URL；
+内容不变则文件名不变，可由 GET /api/derivatives/{name} 以 ETag 与 Cache-Control: immutable 长期缓存；
+同一内容的其他格式（如缩略图的 WebP 变体）以相同哈希、不同扩展名保存，访问时按客户端支持的格式选择；
+访问URL 用于 <img src>，浏览器不会携带 Bearer 令牌，接口响应中的URL 附加有时限的 HMAC 签名（sign_urls），访问时校验签名
+"""
+import hashlib
+import hmac
+import os
+import pathlib
+import re
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import config
+
+# 派生图像访问URL前缀（与 interface/derivative.py 的路由前缀一致）
+URL_PREFIX = "/api/derivatives/"
+
+# 格式对应的文件扩展名与 MIME 类型
+EXTENSIONS = {
+    "jpeg": "jpg",
+    "webp": "webp",
+}
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+NAME_PATTERN = re.compile(r"^([0-9a-f]{64})\.(jpg|webp)$")
+
+
+class DerivativeStore:
+    """内容寻址的派生图像存储 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DerivativeStore, cls).__new__(cls)
+        return cls._instance
+
+    @property
+    def root(self) -> pathlib.Path:
+        """存储根目录（随 save_folder_path 配置变化）"""
+        return pathlib.Path(config.config.save_folder_path).joinpath("derivatives")
+
+    def _path(self, digest: str, ext: str) -> pathlib.Path:
+        # 按哈希前两级分目录，避免单个目录下文件过多
+        return self.root.joinpath(digest[:2], digest[2:4], f"{digest}.{ext}")
+
+    def put(self, data: bytes, fmt: str = "jpeg", variants: Optional[Dict[str, bytes]] = None) -> str:
+        """
+        保存派生图像（内容相同的文件只保存一份）
+
+        Args:
+            variants: 同一内容的其他格式编码 {格式: 字节}，以 data 的哈希命名保存，访问URL 仍指向 data
+
+        Returns:
+            派生图像访问URL
+        """
+        ext = EXTENSIONS[fmt]
+        digest = hashlib.sha256(data).hexdigest()
+        for variant_fmt, variant_data in [(fmt, data), *(variants or {}).items()]:
+            path = self._path(digest, EXTENSIONS[variant_fmt])
+            if not path.exists():
+                self._write(path, variant_data)
+        return f"{URL_PREFIX}{digest}.{ext}"
+
+    def cached(self, key: str, producer: Callable[[], bytes], fmt: str = "jpeg") -> pathlib.Path:
+        """
+        按键缓存派生图像（如按配置翻转后的原图），键中应包含源文件的版本信息（大小、修改时间等）
+
+        键对应的文件已存在时直接返回，否则调用 producer 生成并保存
+
+        Returns:
+            派生图像文件路径
+        """
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        path = self.root.joinpath("keyed", digest[:2], f"{digest}.{EXTENSIONS[fmt]}")
+        if not path.exists():
+            self._write(path, producer())
+        return path
+
+    @staticmethod
+    def _write(path: pathlib.Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再原子替换，避免并发读取到写了一半的文件
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def resolve(self, name: str, preferred: Optional[str] = None) -> Optional[tuple[pathlib.Path, str, str]]:
+        """
+        解析派生图像文件名
+
+        Args:
+            preferred: 客户端优先的格式（如 webp），存在该格式的变体时返回变体
+
+        Returns:
+            (文件路径, ETag, MIME 类型)，文件名不合法或文件不存在时返回 None；
+            ETag 区分格式，同一URL 的不同格式不会被误认为同一响应
+        """
+        match = NAME_PATTERN.match(name)
+        if match is None:
+            return None
+        digest, ext = match.groups()
+        path = self._path(digest, ext)
+        if not path.is_file():
+            return None
+        if preferred is not None and EXTENSIONS[preferred] != ext:
+            variant = self._path(digest, EXTENSIONS[preferred])
+            if variant.is_file():
+                path, ext = variant, EXTENSIONS[preferred]
+        return path, f'"{digest}.{ext}"', MEDIA_TYPES[ext]
+
+    # ==================== 访问URL签名 ====================
+
+    @staticmethod
+    def _signature(name: str, expires: int) -> str:
+        # 签名密钥由 JWT 密钥派生，与令牌签名互不通用
+        key = hashlib.sha256(f"derivative-url|{config.config.jwt.secret_key}".encode("utf-8")).digest()
+        return hmac.new(key, f"{name}|{expires}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def sign_url(self, url: str, now: Optional[float] = None) -> str:
+        """
+        为派生图像访问URL附加过期时间与签名，其他字符串原样返回
+
+        过期时间取整到有效期窗口的边界，同一窗口内签出的URL相同，浏览器缓存可以命中
+        """
+        name = url[len(URL_PREFIX):] if url.startswith(URL_PREFIX) else None
+        if name is None or NAME_PATTERN.match(name) is None:
+            return url
+        ttl = max(1, int(config.config.thumbnail.url_ttl_s))
+        expires = (int(time.time() if now is None else now) // ttl + 2) * ttl
+        return f"{url}?expires={expires}&signature={self._signature(name, expires)}"
+
+    def verify_signature(self, name: str, expires: Optional[int], signature: Optional[str],
+                         now: Optional[float] = None) -> bool:
+        """校验访问URL的签名与过期时间"""
+        if expires is None or signature is None:
+            return False
+        if expires < (time.time() if now is None else now):
+            return False
+        return hmac.compare_digest(self._signature(name, expires), signature)
+
+
+# 创建全局派生图像存储实例，方便导入使用
+derivative_store = DerivativeStore()
+
+
+def sign_urls(data: Any) -> Any:
+    """为响应数据（字典、列表嵌套）中的全部派生图像访问URL签名"""
+    if isinstance(data, str):
+        return derivative_store.sign_url(data)
+    if isinstance(data, dict):
+        return {key: sign_urls(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [sign_urls(value) for value in data]
+    return data
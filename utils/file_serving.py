@@ -0,0 +1,111 @@
+"""
+影像文件直出
+以 FileResponse 从磁盘直接输出原图/检测叠加图：支持 HTTP Range（单段与多段）、If-Range，
+ASGI 服务器提供 http.response.pathsend 扩展时由服务器零拷贝发送文件，否则按 64KB 分块流式发送；
+ETag 由文件大小与修改时间生成，If-None-Match 命中时返回 304。
+按 image_view.flipx/flipy 配置翻转的图像作为派生图像缓存，只在源文件变化后重新生成
+"""
+import asyncio
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+from fastapi.responses import FileResponse, Response
+
+from config import config
+from utils.derivative_store import derivative_store
+
+# 原图写入后不再修改（重新拍摄会生成新记录），允许客户端长期缓存；
+# 认证后才能访问，只允许浏览器私有缓存
+CACHE_CONTROL = "private, max-age=31536000"
+# 翻转结果随 image_view 配置变化，每次使用前需以 ETag 重新验证
+CACHE_CONTROL_FLIPPED = "private, no-cache"
+
+# 翻转后重新编码的 JPEG 质量（原图用于阅片，尽量保持画质）
+FLIP_JPEG_QUALITY = 95
+
+
+def file_etag(stat_result: os.stat_result, variant: str = "") -> str:
+    """由文件大小与修改时间生成 ETag，variant 区分同一文件的不同派生形式"""
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}{variant}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 请求头是否命中 ETag（弱比较）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def flip_code(flipx: bool, flipy: bool) -> Optional[int]:
+    """
+    image_view 翻转配置对应的 cv2.flip 参数，无需翻转时返回 None
+
+    flipx 为沿 x 方向（左右）镜像，flipy 为沿 y 方向（上下）镜像
+    """
+    if flipx and flipy:
+        return -1
+    if flipx:
+        return 1
+    if flipy:
+        return 0
+    return None
+
+
+def flip_image(path: str, code: int) -> bytes:
+    """读取图像并翻转，返回 JPEG 编码结果"""
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"无法读取图像: {path}")
+    ok, encoded = cv2.imencode(".jpg", cv2.flip(image, code),
+                               [cv2.IMWRITE_JPEG_QUALITY, FLIP_JPEG_QUALITY])
+    if not ok:
+        raise ValueError(f"图像编码失败: {path}")
+    return encoded.tobytes()
+
+
+def _prepare(path: str, flip: bool):
+    """
+    定位要输出的文件（需要翻转时生成或复用缓存的翻转图）
+
+    Returns:
+        (文件路径, 文件 stat, ETag, Cache-Control)
+
+    Raises:
+        FileNotFoundError: 源文件不存在
+    """
+    stat_result = os.stat(path)
+    image_view = config.config.image_view
+    code = flip_code(image_view.flipx, image_view.flipy) if flip else None
+    if code is None:
+        return path, stat_result, file_etag(stat_result), CACHE_CONTROL
+
+    # 缓存键包含源文件版本与翻转方式，源文件或配置变化后自动生成新的派生图
+    variant = f"-flip{code}"
+    key = f"{os.path.abspath(path)}:{stat_result.st_size}:{stat_result.st_mtime_ns}{variant}"
+    flipped = derivative_store.cached(key, lambda: flip_image(path, code))
+    return str(flipped), os.stat(flipped), file_etag(stat_result, variant), CACHE_CONTROL_FLIPPED
+
+
+async def image_file_response(path: str, if_none_match: Optional[str], flip: bool = False) -> Response:
+    """
+    输出影像文件
+
+    Args:
+        path: 源文件路径
+        if_none_match: If-None-Match 请求头
+        flip: 是否按 image_view 配置翻转
+
+    Raises:
+        FileNotFoundError: 源文件不存在
+    """
+    # stat 与翻转图生成都涉及磁盘 IO（翻转还需解码编码），放到线程中执行
+    loop = asyncio.get_running_loop()
+    file_path, stat_result, etag, cache_control = await loop.run_in_executor(None, _prepare, path, flip)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(file_path, headers=headers, stat_result=stat_result)
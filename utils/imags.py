@@ -1,7 +1,6 @@
 import base64
-from io import BytesIO
-from PIL import Image
 from loguru_logging import log
+from utils.thumbnail import thumbnail_from_file
 
 @log.catch
 def compress_image_to_base64(
@@ -11,24 +10,9 @@ def compress_image_to_base64(
 ) -> str:
     """
     同时按尺寸和质量压缩图片，并返回base64字符串
+    （使用统一的缩略图生成：JPEG draft 模式解码 + 快速缩放，最长边不超过 max_width）
     """
-    with Image.open(input_path) as img:
-        # 1. 等比例缩放尺寸
-        w, h = img.size
-        if w > max_width:
-            scale = max_width / w
-            new_size = (max_width, int(h * scale))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-        # 2. 保存到内存 buffer，并压缩质量
-        buffer = BytesIO()
-        log.debug(f"img.format={img.format}")
-        img.save(buffer, format="JPEG", quality=quality, optimize=True)
-        buffer.seek(0)
-
-        # 3. 转成 Base64
-        b64_str = base64.b64encode(buffer.read()).decode("utf-8")
-        return b64_str
+    return base64.b64encode(thumbnail_from_file(input_path, max_width, quality=quality)).decode("utf-8")
 
 @log.catch
 def compress_to_dataurl(input_path: str,
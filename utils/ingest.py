@@ -0,0 +1,172 @@
+"""
+拍摄图像入库（ingest）流水线
+每个文件只读取并解码一次，解码后的像素数组同时用于生成缩略图与彩色合成的通道输入，
+避免缩略图（PIL）、彩色合成（cv2.imread）分别重复解码同一张 JPEG；
+不参与彩色合成的图像只按缩略图尺寸解码（JPEG draft 模式）。
+同一次拍摄的各通道文件在线程池中并行处理（PIL/OpenCV 解码、缩放、编码期间释放 GIL），
+入库耗时接近最慢的单个通道。各阶段耗时由 StageTimer 记录（并行时为各通道耗时之和）
+"""
+import pathlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Collection, List, Optional
+
+import cv2
+import numpy as np
+
+from ai.preprocess import StageTimer
+from utils.thumbnail import store_thumbnail_from_array, store_thumbnail_from_file
+
+# 文件名后缀对应的通道
+CHANNEL_SUFFIXES = {
+    "_IR.jpg": "ir",
+    "_G.jpg": "green",
+    "_R.jpg": "red",
+    "_B.jpg": "blue",
+}
+
+# 并行处理通道文件的线程数（一次拍摄最多四个通道）
+INGEST_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+        return _executor
+
+
+@dataclass
+class IngestedImage:
+    """解码一次后的拍摄图像"""
+    path: pathlib.Path
+    # 解码后的像素（单通道为 H×W，彩色为 H×W×3 的 BGR），只生成缩略图时为 None
+    image: Optional[np.ndarray]
+    file_size: int
+    # 缩略图访问URL（派生图像存储）
+    thumbnail_data: Optional[str] = None
+
+    @property
+    def gray(self) -> np.ndarray:
+        """单通道灰度像素（彩色合成的通道输入）"""
+        if self.image.ndim == 2:
+            return self.image
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+
+
+def channel_of(file_name: str) -> Optional[str]:
+    """根据文件名后缀识别通道：ir/green/red/blue，无法识别时返回 None"""
+    for suffix, channel in CHANNEL_SUFFIXES.items():
+        if file_name.endswith(suffix):
+            return channel
+    return None
+
+
+def decode_file(path: str, timer: StageTimer) -> IngestedImage:
+    """读取文件并解码为像素数组（只解码一次）"""
+    start = time.perf_counter()
+    data = np.fromfile(path, dtype=np.uint8)
+    timer.add("read", start)
+
+    start = time.perf_counter()
+    image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    timer.add("decode", start)
+    if image is None:
+        raise ValueError(f"无法读取图像: {path}")
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return IngestedImage(path=pathlib.Path(path), image=image, file_size=len(data))
+
+
+def encode_thumbnail(image: np.ndarray, timer: StageTimer) -> str:
+    """由已解码的像素数组生成缩略图，保存到派生图像存储并返回其访问URL"""
+    start = time.perf_counter()
+    thumbnail_data = store_thumbnail_from_array(image)
+    timer.add("thumbnail", start)
+    return thumbnail_data
+
+
+def ingest_file(path: str, timer: StageTimer, keep_pixels: bool = True) -> IngestedImage:
+    """
+    解码单个拍摄图像并生成缩略图
+
+    Args:
+        keep_pixels: 是否保留全分辨率像素，否则只按缩略图尺寸解码
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        ValueError: 文件无法解码
+    """
+    if not pathlib.Path(path).exists():
+        raise FileNotFoundError(f"图片文件不存在: {path}")
+    if keep_pixels:
+        img = decode_file(path, timer)
+        img.thumbnail_data = encode_thumbnail(img.image, timer)
+        return img
+
+    start = time.perf_counter()
+    try:
+        thumbnail_data = store_thumbnail_from_file(path)
+    except OSError as e:
+        raise ValueError(f"无法读取图像: {path}, {e}")
+    img = IngestedImage(path=pathlib.Path(path), image=None,
+                        file_size=pathlib.Path(path).stat().st_size,
+                        thumbnail_data=thumbnail_data)
+    timer.add("thumbnail", start)
+    return img
+
+
+def ingest_files(paths: List[str], timer: StageTimer,
+                 keep_pixels: Optional[Collection[str]] = None) -> List[IngestedImage]:
+    """
+    并行解码一组拍摄图像并生成缩略图，结果顺序与 paths 一致
+
+    Args:
+        keep_pixels: 需要保留全分辨率像素的通道（如彩色合成的 ir/green），
+            None 表示全部保留；其余图像只按缩略图尺寸解码
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        ValueError: 文件无法解码
+    """
+    timers = [StageTimer() for _ in paths]
+    futures = [
+        _get_executor().submit(ingest_file, path, file_timer,
+                               keep_pixels is None or channel_of(pathlib.Path(path).name) in keep_pixels)
+        for path, file_timer in zip(paths, timers)
+    ]
+    # 等待全部完成后再抛出异常，避免出错时仍有线程在写派生图像
+    images = []
+    error = None
+    for future in futures:
+        try:
+            images.append(future.result())
+        except Exception as e:
+            error = error or e
+    for file_timer in timers:
+        timer.merge(file_timer)
+    if error is not None:
+        raise error
+    return images
+
+
+def save_image(image: np.ndarray, save_path: str, timer: StageTimer) -> int:
+    """
+    将像素数组编码为 JPEG 写入文件（支持非 ASCII 路径）
+
+    Returns:
+        写入的文件大小（字节）
+    """
+    start = time.perf_counter()
+    ok, encoded = cv2.imencode(pathlib.Path(save_path).suffix or ".jpg", image)
+    if not ok:
+        raise ValueError(f"图像编码失败: {save_path}")
+    encoded.tofile(save_path)
+    timer.add("save", start)
+    return encoded.size
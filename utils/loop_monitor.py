@@ -0,0 +1,217 @@
+"""
+事件循环延迟监控与阻塞调用定位（诊断用，loop_monitor.enabled 开启）
+采样协程每 interval_ms 休眠一次，实际唤醒时间与预期的差值即事件循环调度延迟；
+看门狗线程发现采样协程超过 stall_threshold_ms 仍未唤醒时，说明事件循环线程正被同步代码占用，
+此时采样事件循环线程的调用栈，并记录当前执行的请求路由，按路由汇总阻塞次数与累计阻塞时长，
+用于确定 interface/ 中需要优先改造的接口
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config import config
+from loguru_logging import log
+
+
+class LoopMonitor:
+    """事件循环延迟监控 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LoopMonitor, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._task = None
+            cls._instance._watchdog = None
+            cls._instance._stop = threading.Event()
+            cls._instance._loop = None
+            cls._instance._loop_thread_id = None
+            # 采样协程本次休眠开始的时间（perf_counter），看门狗据此判断事件循环是否阻塞
+            cls._instance._heartbeat = None
+            # 看门狗在阻塞期间采集的现场：(心跳时间, 路由, 调用栈)
+            cls._instance._pending = None
+            # 正在处理的请求：asyncio.Task -> ASGI scope
+            cls._instance._requests = {}
+            cls._instance.reset()
+        return cls._instance
+
+    @property
+    def settings(self):
+        return config.config.loop_monitor
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.enabled
+
+    def reset(self):
+        """清空延迟采样与阻塞统计"""
+        with self._lock:
+            self._lags = deque(maxlen=self.settings.window)
+            self._stalls = deque(maxlen=self.settings.max_stalls)
+            self._routes = {}
+            self._stall_count = 0
+            self._max_lag = 0.0
+
+    # ==================== 启停 ====================
+
+    def start(self):
+        """启动采样协程与看门狗线程（需在事件循环线程中调用，未开启时不执行任何操作）"""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = None
+        self._stop.clear()
+        self._task = self._loop.create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+        log.info(f"事件循环延迟监控已启动: 采样间隔={self.settings.interval_ms}ms, "
+                 f"阻塞阈值={self.settings.stall_threshold_ms}ms")
+
+    def stop(self):
+        """停止采样协程与看门狗线程"""
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        self._task = None
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    # ==================== 请求登记 ====================
+
+    def request_started(self, scope: dict):
+        """登记当前任务正在处理的请求（由 LoopMonitorMiddleware 调用）"""
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests[task] = scope
+
+    def request_finished(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests.pop(task, None)
+
+    def _route_of(self, task: Optional[asyncio.Task]) -> str:
+        """任务对应的路由（路由模板，如 GET /api/fundus-images/{image_id}）"""
+        if task is None:
+            return "<事件循环回调>"
+        scope = self._requests.get(task)
+        if scope is None:
+            # 非请求任务（后台任务、启动流程等）以协程名标识
+            return f"<任务 {task.get_coro().__qualname__}>"
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        return f"{scope.get('method', '')} {path}"
+
+    # ==================== 采样 ====================
+
+    async def _sample(self):
+        """采样协程：测量每次休眠的实际唤醒延迟"""
+        interval = self.settings.interval_ms / 1000
+        while True:
+            start = time.perf_counter()
+            self._heartbeat = start
+            await asyncio.sleep(interval)
+            lag_ms = max(0.0, (time.perf_counter() - start - interval) * 1000)
+            self._record(start, lag_ms)
+
+    def _watch(self):
+        """看门狗线程：采样协程超时未唤醒时采集事件循环线程的调用栈与当前路由"""
+        interval = self.settings.interval_ms / 1000
+        threshold = self.settings.stall_threshold_ms / 1000
+        poll = min(interval, threshold) / 2
+        while not self._stop.wait(poll):
+            beat = self._heartbeat
+            if beat is None or time.perf_counter() - beat - interval < threshold:
+                continue
+            pending = self._pending
+            if pending is not None and pending[0] == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = [f"{entry.filename}:{entry.lineno} {entry.name}"
+                     for entry in traceback.extract_stack(frame)[-self.settings.stack_depth:]] if frame else []
+            try:
+                route = self._route_of(asyncio.current_task(self._loop))
+            except RuntimeError:
+                route = "<未知>"
+            self._pending = (beat, route, stack)
+
+    def _record(self, beat: float, lag_ms: float):
+        """记录一次延迟采样，超过阈值时结合看门狗采集的现场记录阻塞"""
+        with self._lock:
+            self._lags.append(lag_ms)
+            self._max_lag = max(self._max_lag, lag_ms)
+            if lag_ms < self.settings.stall_threshold_ms:
+                return
+            pending, self._pending = self._pending, None
+            # 阻塞时长刚超过阈值时看门狗可能尚未采样，此时路由未知
+            route, stack = (pending[1], pending[2]) if pending and pending[0] == beat else ("<未采样>", [])
+            self._stall_count += 1
+            stats = self._routes.setdefault(route, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += lag_ms
+            stats["max_ms"] = max(stats["max_ms"], lag_ms)
+            self._stalls.append({
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "lag_ms": round(lag_ms, 1),
+                "route": route,
+                "stack": stack
+            })
+        log.warning(f"事件循环阻塞 {lag_ms:.0f}ms: {route}")
+
+    # ==================== 统计 ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取监控统计：延迟分位数、按累计阻塞时长排序的路由、最近的阻塞记录（含调用栈）
+        """
+        with self._lock:
+            lags = np.fromiter(self._lags, dtype=np.float64)
+            if lags.size:
+                p50, p90, p99 = np.percentile(lags, [50, 90, 99])
+                lag = {"p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2),
+                       "mean": round(float(lags.mean()), 2), "max": round(self._max_lag, 2)}
+            else:
+                lag = None
+            routes = sorted(
+                ({"route": route, "count": s["count"], "total_ms": round(s["total_ms"], 1),
+                  "max_ms": round(s["max_ms"], 1)} for route, s in self._routes.items()),
+                key=lambda item: item["total_ms"], reverse=True)
+            return {
+                "enabled": self.enabled,
+                "running": self._task is not None,
+                "interval_ms": self.settings.interval_ms,
+                "stall_threshold_ms": self.settings.stall_threshold_ms,
+                "samples": int(lags.size),
+                "lag_ms": lag,
+                "stall_count": self._stall_count,
+                "routes": routes,
+                "recent_stalls": list(reversed(self._stalls)),
+            }
+
+
+class LoopMonitorMiddleware:
+    """ASGI 中间件：登记每个请求所在的任务，供阻塞发生时定位路由"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        loop_monitor.request_started(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.request_finished()
+
+
+# 创建全局事件循环监控实例，方便导入使用
+loop_monitor = LoopMonitor()
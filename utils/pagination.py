@@ -0,0 +1,205 @@
+"""
+分页查询
+筛选条件只构建一次：精确计数模式在分页查询中附加 COUNT(*) OVER() 窗口计数，一次往返同时得到当页数据与总数；
+估算计数模式（count=estimate）不统计总数，以 EXPLAIN 的规划器行数估算值作为总数，
+用于 system_logs 等数据量很大、精确计数需要扫描全部匹配行的表；
+按时间排序的大表另支持游标分页（keyset）：按 (时间列, id) 倒序，响应返回下一页游标 next_cursor，
+携带 cursor 请求时以 (时间列, id) < 游标值 代替 OFFSET，配合 (时间列, id) 组合索引，任意深度的翻页与第一页代价相同
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# 列表接口 count 参数说明与取值
+COUNT_DESCRIPTION = "总数计算方式：exact 精确计数，estimate 按数据库统计信息估算（大表更快）"
+COUNT_PATTERN = "^(exact|estimate)$"
+
+# 列表接口 cursor 参数说明
+CURSOR_DESCRIPTION = "分页游标：传入上一页响应中的 next_cursor 获取下一页（忽略 page 的偏移），深度翻页时使用"
+
+# 窗口计数列的标签
+TOTAL_LABEL = "_pagination_total"
+# 游标列（排序时间列、id）的标签
+CURSOR_LABELS = ("_cursor_0", "_cursor_1")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键值编码为不透明的游标（base64url JSON，日期时间带类型标记）"""
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            value = {"dt": value.isoformat()}
+        elif isinstance(value, date):
+            value = {"d": value.isoformat()}
+        payload.append(value)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+    """
+    解码游标为排序键值
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = []
+        for value in payload:
+            if isinstance(value, dict):
+                value = datetime.fromisoformat(value["dt"]) if "dt" in value else date.fromisoformat(value["d"])
+            values.append(value)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError("无效的分页游标")
+    if len(values) != len(CURSOR_LABELS):
+        raise ValueError("无效的分页游标")
+    return tuple(values)
+
+
+@dataclass
+class Page:
+    """分页查询结果"""
+    # 当页数据：查询单个实体时为实体，查询列时为结果行
+    items: List[Any]
+    total: int
+    page: int
+    page_size: int
+    # total 是否为估算值
+    estimated: bool = False
+    # 是否为游标分页查询（响应包含 next_cursor）
+    keyset: bool = False
+    # 下一页游标，没有下一页时为 None
+    next_cursor: Optional[str] = None
+
+    @property
+    def meta(self) -> dict:
+        """分页响应字段（与 items 一起组成列表接口的 data）"""
+        meta = {
+            "total": self.total,
+            "page": self.page,
+            "page_size": self.page_size,
+            "total_pages": (self.total + self.page_size - 1) // self.page_size,
+            "total_estimated": self.estimated
+        }
+        if self.keyset:
+            meta["next_cursor"] = self.next_cursor
+        return meta
+
+
+def _page_stmt(stmt: Select, page: int, page_size: int, exact: bool,
+               keyset: Optional[tuple] = None, after: Optional[tuple] = None) -> Select:
+    if keyset:
+        # 按 (时间列, id) 倒序，附加游标列用于生成下一页游标
+        column, id_column = keyset
+        stmt = stmt.order_by(None).order_by(column.desc(), id_column.desc()).add_columns(
+            column.label(CURSOR_LABELS[0]), id_column.label(CURSOR_LABELS[1]))
+        if after is not None:
+            return stmt.where(tuple_(column, id_column) < tuple_(*after)).limit(page_size)
+    if exact:
+        stmt = stmt.add_columns(func.count().over().label(TOTAL_LABEL))
+    return stmt.offset((page - 1) * page_size).limit(page_size)
+
+
+def _next_cursor(rows, page_size: int) -> Optional[str]:
+    """取满一页时以最后一行的排序键生成下一页游标"""
+    if len(rows) < page_size:
+        return None
+    last = rows[-1]._mapping
+    return encode_cursor([last[label] for label in CURSOR_LABELS])
+
+
+def _count_stmt(stmt: Select) -> Select:
+    """与分页查询筛选条件相同的计数查询"""
+    return stmt.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
+
+
+def _explain_sql(stmt: Select, dialect):
+    """估算行数用的 EXPLAIN 语句（驱动层 SQL 与参数）"""
+    compiled = stmt.order_by(None).compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    return f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+
+
+def _plan_rows(plan) -> int:
+    """从 EXPLAIN (FORMAT JSON) 结果中取出规划器估算的行数"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _items(stmt: Select, rows) -> List[Any]:
+    # 查询单个实体时与 session.scalars 一致，直接返回实体；查询列时返回结果行
+    descriptions = stmt.column_descriptions
+    if len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0].get("entity"):
+        return [row[0] for row in rows]
+    return list(rows)
+
+
+def paginate(session: Session, stmt: Select, page: int, page_size: int, count: str = "exact",
+             keyset: Optional[tuple] = None, cursor: Optional[str] = None) -> Page:
+    """
+    分页查询（同步 Session）
+
+    Args:
+        stmt: 已包含筛选条件与排序的查询
+        count: exact（窗口计数）/ estimate（规划器估算）
+        keyset: 游标分页的排序列 (时间列, id 列)，指定后按其倒序排列（替换 stmt 的排序）并返回 next_cursor
+        cursor: 上一页的 next_cursor，指定后不使用 OFFSET；总数仍按 count 计算（游标模式下精确计数需单独查询）
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    after = decode_cursor(cursor) if keyset and cursor else None
+    exact = count != "estimate"
+    # 游标模式下窗口计数只能统计游标之后的行，总数单独计算
+    window = exact and after is None
+    rows = session.execute(_page_stmt(stmt, page, page_size, window, keyset, after)).all()
+    next_cursor = _next_cursor(rows, page_size) if keyset else None
+    if not exact:
+        sql, params = _explain_sql(stmt, session.get_bind().dialect)
+        total = _plan_rows(session.connection().exec_driver_sql(sql, params).scalar())
+        # 估算值不应小于已取到的行数
+        total = max(total, (page - 1) * page_size + len(rows))
+        return Page(_items(stmt, rows), total, page, page_size, estimated=True,
+                    keyset=bool(keyset), next_cursor=next_cursor)
+    if window and rows:
+        total = rows[0]._mapping[TOTAL_LABEL]
+    elif window and page == 1:
+        total = 0
+    else:
+        # 页码超出范围时窗口计数没有返回行，或为游标模式，单独计数
+        total = session.execute(_count_stmt(stmt)).scalar()
+    return Page(_items(stmt, rows), total, page, page_size, keyset=bool(keyset), next_cursor=next_cursor)
+
+
+async def paginate_async(session: AsyncSession, stmt: Select, page: int, page_size: int,
+                         count: str = "exact", keyset: Optional[tuple] = None,
+                         cursor: Optional[str] = None) -> Page:
+    """分页查询（AsyncSession），参数同 paginate"""
+    after = decode_cursor(cursor) if keyset and cursor else None
+    exact = count != "estimate"
+    window = exact and after is None
+    rows = (await session.execute(_page_stmt(stmt, page, page_size, window, keyset, after))).all()
+    next_cursor = _next_cursor(rows, page_size) if keyset else None
+    if not exact:
+        sql, params = _explain_sql(stmt, session.get_bind().dialect)
+        connection = await session.connection()
+        total = _plan_rows((await connection.exec_driver_sql(sql, params)).scalar())
+        total = max(total, (page - 1) * page_size + len(rows))
+        return Page(_items(stmt, rows), total, page, page_size, estimated=True,
+                    keyset=bool(keyset), next_cursor=next_cursor)
+    if window and rows:
+        total = rows[0]._mapping[TOTAL_LABEL]
+    elif window and page == 1:
+        total = 0
+    else:
+        total = (await session.execute(_count_stmt(stmt))).scalar()
+    return Page(_items(stmt, rows), total, page, page_size, keyset=bool(keyset), next_cursor=next_cursor)
@@ -0,0 +1,90 @@
+"""
+列表接口稀疏字段集（fields= 查询参数）
+fields 指定返回的字段（逗号分隔），只 SELECT 对应的列并直接构建响应字典，不加载整行、不逐行 model_validate；
+JSONB 与长文本等大字段默认不查询不返回，需在 fields 中显式指定（或 fields=* 返回全部字段）；
+关联信息按关联表批量查询（load_by_ids，每张表一次 IN 查询），不逐行查询
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+# 列表接口 fields 参数说明
+FIELDS_DESCRIPTION = "返回字段（逗号分隔），缺省返回除大字段外的全部字段，* 返回全部字段"
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """一个列表接口可返回的字段"""
+    # 数据表模型
+    model: Type[SQLModel]
+    # 响应模型，其字段即允许返回的字段
+    response_model: Type[BaseModel]
+    # 默认不返回的大字段（JSONB、长文本），需在 fields 中显式指定
+    heavy: Tuple[str, ...] = ()
+    # 关联信息字段 -> 填充该字段所需的外键列（由接口另行查询填充）
+    relations: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def columns(self) -> List[str]:
+        """响应模型中对应数据表列的字段"""
+        table_columns = self.model.__table__.columns
+        return [name for name in self.response_model.model_fields if name in table_columns]
+
+    def resolve(self, fields: Optional[str]) -> List[str]:
+        """
+        解析 fields 参数，返回要输出的字段（id 总是包含）
+
+        Raises:
+            ValueError: 包含不支持的字段
+        """
+        allowed = self.columns + list(self.relations)
+        if fields is None or not fields.strip():
+            return [name for name in allowed if name not in self.heavy]
+        if fields.strip() == "*":
+            return allowed
+
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+        # 按响应模型的字段顺序输出
+        return [name for name in allowed if name == "id" or name in requested]
+
+    def select(self, names: List[str]) -> list:
+        """要查询的列（包含关联信息所需的外键列）"""
+        needed = set(names) | {self.relations[name] for name in names if name in self.relations}
+        return [getattr(self.model, name) for name in self.columns if name in needed]
+
+    def to_dict(self, row, names: List[str]) -> dict:
+        """将查询结果行转换为响应字典（只包含要输出的列字段）"""
+        return {name: getattr(row, name) for name in names if name not in self.relations}
+
+    def related_ids(self, rows, names: List[str], *relations: str) -> set:
+        """当页数据中要输出的关联信息所引用的外键值（去重、去空）"""
+        columns = [self.relations[name] for name in relations if name in names]
+        return {getattr(row, column) for row in rows for column in columns} - {None}
+
+
+def _by_ids_stmt(model: Type[SQLModel], ids: set):
+    return select(model).where(model.id.in_(ids))
+
+
+def load_by_ids(session: Session, model: Type[SQLModel], ids: Iterable[Any]) -> Dict[Any, Any]:
+    """按主键批量查询（一次 IN 查询），返回 {id: 实体}"""
+    ids = set(ids) - {None}
+    if not ids:
+        return {}
+    return {obj.id: obj for obj in session.scalars(_by_ids_stmt(model, ids))}
+
+
+async def load_by_ids_async(session: AsyncSession, model: Type[SQLModel], ids: Iterable[Any]) -> Dict[Any, Any]:
+    """按主键批量查询（AsyncSession），参数同 load_by_ids"""
+    ids = set(ids) - {None}
+    if not ids:
+        return {}
+    return {obj.id: obj for obj in (await session.scalars(_by_ids_stmt(model, ids)))}
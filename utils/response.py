@@ -1,10 +1,17 @@
 from typing import Optional,Any
-from pydantic import BaseModel
+from pydantic import BaseModel, field_serializer
+
+from utils.derivative_store import sign_urls
 
 class ResponseModel(BaseModel):
     code: int
     msg: str
     data: Optional[Any] = None
+
+    @field_serializer("data", mode="wrap")
+    def _sign_derivative_urls(self, data, handler):
+        # 缩略图等派生图像URL 由浏览器直接加载（不带 Bearer 令牌），输出时附加有时限的签名
+        return sign_urls(handler(data))
     
 
 def success_response(data: dict = None, code: int = 200, msg: str = "success"):
@@ -0,0 +1,125 @@
+"""
+缩略图生成模块
+统一生成按最长边缩小的缩略图：JPEG 文件利用 draft 模式在 DCT 域按接近目标尺寸解码，
+已解码的像素数组直接缩小，使用快速的重采样滤波器；
+入库时保存规范格式 JPEG（访问URL 指向 JPEG），开启 WebP 时另存同名 WebP 变体，
+由 GET /api/derivatives/{name} 在访问时按请求的 Accept 头选择返回（negotiate_format）
+"""
+import base64
+from io import BytesIO
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import config
+from utils.derivative_store import derivative_store
+
+# 缩略图格式
+FORMAT_JPEG = "jpeg"
+FORMAT_WEBP = "webp"
+
+MIME_TYPES = {
+    FORMAT_JPEG: "image/jpeg",
+    FORMAT_WEBP: "image/webp",
+}
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """根据请求的 Accept 头选择缩略图格式"""
+    if accept and config.config.thumbnail.webp_enabled and MIME_TYPES[FORMAT_WEBP] in accept:
+        return FORMAT_WEBP
+    return FORMAT_JPEG
+
+
+def _quality(fmt: str, quality: Optional[int]) -> int:
+    if quality is not None:
+        return quality
+    thumbnail_config = config.config.thumbnail
+    return thumbnail_config.webp_quality if fmt == FORMAT_WEBP else thumbnail_config.jpeg_quality
+
+
+def _resize_file(path: str, max_size: int) -> Image.Image:
+    """按接近目标尺寸解码图像文件（JPEG draft 模式）并缩小"""
+    with Image.open(path) as img:
+        img.draft(img.mode if img.mode in ("L", "RGB") else "RGB", (max_size, max_size))
+        if img.mode not in ("L", "RGB"):
+            img = img.convert("RGB")
+        img.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+        img.load()
+        return img
+
+
+def _encode_pil(img: Image.Image, fmt: str, quality: Optional[int]) -> bytes:
+    buffer = BytesIO()
+    if fmt == FORMAT_WEBP:
+        img.save(buffer, format="WEBP", quality=_quality(fmt, quality), method=0)
+    else:
+        img.save(buffer, format="JPEG", quality=_quality(fmt, quality))
+    return buffer.getvalue()
+
+
+def _resize_array(image: np.ndarray, max_size: int) -> np.ndarray:
+    height, width = image.shape[:2]
+    scale = max_size / max(height, width)
+    if scale < 1:
+        image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    return image
+
+
+def _encode_array(image: np.ndarray, fmt: str, quality: Optional[int]) -> bytes:
+    if fmt == FORMAT_WEBP:
+        ok, encoded = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, _quality(fmt, quality)])
+    else:
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, _quality(fmt, quality)])
+    if not ok:
+        raise ValueError("缩略图编码失败")
+    return encoded.tobytes()
+
+
+def thumbnail_from_file(path: str, max_size: Optional[int] = None, fmt: str = FORMAT_JPEG,
+                        quality: Optional[int] = None) -> bytes:
+    """
+    由图像文件生成缩略图（JPEG 使用 draft 模式按接近目标尺寸解码，不做全分辨率解码）
+
+    Returns:
+        编码后的缩略图字节
+    """
+    return _encode_pil(_resize_file(path, max_size or config.config.thumbnail.max_size), fmt, quality)
+
+
+def thumbnail_from_array(image: np.ndarray, max_size: Optional[int] = None, fmt: str = FORMAT_JPEG,
+                         quality: Optional[int] = None) -> bytes:
+    """
+    由已解码的像素数组（灰度或 BGR）生成缩略图
+
+    Returns:
+        编码后的缩略图字节
+    """
+    return _encode_array(_resize_array(image, max_size or config.config.thumbnail.max_size), fmt, quality)
+
+
+def _store(encode: Callable[[str], bytes]) -> str:
+    """保存规范格式 JPEG 缩略图，开启 WebP 时另存同名 WebP 变体，返回 JPEG 的访问URL"""
+    variants = {FORMAT_WEBP: encode(FORMAT_WEBP)} if config.config.thumbnail.webp_enabled else None
+    return derivative_store.put(encode(FORMAT_JPEG), FORMAT_JPEG, variants)
+
+
+def store_thumbnail_from_file(path: str, max_size: Optional[int] = None, quality: Optional[int] = None) -> str:
+    """由图像文件生成缩略图（只解码、缩小一次）并保存到派生图像存储，返回访问URL"""
+    img = _resize_file(path, max_size or config.config.thumbnail.max_size)
+    return _store(lambda fmt: _encode_pil(img, fmt, quality))
+
+
+def store_thumbnail_from_array(image: np.ndarray, max_size: Optional[int] = None,
+                               quality: Optional[int] = None) -> str:
+    """由已解码的像素数组生成缩略图（只缩小一次）并保存到派生图像存储，返回访问URL"""
+    image = _resize_array(image, max_size or config.config.thumbnail.max_size)
+    return _store(lambda fmt: _encode_array(image, fmt, quality))
+
+
+def to_data_url(data: bytes, fmt: str = FORMAT_JPEG) -> str:
+    """将缩略图字节转换为 base64 data URL"""
+    return f"data:{MIME_TYPES[fmt]};base64,{base64.b64encode(data).decode('utf-8')}"
@@ -0,0 +1,229 @@
+"""
+深度缩放（DZI）瓦片金字塔
+影像查看器按 Deep Zoom 规范请求瓦片：层级 L 的图像边长为原图的 1/2^(max_level-L)，
+max_level = ceil(log2(max(宽, 高)))，每层切分为 tile_size 的瓦片（相邻瓦片重叠 overlap 像素）。
+瓦片按层级惰性生成并缓存在派生图像目录下（源文件路径、大小、修改时间共同决定缓存目录，源文件变化后自动失效），
+缺失的层级在瓦片线程池中整层生成；入库时预生成低分辨率层级，缩放平移只需请求少量小瓦片
+"""
+import asyncio
+import hashlib
+import math
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import config
+from loguru_logging import log
+from utils.derivative_store import derivative_store
+
+DZI_NAMESPACE = "http://schemas.microsoft.com/deepzoom/2008"
+TILE_FORMAT = "jpg"
+
+
+@dataclass
+class PyramidInfo:
+    """源图像对应的瓦片金字塔"""
+    source: str
+    width: int
+    height: int
+    max_level: int
+    # 瓦片缓存目录（按源文件版本区分）
+    directory: pathlib.Path
+
+    def level_size(self, level: int) -> tuple[int, int]:
+        """层级图像尺寸 (宽, 高)"""
+        scale = 2 ** (self.max_level - level)
+        return max(1, math.ceil(self.width / scale)), max(1, math.ceil(self.height / scale))
+
+    def grid(self, level: int, tile_size: int) -> tuple[int, int]:
+        """层级瓦片列数与行数"""
+        width, height = self.level_size(level)
+        return math.ceil(width / tile_size), math.ceil(height / tile_size)
+
+    def overview_level(self, tile_size: int) -> int:
+        """整图可放入单个瓦片的最高层级"""
+        return max(0, self.max_level - max(0, math.ceil(math.log2(max(self.width, self.height) / tile_size))))
+
+
+class TilePyramid:
+    """DZI 瓦片金字塔生成与缓存 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TilePyramid, cls).__new__(cls)
+            cls._instance._executor = None
+            cls._instance._lock = threading.Lock()
+            cls._instance._level_locks = {}
+        return cls._instance
+
+    @property
+    def settings(self):
+        return config.config.tile_pyramid
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.settings.workers,
+                                                    thread_name_prefix="tile-pyramid")
+            return self._executor
+
+    def shutdown(self):
+        """关闭瓦片线程池（未开始的预生成任务直接丢弃）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== 金字塔信息 ====================
+
+    def info(self, source: str) -> PyramidInfo:
+        """
+        读取源图像尺寸（只解析文件头）并定位瓦片缓存目录
+
+        Raises:
+            FileNotFoundError: 源文件不存在
+        """
+        stat_result = os.stat(source)
+        with Image.open(source) as img:
+            width, height = img.size
+        key = f"{os.path.abspath(source)}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return PyramidInfo(
+            source=source,
+            width=width,
+            height=height,
+            max_level=math.ceil(math.log2(max(width, height, 1))),
+            directory=derivative_store.root.joinpath("tiles", digest[:2], digest)
+        )
+
+    def descriptor(self, info: PyramidInfo) -> str:
+        """DZI 描述文件（XML）"""
+        return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<Image xmlns="{DZI_NAMESPACE}" Format="{TILE_FORMAT}" '
+                f'Overlap="{self.settings.overlap}" TileSize="{self.settings.tile_size}">'
+                f'<Size Width="{info.width}" Height="{info.height}"/></Image>')
+
+    def _level_dir(self, info: PyramidInfo, level: int) -> pathlib.Path:
+        return info.directory.joinpath(str(level))
+
+    # ==================== 瓦片生成 ====================
+
+    def _cut_level(self, image: np.ndarray, info: PyramidInfo, level: int) -> np.ndarray:
+        """
+        生成一个层级的全部瓦片（先写入临时目录，完成后整体改名，避免读取到不完整的层级）
+
+        Returns:
+            缩放到该层级尺寸的图像（供生成更小的层级继续缩放）
+        """
+        tile_size, overlap = self.settings.tile_size, self.settings.overlap
+        width, height = info.level_size(level)
+        if (width, height) != (image.shape[1], image.shape[0]):
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.settings.jpeg_quality]
+
+        level_dir = self._level_dir(info, level)
+        level_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = pathlib.Path(tempfile.mkdtemp(dir=level_dir.parent, prefix=f"{level}.", suffix=".tmp"))
+        try:
+            cols, rows = info.grid(level, tile_size)
+            for row in range(rows):
+                y0 = max(0, row * tile_size - overlap)
+                y1 = min(height, (row + 1) * tile_size + overlap)
+                for col in range(cols):
+                    x0 = max(0, col * tile_size - overlap)
+                    x1 = min(width, (col + 1) * tile_size + overlap)
+                    ok, encoded = cv2.imencode(f".{TILE_FORMAT}", image[y0:y1, x0:x1], params)
+                    if not ok:
+                        raise ValueError(f"瓦片编码失败: {info.source} level={level}")
+                    encoded.tofile(str(tmp_dir.joinpath(f"{col}_{row}.{TILE_FORMAT}")))
+            os.replace(tmp_dir, level_dir)
+            return image
+        except OSError:
+            # 其他进程已生成同一层级（目标目录已存在），丢弃本次结果
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not level_dir.is_dir():
+                raise
+            return image
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def build_levels(self, info: PyramidInfo, levels: Iterable[int]):
+        """生成缺失的层级（源图像最多解码一次，由高到低逐层缩放）"""
+        image = None
+        for level in sorted(set(levels), reverse=True):
+            lock_key = (info.directory, level)
+            with self._lock:
+                level_lock = self._level_locks.setdefault(lock_key, threading.Lock())
+            with level_lock:
+                if not self._level_dir(info, level).is_dir():
+                    if image is None:
+                        image = cv2.imdecode(np.fromfile(info.source, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+                        if image is None:
+                            raise ValueError(f"无法读取图像: {info.source}")
+                    image = self._cut_level(image, info, level)
+            with self._lock:
+                self._level_locks.pop(lock_key, None)
+
+    def tile_path(self, source: str, level: int, col: int, row: int) -> pathlib.Path:
+        """
+        获取瓦片文件路径，所在层级尚未生成时整层生成
+
+        Raises:
+            FileNotFoundError: 源文件不存在
+            ValueError: 层级或瓦片坐标超出范围
+        """
+        info = self.info(source)
+        if not 0 <= level <= info.max_level:
+            raise ValueError(f"层级超出范围: {level}（0-{info.max_level}）")
+        cols, rows = info.grid(level, self.settings.tile_size)
+        if not (0 <= col < cols and 0 <= row < rows):
+            raise ValueError(f"瓦片坐标超出范围: {col}_{row}（层级 {level} 为 {cols}×{rows}）")
+        path = self._level_dir(info, level).joinpath(f"{col}_{row}.{TILE_FORMAT}")
+        if not path.exists():
+            self.build_levels(info, [level])
+        return path
+
+    def warm_up(self, source: str):
+        """预生成低分辨率层级：概览层级及其上 warm_levels - 1 层，以及更小的全部层级"""
+        info = self.info(source)
+        top = min(info.max_level, info.overview_level(self.settings.tile_size) + self.settings.warm_levels - 1)
+        self.build_levels(info, range(top + 1))
+
+    # ==================== 异步接口 ====================
+
+    async def get_descriptor(self, source: str) -> str:
+        """获取 DZI 描述文件（读取文件头在线程中执行，不占用瓦片线程池）"""
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, self.info, source)
+        return self.descriptor(info)
+
+    async def get_tile(self, source: str, level: int, col: int, row: int) -> pathlib.Path:
+        """获取瓦片文件路径，缺失的层级在瓦片线程池中生成，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.tile_path, source, level, col, row)
+
+    def schedule_warm_up(self, source: str):
+        """提交预生成任务到瓦片线程池（不等待结果，失败只记录日志，瓦片仍可按需生成）"""
+        if self.settings.warm_levels <= 0:
+            return
+        future = self._get_executor().submit(self.warm_up, source)
+
+        def _done(f):
+            if not f.cancelled() and f.exception() is not None:
+                log.warning(f"瓦片金字塔预生成失败: {source}, {f.exception()}")
+        future.add_done_callback(_done)
+
+
+# 创建全局瓦片金字塔实例，方便导入使用
+tile_pyramid = TilePyramid()